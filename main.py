@@ -37,10 +37,7 @@ class ServiceManager:
             if self._rag_system:
                 logger.info("Closing RAG system resources...")
                 try:
-                    # 关闭图数据库连接
-                    if hasattr(self._rag_system, 'graph_store'):
-                        logger.info("Closing graph database connection...")
-                        self._rag_system.graph_store.close()
+                    # 图数据库连接（异步驱动）在API服务的shutdown事件中关闭
                     
                     # 关闭数据库连接
                     if hasattr(self._rag_system, 'doc_processor') and hasattr(self._rag_system.doc_processor, 'store'):
@@ -49,6 +46,10 @@ class ServiceManager:
                             self._rag_system.doc_processor.store.close()
                         except Exception as e:
                             logger.error(f"Error closing database connection: {str(e)}")
+                    
+                    # 关闭常驻的文档转换进程
+                    if hasattr(self._rag_system, 'doc_processor') and hasattr(self._rag_system.doc_processor, 'doc_converter'):
+                        self._rag_system.doc_processor.doc_converter.close()
                 except Exception as e:
                     logger.error(f"Error closing database connections: {str(e)}")
             
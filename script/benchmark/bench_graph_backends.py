@@ -0,0 +1,94 @@
+"""
+图存储上传/查询路径基准测试
+
+通过图存储接口模拟上传链路：写入文档节点、批量写入片段，再读取文档元数据和片段，
+分别记录每个文档的写入和查询耗时。可选择neo4j或sqlite后端，sqlite不需要任何外部服务。
+
+用法:
+    python script/benchmark/bench_graph_backends.py --backend sqlite --documents 50 --chunks 200
+    python script/benchmark/bench_graph_backends.py --backend neo4j --documents 50 --chunks 200
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import os
+import tempfile
+import time
+import uuid
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.config import settings
+from src.models.graph.graph_store_factory import create_graph_store
+
+
+def _report(name: str, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{name}: 平均 {statistics.mean(latencies) * 1000:.2f} ms, "
+          f"p50 {statistics.median(latencies) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms")
+
+
+async def run(args):
+    graph_store = create_graph_store()
+    await graph_store.ensure_schema()
+
+    doc_ids = []
+    write_latencies = []
+    read_latencies = []
+    try:
+        for _ in range(args.documents):
+            doc_id = f"bench-{uuid.uuid4()}"
+            doc_ids.append(doc_id)
+            rows = []
+            for i in range(args.chunks):
+                chunk_id = f"{doc_id}_chunk_{i}"
+                rows.append({
+                    "chunk_id": chunk_id,
+                    "content": f"基准测试片段内容 {i}",
+                    "metadata": {"chunk_id": chunk_id, "doc_id": doc_id, "chunk_index": i}
+                })
+
+            start = time.perf_counter()
+            await graph_store.create_document_node(doc_id, {"doc_id": doc_id, "filename": "benchmark"})
+            await graph_store.create_chunk_nodes(doc_id, rows)
+            write_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await graph_store.get_document_metadata(doc_id)
+            await graph_store.get_document_chunks(doc_id)
+            read_latencies.append(time.perf_counter() - start)
+
+        print(f"后端: {settings.graph_store_type}, 文档数: {args.documents}, 每个文档片段数: {args.chunks}")
+        _report("写入（文档节点+片段）", write_latencies)
+        _report("查询（元数据+全部片段）", read_latencies)
+    finally:
+        if settings.graph_store_type == "neo4j":
+            # 清理基准测试数据
+            async with graph_store.driver.session() as session:
+                result = await session.run(
+                    "MATCH (d:Document) WHERE d.doc_id IN $doc_ids "
+                    "OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk) DETACH DELETE d, c",
+                    doc_ids=doc_ids
+                )
+                await result.consume()
+        await graph_store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图存储上传/查询路径基准测试')
+    parser.add_argument('--backend', choices=['neo4j', 'sqlite'], default='sqlite', help='图存储后端')
+    parser.add_argument('--documents', type=int, default=50, help='写入的文档数')
+    parser.add_argument('--chunks', type=int, default=200, help='每个文档的片段数')
+    args = parser.parse_args()
+
+    settings.graph_store_type = args.backend
+    if args.backend == "sqlite":
+        # 使用临时数据库文件，不影响本地数据
+        settings.sqlite_graph_db_path = os.path.join(tempfile.mkdtemp(), "bench_graph.db")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
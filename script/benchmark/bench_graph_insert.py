@@ -0,0 +1,72 @@
+"""
+图数据库片段写入延迟基准测试
+
+向一个临时文档反复写入片段，记录每一轮的写入耗时，观察随着图中片段数量增长耗时是否保持平稳。
+有唯一约束时MERGE走索引查找，耗时应基本不变；没有约束时MERGE是按标签扫描，耗时随片段总数线性增长。
+
+用法:
+    python script/benchmark/bench_graph_insert.py --rounds 20 --chunks-per-round 1000
+    python script/benchmark/bench_graph_insert.py --skip-schema   # 不创建约束，作为对照
+"""
+import argparse
+import statistics
+import sys
+import os
+import time
+import uuid
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.models.graph.graph_store import GraphStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='图数据库片段写入延迟基准测试')
+    parser.add_argument('--rounds', type=int, default=20, help='写入轮数')
+    parser.add_argument('--chunks-per-round', type=int, default=1000, help='每轮写入的片段数')
+    parser.add_argument('--skip-schema', action='store_true', help='不创建约束和索引')
+    args = parser.parse_args()
+
+    graph_store = GraphStore()
+    if not args.skip_schema:
+        graph_store.ensure_schema()
+
+    doc_id = f"bench-{uuid.uuid4()}"
+    graph_store.create_document_node(doc_id, {"doc_id": doc_id, "filename": "benchmark"})
+
+    latencies = []
+    try:
+        for r in range(args.rounds):
+            rows = []
+            for i in range(args.chunks_per_round):
+                index = r * args.chunks_per_round + i
+                chunk_id = f"{doc_id}_chunk_{index}"
+                rows.append({
+                    "chunk_id": chunk_id,
+                    "content": f"基准测试片段内容 {index}",
+                    "metadata": {"chunk_id": chunk_id, "doc_id": doc_id, "chunk_index": index}
+                })
+
+            start = time.perf_counter()
+            graph_store.create_chunk_nodes(doc_id, rows)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            total = (r + 1) * args.chunks_per_round
+            print(f"第{r + 1:>3}轮: 累计片段 {total:>8}, 本轮耗时 {elapsed * 1000:8.1f} ms, "
+                  f"单片段 {elapsed * 1e6 / args.chunks_per_round:8.1f} us")
+
+        first = statistics.mean(latencies[:max(1, len(latencies) // 4)])
+        last = statistics.mean(latencies[-max(1, len(latencies) // 4):])
+        print(f"前1/4轮平均 {first * 1000:.1f} ms，后1/4轮平均 {last * 1000:.1f} ms，比值 {last / first:.2f}")
+    finally:
+        # 清理基准测试数据
+        with graph_store.driver.session() as session:
+            session.run(
+                "MATCH (d:Document {doc_id: $doc_id}) OPTIONAL MATCH (d)-[:CONTAINS]->(c:Chunk) DETACH DELETE d, c",
+                doc_id=doc_id
+            ).consume()
+        graph_store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+MySQL摘要库连接池基准测试
+
+多个线程并发按doc_id读取文档摘要，对比每次调用新建连接与使用连接池时的读取延迟和吞吐。
+使用MYSQL_*配置连接数据库，可以用本地容器代替生产库，例如:
+    docker run -d --name bench-mariadb -e MARIADB_ROOT_PASSWORD=bench -e MARIADB_DATABASE=rag_agent -p 3306:3306 mariadb:11
+
+用法:
+    python script/benchmark/bench_mysql_pool.py --threads 16 --requests 500
+    python script/benchmark/bench_mysql_pool.py --threads 16 --requests 500 --no-pool
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.config import settings
+from src.models.storage.mysql_store import MySQLStore
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MySQL摘要库连接池基准测试')
+    parser.add_argument('--threads', type=int, default=16, help='并发线程数')
+    parser.add_argument('--requests', type=int, default=500, help='每个线程的读取次数')
+    parser.add_argument('--seed-rows', type=int, default=1000, help='预先写入的摘要数')
+    parser.add_argument('--no-pool', action='store_true', help='不使用连接池（每次调用新建连接）')
+    args = parser.parse_args()
+
+    settings.mysql_pool_enabled = not args.no_pool
+    settings.mysql_max_connections = max(settings.mysql_max_connections, args.threads)
+    store = MySQLStore()
+
+    doc_ids = [f"bench-{uuid.uuid4()}" for _ in range(args.seed_rows)]
+    store.restore_summary_rows([
+        {"doc_id": doc_id, "filename": "bench.txt", "summary": "基准测试摘要内容"}
+        for doc_id in doc_ids
+    ])
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        local = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            store.get_document_summary(random.choice(doc_ids))
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"连接池: {'关闭' if args.no_pool else '开启'}, 线程数: {args.threads}, 总请求数: {len(latencies)}")
+    print(f"吞吐 {len(latencies) / elapsed:.0f}次/秒, p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.2f} ms")
+
+    # 清理基准测试数据
+    with store.connection_context:
+        store.DocumentSummary.delete().where(store.DocumentSummary.doc_id.in_(doc_ids)).execute()
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
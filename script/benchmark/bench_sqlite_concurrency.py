@@ -0,0 +1,95 @@
+"""
+SQLite摘要库并发读写基准测试
+
+若干写线程持续保存文档摘要（模拟并发上传），同时若干读线程分页查询摘要列表，统计读请求的延迟分布。
+通过--journal-mode等参数对比不同配置，例如默认的delete模式与wal模式下读请求的p99。
+
+用法:
+    python script/benchmark/bench_sqlite_concurrency.py --journal-mode wal --synchronous normal
+    python script/benchmark/bench_sqlite_concurrency.py --journal-mode delete --synchronous full
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.config import settings
+from src.models.storage.sqlite_store import SQLiteStore
+
+
+def _percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite摘要库并发读写基准测试')
+    parser.add_argument('--journal-mode', default=settings.sqlite_journal_mode, help='日志模式（delete/wal）')
+    parser.add_argument('--synchronous', default=settings.sqlite_synchronous, help='同步级别（off/normal/full）')
+    parser.add_argument('--writers', type=int, default=4, help='写线程数')
+    parser.add_argument('--readers', type=int, default=8, help='读线程数')
+    parser.add_argument('--seed-rows', type=int, default=10000, help='预先写入的摘要数')
+    parser.add_argument('--duration', type=float, default=10.0, help='测试时长（秒）')
+    args = parser.parse_args()
+
+    settings.sqlite_db_path = os.path.join(tempfile.mkdtemp(), "bench_summaries.db")
+    settings.sqlite_journal_mode = args.journal_mode
+    settings.sqlite_synchronous = args.synchronous
+    store = SQLiteStore()
+
+    summary = "基准测试摘要内容" * 50
+    store.restore_summary_rows([
+        {"doc_id": str(uuid.uuid4()), "filename": "seed.txt", "summary": summary}
+        for _ in range(args.seed_rows)
+    ])
+
+    stop = threading.Event()
+    read_latencies = []
+    write_latencies = []
+    lock = threading.Lock()
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            store.save_document_summary(str(uuid.uuid4()), "bench.txt", summary)
+            elapsed = time.perf_counter() - start
+            with lock:
+                write_latencies.append(elapsed)
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            store.get_paginated_summaries(page=1, page_size=20)
+            elapsed = time.perf_counter() - start
+            with lock:
+                read_latencies.append(elapsed)
+
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"journal_mode={args.journal_mode}, synchronous={args.synchronous}, "
+          f"写线程={args.writers}, 读线程={args.readers}, 时长={args.duration}秒")
+    for name, values in (("读", read_latencies), ("写", write_latencies)):
+        if not values:
+            print(f"{name}: 无完成的请求")
+            continue
+        print(f"{name}: {len(values)}次, {len(values) / args.duration:.0f}次/秒, "
+              f"p50 {statistics.median(values) * 1000:.2f} ms, "
+              f"p99 {_percentile(values, 0.99) * 1000:.2f} ms, 最大 {max(values) * 1000:.2f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
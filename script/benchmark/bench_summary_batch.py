@@ -0,0 +1,79 @@
+"""
+文档摘要批量读写基准测试
+
+对比逐条save_document_summary与批量save_document_summaries的写入耗时，
+以及逐条get_document_summary与批量get_document_summaries的读取耗时。
+使用DB_TYPE配置的数据库（sqlite时使用临时数据库文件，mysql时使用MYSQL_*配置，结束后清理测试数据）。
+
+用法:
+    python script/benchmark/bench_summary_batch.py --rows 5000 --lookup 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.config import settings
+
+
+def _create_store():
+    if settings.db_type.lower() == "mysql":
+        from src.models.storage.mysql_store import MySQLStore
+        return MySQLStore()
+    from src.models.storage.sqlite_store import SQLiteStore
+    settings.sqlite_db_path = os.path.join(tempfile.mkdtemp(), "bench_summaries.db")
+    return SQLiteStore()
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文档摘要批量读写基准测试')
+    parser.add_argument('--rows', type=int, default=5000, help='写入的摘要数')
+    parser.add_argument('--lookup', type=int, default=100, help='每次批量读取的doc_id数')
+    args = parser.parse_args()
+
+    store = _create_store()
+    summary = "基准测试摘要内容" * 50
+
+    single_rows = [{"doc_id": f"bench-{uuid.uuid4()}", "filename": "bench.txt", "summary": summary}
+                   for _ in range(args.rows)]
+    batch_rows = [{"doc_id": f"bench-{uuid.uuid4()}", "filename": "bench.txt", "summary": summary}
+                  for _ in range(args.rows)]
+    lookup_ids = [row["doc_id"] for row in batch_rows[:args.lookup]]
+
+    try:
+        single_write = _timed(lambda: [
+            store.save_document_summary(row["doc_id"], row["filename"], row["summary"]) for row in single_rows
+        ])
+        batch_write = _timed(lambda: store.save_document_summaries(batch_rows))
+        single_read = _timed(lambda: [store.get_document_summary(doc_id) for doc_id in lookup_ids])
+        batch_read = _timed(lambda: store.get_document_summaries(lookup_ids))
+
+        print(f"数据库: {settings.db_type}, 写入 {args.rows} 条, 读取 {args.lookup} 条")
+        print(f"逐条写入: {single_write * 1000:.1f} ms, 批量写入: {batch_write * 1000:.1f} ms, "
+              f"加速 {single_write / batch_write:.1f}x")
+        print(f"逐条读取: {single_read * 1000:.1f} ms, 批量读取: {batch_read * 1000:.1f} ms, "
+              f"加速 {single_read / batch_read:.1f}x")
+    finally:
+        if settings.db_type.lower() == "mysql":
+            # 清理基准测试数据
+            doc_ids = [row["doc_id"] for row in single_rows + batch_rows]
+            with store.connection_context:
+                for i in range(0, len(doc_ids), 500):
+                    store.DocumentSummary.delete().where(
+                        store.DocumentSummary.doc_id.in_(doc_ids[i:i + 500])
+                    ).execute()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+抽取式预选摘要评估
+
+对每个文档分别用全文和不同token预算的抽取式预选生成摘要，对比：
+- 发送给LLM的token数（估算）和生成摘要的耗时
+- 摘要质量（无参考摘要）：摘要向量与全文片段向量均值的余弦相似度（语义覆盖度），
+  以及与全文摘要的字符二元组ROUGE-F1（与全文摘要的一致程度）
+
+需要可用的Ollama服务和嵌入模型。评估时不使用摘要缓存。
+
+用法:
+    python script/benchmark/eval_extractive_summary.py docs/a.pdf docs/b.docx --budgets 2000 4000 6000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+import numpy as np
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.config import settings
+from src.models.summarization.extractive_selector import ExtractiveSelector
+from src.utils.tokens import estimate_tokens
+
+
+def _create_embedding_model():
+    if settings.use_ollama:
+        from src.models.llm.ollama_llm import OllamaLLMClient
+        return OllamaLLMClient().get_embedding_model()
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=settings.embedding_model)
+
+
+def _bigram_rouge_f1(candidate: str, reference: str) -> float:
+    """字符二元组ROUGE-F1，不依赖分词，适用于中英文混合文本"""
+    def bigrams(text):
+        text = "".join(text.split())
+        return Counter(text[i:i + 2] for i in range(len(text) - 1))
+    cand, ref = bigrams(candidate), bigrams(reference)
+    overlap = sum((cand & ref).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(cand.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def _coverage(embedding_model, summary: str, centroid: np.ndarray) -> float:
+    vector = np.asarray(embedding_model.embed_query(summary), dtype=np.float32)
+    return float(vector @ centroid / (np.linalg.norm(vector) * np.linalg.norm(centroid) + 1e-12))
+
+
+async def _timed_summary(summarizer, text: str):
+    start = time.perf_counter()
+    summary = await summarizer.summarize_text(text)
+    return summary, time.perf_counter() - start
+
+
+async def evaluate(file_path: str, processor, embedding_model, budgets):
+    chunks = processor.process_document(file_path)
+    texts = [chunk.page_content for chunk in chunks]
+    embeddings = np.asarray(embedding_model.embed_documents(texts), dtype=np.float32)
+    centroid = embeddings.mean(axis=0)
+
+    full_text = "\n\n".join(doc.page_content for doc in processor.load_document(file_path))
+    full_summary, full_seconds = await _timed_summary(processor.summarizer, full_text)
+    print(f"\n{file_path}: {len(chunks)}个片段")
+    print(f"{'方式':<14}{'输入token':>10}{'耗时(s)':>10}{'覆盖度':>10}{'ROUGE-F1':>10}")
+    print(f"{'全文':<14}{estimate_tokens(full_text):>10}{full_seconds:>10.1f}"
+          f"{_coverage(embedding_model, full_summary, centroid):>10.3f}{1.0:>10.3f}")
+
+    for budget in budgets:
+        start = time.perf_counter()
+        selected = ExtractiveSelector(token_budget=budget).select(texts, embeddings)
+        text = "\n\n".join(texts[i] for i in selected)
+        summary = await processor.summarizer.summarize_text(text)
+        # 耗时包含预选本身
+        seconds = time.perf_counter() - start
+        print(f"{'预选' + str(budget):<14}{estimate_tokens(text):>10}{seconds:>10.1f}"
+              f"{_coverage(embedding_model, summary, centroid):>10.3f}"
+              f"{_bigram_rouge_f1(summary, full_summary):>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='抽取式预选摘要评估')
+    parser.add_argument('files', nargs='+', help='参与评估的文档')
+    parser.add_argument('--budgets', type=int, nargs='+',
+                        default=[2000, 4000, settings.summary_extractive_token_budget],
+                        help='评估的token预算')
+    args = parser.parse_args()
+
+    # 不写入正式的摘要库，不使用摘要缓存和LLM响应缓存
+    settings.db_type = "sqlite"
+    settings.sqlite_db_path = os.path.join(tempfile.mkdtemp(), "eval_summaries.db")
+    settings.llm_response_cache_enabled = False
+    from src.models.document_processor import DocumentProcessor
+    processor = DocumentProcessor()
+    processor.summarizer.cache = None
+    processor.summarizer.response_cache = None
+    embedding_model = _create_embedding_model()
+
+    for file_path in args.files:
+        asyncio.run(evaluate(file_path, processor, embedding_model, args.budgets))
+
+
+if __name__ == "__main__":
+    main()
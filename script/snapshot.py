@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+import sys
+import os
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.models import Vectorizer
+from src.models.graph.graph_store_factory import create_graph_store
+from src.models.document_processor import DocumentProcessor
+from src.models.snapshot.corpus_snapshot import CorpusSnapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description='导出/导入语料快照（向量、图数据和文档摘要）')
+    parser.add_argument('action', choices=['export', 'import'], help='export: 导出快照; import: 导入快照')
+    parser.add_argument('--dir', required=True, help='快照目录')
+    parser.add_argument('--batch-size', type=int, default=5000, help='每批读写的记录数')
+    args = parser.parse_args()
+
+    vectorizer = Vectorizer()
+    vectorizer.load_vector_store()
+    # 按GRAPH_STORE_TYPE选择图存储，SQLite部署也能导出/导入快照
+    graph_store = create_graph_store(snapshot=True)
+    doc_processor = DocumentProcessor()
+
+    snapshot = CorpusSnapshot(vectorizer, graph_store, doc_processor.store, batch_size=args.batch_size)
+    try:
+        if args.action == 'export':
+            counts = snapshot.export(args.dir)
+        else:
+            counts = snapshot.restore(args.dir)
+        print(f"完成: {counts}")
+    finally:
+        # SQLite图存储的close是协程
+        closing = graph_store.close()
+        if asyncio.iscoroutine(closing):
+            asyncio.run(closing)
+        doc_processor.store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter
-from typing import Dict, Any, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, Optional, List
+import asyncio
+import json
 import uuid
 import os
+from langchain_core.documents import Document
 from src.models.document_processor import DocumentProcessor
-from src.models import Vectorizer, GraphStore
+from src.models import Vectorizer
+from src.models.graph.graph_store_factory import create_graph_store
+from src.models.graph.cached_graph_store import CachedGraphStore
+from src.models.summarization.summary_scheduler import SummaryScheduler, SUMMARY_PRIORITIES
+from src.models.llm.response_cache import get_llm_response_cache
 from src.config import settings
 from src.api.llm_service import router as llm_router
 from src.utils import logger
 
+# 表格片段chunk_index的分段大小（见build_chunk_rows）
+TABLE_CHUNK_INDEX_BASE = 1_000_000
+
 app = FastAPI(title="RAG System API")
 
 # 添加LLM路由
@@ -18,7 +29,19 @@ class RAGSystem:
     def __init__(self):
         self.doc_processor = DocumentProcessor()
         self.vectorizer = Vectorizer()
-        self.graph_store = GraphStore()
+        self.graph_store = create_graph_store()
+        if settings.document_cache_enabled:
+            # 文档元数据和片段的读缓存，写入时失效
+            self.graph_store = CachedGraphStore(
+                self.graph_store,
+                settings.document_cache_max_entries,
+                settings.document_cache_ttl,
+                settings.document_cache_max_chunk_bytes
+            )
+        # 后台摘要调度器，上传接口不等待摘要生成
+        self.summary_scheduler = None
+        if settings.summary_scheduler_enabled:
+            self.summary_scheduler = SummaryScheduler(self.doc_processor)
 
         # 确保向量存储目录存在
         if not os.path.exists(settings.vector_store_path):
@@ -29,11 +52,89 @@ class RAGSystem:
 
 rag_system = RAGSystem()
 
+
+@app.on_event("startup")
+async def ensure_graph_schema():
+    """启动时创建图数据库约束和索引"""
+    if settings.neo4j_ensure_schema:
+        await rag_system.graph_store.ensure_schema()
+
+
+@app.on_event("startup")
+async def start_summary_scheduler():
+    """启动后台摘要调度器，并重新提交上次停止时没有完成摘要的文档"""
+    if rag_system.summary_scheduler is not None:
+        await rag_system.summary_scheduler.start()
+        if settings.summary_scheduler_recover_on_start:
+            try:
+                await rag_system.summary_scheduler.recover(rag_system.graph_store)
+            except Exception as e:
+                logger.error(f"重新提交摘要任务失败: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def close_graph_store():
+    """关闭图数据库连接"""
+    await rag_system.graph_store.close()
+
+
+@app.on_event("shutdown")
+async def stop_summary_scheduler():
+    """停止后台摘要调度器"""
+    if rag_system.summary_scheduler is not None:
+        await rag_system.summary_scheduler.stop()
+
+
+def build_chunk_rows(doc_id: str, documents: List[Document]) -> List[Dict[str, Any]]:
+    """
+    为文档片段生成图数据库写入所需的行数据
+    
+    chunk_id、doc_id、chunk_index同时写回片段的元数据，向量库中的检索结果据此关联到图中的片段节点。
+    正文片段的chunk_index从0连续编号；表格片段（content_type为table）按表格分段编号，第t个表格的片段从
+    TABLE_CHUNK_INDEX_BASE * (t + 1)开始，与正文片段及其他表格的片段不相邻，NEXT边、上下文扩展和上下文打包
+    不会把表格内容拼接到正文之后
+    """
+    rows = []
+    text_index = 0
+    table_pieces = {}
+    for doc in documents:
+        if doc.metadata.get("content_type") == "table":
+            table_index = doc.metadata.get("table_index", 0)
+            piece = table_pieces.get(table_index, 0)
+            table_pieces[table_index] = piece + 1
+            chunk_index = TABLE_CHUNK_INDEX_BASE * (table_index + 1) + piece
+        else:
+            chunk_index = text_index
+            text_index += 1
+        chunk_id = f"{doc_id}_chunk_{chunk_index}"
+        doc.metadata.update({  # chunk的元数据可以自定义，保存到图数据库中
+            "chunk_id": chunk_id,
+            "doc_id": doc_id,
+            "chunk_index": chunk_index
+        })
+        rows.append({
+            "chunk_id": chunk_id,
+            "content": doc.page_content,
+            "metadata": doc.metadata.copy()
+        })
+    return rows
+
 from fastapi import BackgroundTasks  # 新增导入
 
 
-@app.post("/documents/upload", operation_id="upload", description="上传文档同步接口")
-async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
+def _check_summary_priority(summary_priority: str):
+    if summary_priority not in SUMMARY_PRIORITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"summary_priority可选: {', '.join(SUMMARY_PRIORITIES)}"
+        )
+
+
+@app.post("/documents/upload", operation_id="upload",
+          description="上传文档同步接口，文档可检索后立即返回，摘要在后台按summary_priority（high/normal/low）排队生成，"
+                      "可通过/documents/{doc_id}/summary/status查询摘要状态")
+async def upload_document(file: UploadFile = File(...), summary_priority: str = "normal") -> Dict[str, Any]:
+    _check_summary_priority(summary_priority)
     try:
         # 生成唯一文档ID
         doc_id = str(uuid.uuid4())
@@ -53,8 +154,8 @@ async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
                 content = await file.read()
                 buffer.write(content)
 
-            # 处理文档
-            documents = rag_system.doc_processor.process_document(original_file_path)
+            # 处理文档（加载、切分和表格抽取在线程中执行，不阻塞事件循环）
+            documents = await asyncio.to_thread(rag_system.doc_processor.process_document, original_file_path)
 
             # 提取元数据
             metadata = {
@@ -66,33 +167,17 @@ async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
             }
 
             # 存储到图数据库
-            rag_system.graph_store.create_document_node(doc_id, metadata)
-
-            # 为每个文档片段创建节点
-            for i, doc in enumerate(documents):
-                chunk_id = f"{doc_id}_chunk_{i}"
-                chunk_metadata = doc.metadata.copy()
-                chunk_metadata.update({  # chunk的元数据
-                    "chunk_id": chunk_id,
-                    "doc_id": doc_id,
-                    "chunk_index": i
-                })
-
-                rag_system.graph_store.create_chunk_node(
-                    chunk_id,  # chunk的ID
-                    doc_id,  # 所属文档的ID
-                    doc.page_content,  # 文档片段的内容
-                    chunk_metadata  # chunk的元数据可以自定义，保存到图数据库中
-                )
-
-            # 更新向量存储
-            rag_system.vectorizer.initialize_vector_store(documents)
-
-            # 生成文档摘要
-            summary = await rag_system.doc_processor.generate_document_summary(
-                original_file_path,
-                doc_id,
-                file.filename
+            await rag_system.graph_store.create_document_node(doc_id, metadata)
+
+            # 批量创建文档片段节点，图数据库写入与向量化并发进行
+            await asyncio.gather(
+                rag_system.graph_store.create_chunk_nodes(doc_id, build_chunk_rows(doc_id, documents)),
+                asyncio.to_thread(rag_system.vectorizer.initialize_vector_store, documents)
+            )
+
+            # 文档已可检索，摘要交给后台调度器生成
+            summary_status = await _schedule_summary(
+                original_file_path, doc_id, file.filename, documents, summary_priority
             )
 
             return {
@@ -100,7 +185,7 @@ async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
                 "doc_id": doc_id,
                 "message": "Document processed and stored successfully",
                 "chunks_count": len(documents),
-                "summary_generated": summary is not None
+                "summary_status": summary_status
             }
 
         finally:
@@ -114,9 +199,11 @@ async def upload_document(file: UploadFile = File(...)) -> Dict[str, Any]:
 @app.post("/documents/upload/async", operation_id="upload_async", description="上传文档异步接口")
 async def async_upload_document(
         file: UploadFile = File(...),
-        background_tasks: BackgroundTasks = BackgroundTasks()
+        background_tasks: BackgroundTasks = BackgroundTasks(),
+        summary_priority: str = "normal"
 ) -> Dict[str, Any]:
     """异步上传文档接口"""
+    _check_summary_priority(summary_priority)
     # 生成唯一文档ID
     doc_id = str(uuid.uuid4())
 
@@ -145,7 +232,8 @@ async def async_upload_document(
         doc_id,
         file.filename,
         file.content_type,
-        doc_dir
+        doc_dir,
+        summary_priority
     )
 
     return {
@@ -160,12 +248,13 @@ async def process_uploaded_document(
         doc_id: str,
         filename: str,
         content_type: str,
-        doc_dir: str
+        doc_dir: str,
+        summary_priority: str = "normal"
 ):
     """后台处理上传的文档"""
     try:
         # 处理文档
-        documents = rag_system.doc_processor.process_document(file_path)
+        documents = await asyncio.to_thread(rag_system.doc_processor.process_document, file_path)
 
         # 提取元数据
         metadata = {
@@ -177,75 +266,125 @@ async def process_uploaded_document(
         }
 
         # 存储到图数据库
-        rag_system.graph_store.create_document_node(doc_id, metadata)
-
-        # 为每个文档片段创建节点
-        for i, doc in enumerate(documents):
-            chunk_id = f"{doc_id}_chunk_{i}"
-            chunk_metadata = doc.metadata.copy()
-            chunk_metadata.update({
-                "chunk_id": chunk_id,
-                "doc_id": doc_id,
-                "chunk_index": i
-            })
+        await rag_system.graph_store.create_document_node(doc_id, metadata)
 
-            rag_system.graph_store.create_chunk_node(
-                chunk_id,
-                doc_id,
-                doc.page_content,
-                chunk_metadata
-            )
+        # 批量创建文档片段节点，图数据库写入与向量化并发进行
+        await asyncio.gather(
+            rag_system.graph_store.create_chunk_nodes(doc_id, build_chunk_rows(doc_id, documents)),
+            asyncio.to_thread(rag_system.vectorizer.initialize_vector_store, documents)
+        )
 
-        # 更新向量存储
-        rag_system.vectorizer.initialize_vector_store(documents)
+        # 摘要交给后台调度器生成
+        await _schedule_summary(file_path, doc_id, filename, documents, summary_priority)
+
+    except Exception as e:
+        logger.error(f"后台处理文档失败: {str(e)}")
 
-        # 生成文档摘要
-        await rag_system.doc_processor.generate_document_summary(
+
+async def _get_chunk_embeddings(documents: List[Document]):
+    """获取片段向量用于摘要前的抽取式预选（复用向量化时的结果），未启用或失败时返回None"""
+    if not settings.summary_extractive_enabled or not documents:
+        return None
+    try:
+        return await asyncio.to_thread(rag_system.vectorizer.get_chunk_embeddings, documents)
+    except Exception as e:
+        logger.warning(f"获取片段向量失败，将对全文生成摘要: {str(e)}")
+        return None
+
+
+async def _schedule_summary(file_path: str, doc_id: str, filename: str,
+                            documents: List[Document], priority: str) -> str:
+    """提交后台摘要任务并返回摘要状态；未启用调度器时直接生成摘要"""
+    chunk_embeddings = await _get_chunk_embeddings(documents)
+    if rag_system.summary_scheduler is None:
+        summary = await rag_system.doc_processor.generate_document_summary(
             file_path,
             doc_id,
-            filename
+            filename,
+            chunks=documents,
+            chunk_embeddings=chunk_embeddings
         )
+        return "completed" if summary is not None else "failed"
+    return rag_system.summary_scheduler.submit(
+        doc_id,
+        file_path,
+        filename,
+        chunks=documents,
+        chunk_embeddings=chunk_embeddings,
+        priority=priority
+    )["status"]
 
-    except Exception as e:
-        logger.error(f"后台处理文档失败: {str(e)}")
 
+# 返回片段时移除的键
+CHUNK_KEYS_TO_REMOVE = ['source', 'doc_id']
 
-@app.get("/documents/{doc_id}", operation_id="get_document_by_doc_id",
-         description="根据{doc_id}获取文档信息，返回结果包含文档的chunk列表")
-def get_document(doc_id: str) -> Dict[str, Any]:
-    try:
-        metadata = rag_system.graph_store.get_document_metadata(doc_id)
-        if not metadata:
-            raise HTTPException(status_code=404, detail="Document not found")
 
-        # 检查文档目录是否存在
-        doc_dir = metadata.get("doc_dir")
-        if not doc_dir or not os.path.exists(doc_dir):
-            raise HTTPException(status_code=404, detail="Document directory not found")
+def _parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的字段列表"""
+    if not value:
+        return None
+    return [field.strip() for field in value.split(",") if field.strip()]
 
-        chunks = rag_system.graph_store.get_document_chunks(doc_id)
 
-        # 获取文档摘要（如果存在）
-        summary_info = rag_system.doc_processor.get_document_summary(doc_id)
+async def _get_checked_document_metadata(doc_id: str) -> Dict[str, Any]:
+    """获取文档元数据，文档或文档目录不存在时抛出404"""
+    metadata = await rag_system.graph_store.get_document_metadata(doc_id)
+    if not metadata:
+        raise HTTPException(status_code=404, detail="Document not found")
 
-        # 确保metadata和chunks都是可序列化的字典类型
-        serializable_metadata = dict(metadata) if metadata else {}
-        serializable_chunks = [dict(chunk) for chunk in chunks] if chunks else []
-        # 要移除的键
-        keys_to_remove = ['source', 'doc_id']
+    # 检查文档目录是否存在
+    doc_dir = metadata.get("doc_dir")
+    if not doc_dir or not os.path.exists(doc_dir):
+        raise HTTPException(status_code=404, detail="Document directory not found")
+    return metadata
 
-        # 创建一个新的列表，其中每个字典都已移除指定的键
-        serializable_chunks = [
-            {k: v for k, v in chunk.items() if k not in keys_to_remove}
-            for chunk in serializable_chunks
-        ]
 
-        return {
+@app.get("/documents/{doc_id}", operation_id="get_document_by_doc_id",
+         description="根据{doc_id}获取文档信息，返回结果包含文档的chunk列表。"
+                     "传入limit/cursor/fields/exclude_fields时按chunk_index分页返回，并返回next_cursor")
+async def get_document(
+        doc_id: str,
+        cursor: Optional[int] = Query(None, ge=0),
+        limit: Optional[int] = Query(None, ge=1),
+        fields: Optional[str] = None,
+        exclude_fields: Optional[str] = None
+) -> Dict[str, Any]:
+    try:
+        metadata = await _get_checked_document_metadata(doc_id)
+
+        paginated = any(param is not None for param in (cursor, limit, fields, exclude_fields))
+        if paginated:
+            # 分页模式：按chunk_index游标分页，字段投影在图数据库中完成
+            chunks_task = rag_system.graph_store.get_document_chunks_page(
+                doc_id,
+                cursor=cursor,
+                limit=min(limit or settings.document_chunks_page_size, settings.document_chunks_max_page_size),
+                fields=_parse_fields(fields),
+                exclude=CHUNK_KEYS_TO_REMOVE + (_parse_fields(exclude_fields) or [])
+            )
+        else:
+            chunks_task = rag_system.graph_store.get_document_chunks(doc_id)
+
+        # 并发获取文档片段和文档摘要（如果存在），摘要查询是同步的数据库调用，放到线程中执行
+        chunks_result, summary_info = await asyncio.gather(
+            chunks_task,
+            asyncio.to_thread(rag_system.doc_processor.get_document_summary, doc_id)
+        )
+
+        response = {
             "doc_id": doc_id,
-            "metadata": serializable_metadata,
-            "chunks": serializable_chunks,
+            "metadata": dict(metadata),
             "summary": summary_info["summary"] if summary_info else None
         }
+        if paginated:
+            response["chunks"], response["next_cursor"] = chunks_result
+        else:
+            # 确保chunks是可序列化的字典类型，并移除指定的键
+            response["chunks"] = [
+                {k: v for k, v in dict(chunk).items() if k not in CHUNK_KEYS_TO_REMOVE}
+                for chunk in chunks_result or []
+            ]
+        return response
 
     except HTTPException:
         # 直接重新抛出HTTP异常，保持原始状态码
@@ -254,16 +393,114 @@ def get_document(doc_id: str) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/documents/summaries/all", operation_id="get_all_document_summaries", description="分页查询：获取所有文档摘要")
+@app.get("/documents/{doc_id}/chunks/stream", operation_id="stream_document_chunks",
+         description="以NDJSON流的形式按chunk_index顺序返回文档的全部chunk，每行一个chunk")
+async def stream_document_chunks(
+        doc_id: str,
+        fields: Optional[str] = None,
+        exclude_fields: Optional[str] = None
+) -> StreamingResponse:
+    await _get_checked_document_metadata(doc_id)
+
+    include = _parse_fields(fields)
+    exclude = CHUNK_KEYS_TO_REMOVE + (_parse_fields(exclude_fields) or [])
+
+    # 流式返回的是整篇文档，逐页读取底层存储，不放进读缓存
+    graph_store = rag_system.graph_store
+    if isinstance(graph_store, CachedGraphStore):
+        graph_store = graph_store.graph_store
+
+    async def generate():
+        cursor = None
+        while True:
+            chunks, cursor = await graph_store.get_document_chunks_page(
+                doc_id,
+                cursor=cursor,
+                limit=settings.document_chunks_page_size,
+                fields=include,
+                exclude=exclude
+            )
+            for chunk in chunks:
+                yield json.dumps(chunk, ensure_ascii=False, default=str) + "\n"
+            if cursor is None:
+                break
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@app.get("/documents/summaries/queue", operation_id="get_summary_queue_stats",
+         description="获取后台摘要调度器的状态：各状态的任务数和正在进行的交互式问答请求数")
+def get_summary_queue_stats() -> Dict[str, Any]:
+    if rag_system.summary_scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **rag_system.summary_scheduler.stats()}
+
+
+@app.get("/documents/{doc_id}/summary/status", operation_id="get_summary_status",
+         description="查询文档摘要的生成状态：queued（排队中）、running（生成中）、completed（已完成）、failed（失败）、"
+                     "not_scheduled（文档已入库但没有摘要任务）")
+async def get_summary_status(doc_id: str) -> Dict[str, Any]:
+    status = rag_system.summary_scheduler.get_status(doc_id) if rag_system.summary_scheduler else None
+    if status is not None:
+        return status
+    # 调度器中没有记录（例如服务重启后），根据摘要和文档是否已存在判断
+    summary_info = await asyncio.to_thread(rag_system.doc_processor.get_document_summary, doc_id)
+    if summary_info is not None:
+        return {"doc_id": doc_id, "status": "completed"}
+    await _get_checked_document_metadata(doc_id)
+    return {"doc_id": doc_id, "status": "not_scheduled"}
+
+
+@app.get("/cache/stats", operation_id="get_cache_stats",
+         description="获取文档元数据、片段和摘要缓存的命中统计，以及LLM响应缓存按链统计的命中率")
+def get_cache_stats() -> Dict[str, Any]:
+    stats = {}
+    if isinstance(rag_system.graph_store, CachedGraphStore):
+        stats.update(rag_system.graph_store.cache_stats())
+    if rag_system.doc_processor.summary_cache is not None:
+        stats["summaries"] = rag_system.doc_processor.summary_cache.stats()
+    response_cache = get_llm_response_cache()
+    if response_cache is not None:
+        stats["llm_responses"] = response_cache.stats()
+    return stats
+
+
+@app.get("/documents/summaries/search", operation_id="search_document_summaries",
+         description="按关键词全文检索文档摘要和文件名，按相关度返回匹配的文档（doc_id、filename、score、snippet），"
+                     "多个关键词用空格分隔。可用于快速定位涉及某个主题的文档，再通过doc_id获取文档详情")
+def search_document_summaries(q: str, limit: int = 10) -> Dict[str, Any]:
+    try:
+        limit = max(1, min(limit, 100))
+        results = rag_system.doc_processor.store.search_summaries(q, limit=limit)
+        return {"query": q, "results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/documents/summaries/all", operation_id="get_all_document_summaries",
+         description="分页查询：获取所有文档摘要。传入cursor（上一页返回的next_cursor）时按游标分页，翻页深度不影响查询耗时；"
+                     "total为缓存的近似总数。fields（逗号分隔）指定返回的字段，"
+                     "可选doc_id、filename、summary、preview、created_at、updated_at，列表页可只取preview而不返回摘要全文")
 def get_all_document_summaries(
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        cursor: Optional[str] = None,
+        fields: Optional[str] = None
 ) -> Dict[str, Any]:
     try:
+        if cursor is not None:
+            return rag_system.doc_processor.store.get_summaries_by_cursor(
+                cursor=cursor,
+                page_size=page_size,
+                fields=_parse_fields(fields)
+            )
         return rag_system.doc_processor.store.get_paginated_summaries(
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            fields=_parse_fields(fields)
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
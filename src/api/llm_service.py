@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
+import json
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from src.models import Vectorizer
+from src.models.llm.llm_activity import llm_activity
+from src.models.llm.ollama_gateway import ollama_gateway
 from src.models.llm.ollama_llm import OllamaLLMClient
+from src.models.retrieval.context_expander import ContextExpander
+from src.models.retrieval.context_packer import ContextPacker
+from src.config import settings
+from src.utils import logger
 
 router = APIRouter()
 
@@ -10,32 +18,108 @@ router = APIRouter()
 llm = OllamaLLMClient()
 vectorizer = Vectorizer()
 vectorizer.load_vector_store()
+# 上下文扩展复用RAGSystem的图数据库连接（含文档读缓存），首次使用时创建
+context_expander: Optional[ContextExpander] = None
+context_packer = ContextPacker() if settings.context_packing_enabled else None
 
 
 class QuestionRequest(BaseModel):
     question: str
     top_k: int = 5
+    # 对最终结果前后各扩展的相邻片段数，0表示不扩展
+    neighbor_window: int = Field(default=settings.context_neighbor_window, ge=0, le=5)
 
 
 class AnswerResponse(BaseModel):
     answer: str
     context: List[Dict[str, Any]]
+    # 上下文打包统计（原始/打包后/节省的token数等），未启用打包时为None
+    packing: Optional[Dict[str, Any]] = None
+
+
+def _get_context_expander() -> ContextExpander:
+    """获取上下文扩展器，图数据库连接随API服务的shutdown钩子一起关闭"""
+    global context_expander
+    if context_expander is None:
+        # api_service导入本模块的路由，只能在运行时引用rag_system
+        from src.api.api_service import rag_system
+        context_expander = ContextExpander(rag_system.graph_store)
+    return context_expander
+
+
+def _pack_context(context: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """合并相邻片段、去重并按token预算截取发送给LLM的上下文"""
+    if context_packer is None:
+        return context, None
+    return context_packer.pack(context)
 
 
 @router.post("/question", response_model=AnswerResponse, operation_id="answer_question",
              description="根据用户输入进行混合查询，返回重排打分后的查询结果")
 async def answer_question(request: QuestionRequest):
     try:
-        # 检索相关文档
-        context = vectorizer.hybrid_search(request.question, k=request.top_k)
+        # 标记为交互式请求，后台摘要任务让出Ollama的处理能力
+        async with llm_activity.interactive():
+            # 检索相关文档
+            context = vectorizer.hybrid_search(request.question, k=request.top_k)
+
+            # 沿图中的NEXT边补充相邻片段，不扩大检索候选集
+            context = await _get_context_expander().expand(context, request.neighbor_window)
 
-        # 使用LLM生成回答
-        answer = await llm.generate_answer(request.question, context)
+            # 合并相邻片段、去掉重叠和重复内容，按token预算截取
+            packed, packing = _pack_context(context)
+
+            # 使用LLM生成回答
+            answer = await llm.generate_answer(request.question, packed)
 
         return {
             "answer": answer,
-            "context": context
+            "context": context,
+            "packing": packing
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _answer_events(request: QuestionRequest) -> AsyncIterator[Dict[str, Any]]:
+    """流式问答的事件序列：先返回检索到的上下文，再逐段返回模型输出，最后返回done（出错时返回error）"""
+    try:
+        async with llm_activity.interactive():
+            context = vectorizer.hybrid_search(request.question, k=request.top_k)
+            context = await _get_context_expander().expand(context, request.neighbor_window)
+            packed, packing = _pack_context(context)
+            yield {"type": "context", "context": context, "packing": packing}
+
+            async for token in llm.stream_answer(request.question, packed):
+                yield {"type": "token", "content": token}
+        yield {"type": "done"}
+    except Exception as e:
+        logger.error(f"流式生成回答失败: {str(e)}")
+        yield {"type": "error", "detail": str(e)}
+
+
+@router.post("/question/stream", operation_id="answer_question_stream",
+             description="流式问答：先返回检索到的上下文，再在模型生成的同时逐段返回回答。"
+                         "默认以NDJSON返回（每行一个事件），请求头Accept为text/event-stream时以SSE返回。"
+                         "事件类型: context（上下文）、token（回答片段）、done（结束）、error（出错）")
+async def answer_question_stream(request: QuestionRequest, http_request: Request) -> StreamingResponse:
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+
+    async def generate():
+        async for event in _answer_events(request):
+            data = json.dumps(event, ensure_ascii=False, default=str)
+            yield f"event: {event['type']}\ndata: {data}\n\n" if use_sse else data + "\n"
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream" if use_sse else "application/x-ndjson",
+        # 禁止反向代理缓冲，保证片段及时到达客户端
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/gateway/stats", operation_id="get_ollama_gateway_stats",
+            description="获取Ollama全局并发限制的状态：并发上限、进行中和排队的请求数，以及各优先级（query/agent/summary）的请求、排队、超时和拒绝次数")
+def get_ollama_gateway_stats() -> Dict[str, Any]:
+    return ollama_gateway.stats()
@@ -11,12 +11,36 @@ class Settings(BaseSettings):
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "llama3"
     ollama_embedding_model: str = "nomic-embed-text"
+    ollama_num_ctx: int = 8192  # 上下文窗口大小（token）
+    # 共享的Ollama访问入口：问答、代理和摘要共用连接池和并发限制，排队时问答 > 代理 > 摘要
+    # 并发限制按进程生效，同时运行的各进程之和应不超过Ollama的OLLAMA_NUM_PARALLEL（默认4）：
+    # 主服务默认占3个，代理调用工具时等待MCP服务返回，代理和它连接的MCP服务依次调用Ollama，合计最多占1个
+    ollama_max_in_flight: int = 3  # 当前进程同时发往Ollama的生成请求数
+    ollama_max_queue: int = 256  # 排队的请求数上限，超出后直接失败
+    ollama_queue_timeout: float = 120.0  # 排队等待的超时时间（秒）
+    ollama_request_timeout: float = 300.0  # 单次调用的超时时间（秒）
+    ollama_max_connections: int = 16  # HTTP连接池大小（保持长连接）
+    ollama_keep_alive: str = "30m"  # 模型在Ollama中保持加载的时间，避免空闲后重新加载
+    # LLM响应缓存：按模型、生成参数和渲染后的完整提示词精确匹配，问答和摘要共用
+    llm_response_cache_enabled: bool = True
+    llm_response_cache_path: str = "./data/cache/llm_responses"
+    llm_response_cache_max_entries: int = 1024  # 内存LRU中保留的响应数
+    llm_response_cache_max_bytes: int = 128*1024*1024  # 磁盘缓存容量上限，超出后按最近访问时间淘汰，默认128MB
+    llm_response_cache_ttl: int = 86400  # 缓存响应的有效期（秒），0表示不过期
+    
+    # 图存储配置
+    graph_store_type: str = "neo4j"  # 支持neo4j, sqlite（嵌入式，适用于单机部署和CI）
+    sqlite_graph_db_path: str = "./data/database/graph.db"
     
     # Neo4j配置
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "password"
     neo4j_database: str = "neo4j"
+    graph_write_batch_size: int = 500  # 批量写入片段节点时每条UNWIND语句包含的片段数
+    neo4j_max_connection_pool_size: int = 100  # Neo4j连接池大小
+    neo4j_connection_acquisition_timeout: float = 60.0  # 从连接池获取连接的超时时间（秒）
+    neo4j_ensure_schema: bool = True  # 启动时创建唯一约束和索引
     
     # 向量数据库配置
     vector_store_type: str = "chroma"  # 支持chroma, faiss, milvus等
@@ -30,6 +54,16 @@ class Settings(BaseSettings):
     
     # SQLite数据库配置
     sqlite_db_path: str = "./data/database/document_summaries.db"
+    sqlite_journal_mode: str = "wal"  # SQLite日志模式，wal模式下写入不阻塞读取
+    sqlite_synchronous: str = "normal"  # SQLite同步级别，wal模式下normal即可保证一致性
+    sqlite_cache_size: int = -65536  # SQLite页缓存大小，负数表示KiB（默认64MB）
+    sqlite_mmap_size: int = 268435456  # SQLite内存映射大小（字节），0表示不使用mmap
+    sqlite_busy_timeout: float = 5.0  # 数据库被锁定时的等待时间（秒）
+    summary_preview_length: int = 200  # 写入摘要时保存的预览长度（字符），列表页可只返回预览
+    summary_compression: bool = False  # 是否以zstd压缩存储摘要正文（需要安装zstandard，仅支持SQLite）
+    summary_compression_level: int = 3  # zstd压缩级别
+    summary_compression_min_length: int = 512  # 短于该长度的摘要不压缩
+    summary_count_cache_ttl: int = 60  # 摘要列表返回的总数的缓存时间（秒）
     
     # MySQL数据库配置
     mysql_host: str = "localhost"
@@ -37,6 +71,11 @@ class Settings(BaseSettings):
     mysql_user: str = "root"
     mysql_password: str = ""
     mysql_db_name: str = "rag_agent"
+    mysql_pool_enabled: bool = True  # 是否使用连接池
+    mysql_max_connections: int = 20  # 连接池最大连接数
+    mysql_stale_timeout: int = 300  # 连接空闲超过该时间（秒）后回收重建，应小于服务端的wait_timeout
+    mysql_fulltext_parser: str = "ngram"  # 摘要全文索引的解析器，中文需要ngram（MariaDB不支持，设为空）
+    mysql_pool_timeout: float = 10.0  # 连接池耗尽时等待可用连接的超时时间（秒）
     
     # Milvus配置
     milvus_host: str = "localhost"
@@ -58,10 +97,36 @@ class Settings(BaseSettings):
     # 文档处理配置
     chunk_size: int = 500
     chunk_overlap: int = 50
+    context_neighbor_window: int = 0  # 问答时对最终检索结果前后各扩展的相邻片段数，0表示不扩展
+    # 上下文打包：合并同一文档的相邻片段并去掉重叠部分，丢弃近似重复的片段，按得分顺序放入token预算
+    context_packing_enabled: bool = True
+    context_token_budget: int = 4096  # 发送给LLM的上下文token数上限
+    context_dedup_threshold: float = 0.8  # 片段中已出现在更靠前结果里的字符n-gram比例达到该值时丢弃
+    
+    # 表格抽取配置（需要安装camelot-py）
+    enable_table_extraction: bool = False  # 入库时是否抽取PDF/DOCX中的表格
+    table_extraction_workers: int = 4  # camelot并行抽取的进程数
+    table_extraction_pages_per_task: int = 5  # 每个抽取任务处理的页数
+    table_cache_path: str = "./data/cache/tables"  # 表格抽取结果缓存目录
+    table_cache_max_bytes: int = 256*1024*1024  # 表格缓存容量上限，默认256MB
+    
+    # 旧格式文档(.doc)转换配置
+    conversion_cache_path: str = "./data/cache/conversions"  # 转换结果缓存目录
+    conversion_cache_max_bytes: int = 512*1024*1024  # 转换缓存容量上限，默认512MB
+    doc_converter_mode: str = "per_file"  # per_file: 每个文件单独调用LibreOffice; persistent: 常驻unoserver
+    unoserver_host: str = "127.0.0.1"
+    unoserver_port: int = 2003
+    unoserver_start_timeout: int = 60  # 等待unoserver启动的超时时间（秒）
     
     # API服务配置
     api_host: str = "0.0.0.0"
     api_port: int = 8000
+    document_chunks_page_size: int = 100  # 分页/流式获取文档片段时每页的片段数
+    document_chunks_max_page_size: int = 1000  # 分页获取文档片段时每页的最大片段数
+    document_cache_enabled: bool = True  # 是否在进程内缓存文档元数据、片段和摘要
+    document_cache_max_entries: int = 1024  # 每类缓存最多保存的文档数，超出后按LRU淘汰
+    document_cache_ttl: int = 300  # 缓存条目的有效期（秒），0表示不过期
+    document_cache_max_chunk_bytes: int = 64 * 1024 * 1024  # 片段缓存的总容量上限（按片段文本估算），单篇文档超出时不缓存
     
     # MCP服务配置
     mcp_host: str = "localhost"  # 这个不能使用0.0.0.0，因为mcp_client需要使用这个地址来连接到服务器
@@ -78,8 +143,30 @@ class Settings(BaseSettings):
 
     # 文档摘要相关设置
     summarize_max_recursion: int = 3
-    # 最大摘要长度
+    # 最大摘要长度（达到最大递归层数时返回的拼接摘要的最大字符数）
     summarize_max_length: int = 4000
+    # 同时发往Ollama的摘要请求数，不超过ollama_max_in_flight，小于它时为问答保留名额
+    summarize_concurrency: int = 3
+    # reduce阶段每次合并的摘要数
+    summarize_merge_group_size: int = 4
+    # 摘要分块按token计数：每次调用的输入预算为ollama_num_ctx减去提示词和summarize_output_tokens
+    summarize_tokenizer: str = ""  # 与Ollama模型一致的HuggingFace tokenizer（模型名或本地路径），为空时估算token数
+    summarize_output_tokens: int = 1024  # 每次摘要调用为生成内容预留的token数
+    # 块摘要、合并结果和最终摘要的内容寻址缓存
+    summary_cache_enabled: bool = True
+    summary_cache_path: str = "./data/cache/summaries"
+    summary_cache_max_bytes: int = 256*1024*1024  # 摘要缓存容量上限，超出后按最近访问时间淘汰，默认256MB
+    # 抽取式预选：按片段向量的中心度选出token预算内的代表性片段，只对这些片段生成摘要
+    summary_extractive_enabled: bool = True
+    summary_extractive_token_budget: int = 6000  # 发送给LLM的片段总token数上限，全文未超出时不做预选
+    summary_extractive_diversity: float = 0.3  # 与已选片段相似度的惩罚权重，越大选出的片段越分散
+    embedding_cache_max_entries: int = 8192  # 内存中保留的片段向量数，供抽取式预选复用
+    # 后台摘要调度：上传接口不等待摘要，摘要按优先级排队，在没有交互式问答请求时生成
+    summary_scheduler_enabled: bool = True
+    summary_scheduler_workers: int = 1  # 同时生成摘要的文档数（每个文档内部的并发由summarize_concurrency控制）
+    summary_scheduler_idle_delay: float = 2.0  # 最后一个问答请求结束后等待多久（秒）再开始新的摘要任务
+    summary_scheduler_max_status_entries: int = 10000  # 内存中保留的摘要任务状态数
+    summary_scheduler_recover_on_start: bool = True  # 启动时重新提交已入库但没有摘要的文档（排队中的任务不会持久化）
     
     model_config = {
         "env_file": ".env"
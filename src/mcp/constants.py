@@ -0,0 +1,4 @@
+# MCP服务端与客户端共用的约定
+
+# generate_answer流式模式推送事件时使用的日志名称，客户端据此识别上下文和回答片段
+ANSWER_STREAM_LOGGER = "generate_answer.stream"
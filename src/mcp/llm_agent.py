@@ -1,12 +1,68 @@
 import asyncio
 from llama_index.core.agent import ReActAgent
+from llama_index.core.base.llms.generic_utils import (
+    achat_to_completion_decorator,
+    astream_chat_to_completion_decorator,
+    chat_to_completion_decorator,
+    stream_chat_to_completion_decorator,
+)
+from llama_index.core.llms.callbacks import llm_completion_callback
 from llama_index.core.tools import FunctionTool
 from llama_index.llms.ollama import Ollama
 
 from src.config import settings
 from src.mcp.mcp_client import MCPClient
+from src.models.llm.ollama_gateway import ollama_gateway
 from src.utils import logger
 
+
+class GatewayOllama(Ollama):
+    """
+    与问答、摘要共用Ollama并发限制的LlamaIndex Ollama，代理的调用优先级低于问答
+
+    chat系列方法各自占用一个名额，流式方法在输出结束（或生成器关闭）前一直占用；
+    complete系列方法转为对应的chat方法调用，不重复占用名额。
+    """
+
+    def chat(self, messages, **kwargs):
+        # ReActAgent在线程池中同步调用chat
+        with ollama_gateway.sync_slot("agent"):
+            return super().chat(messages, **kwargs)
+
+    async def achat(self, messages, **kwargs):
+        async with ollama_gateway.slot("agent"):
+            return await super().achat(messages, **kwargs)
+
+    def stream_chat(self, messages, **kwargs):
+        def gen():
+            with ollama_gateway.sync_slot("agent"):
+                yield from super(GatewayOllama, self).stream_chat(messages, **kwargs)
+        return gen()
+
+    async def astream_chat(self, messages, **kwargs):
+        async def gen():
+            async with ollama_gateway.slot("agent"):
+                async for response in await super(GatewayOllama, self).astream_chat(messages, **kwargs):
+                    yield response
+        return gen()
+
+    @llm_completion_callback()
+    def complete(self, prompt, formatted=False, **kwargs):
+        return chat_to_completion_decorator(self.chat)(prompt, **kwargs)
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt, formatted=False, **kwargs):
+        return stream_chat_to_completion_decorator(self.stream_chat)(prompt, **kwargs)
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt, formatted=False, **kwargs):
+        return await achat_to_completion_decorator(self.achat)(prompt, **kwargs)
+
+    @llm_completion_callback()
+    async def astream_complete(self, prompt, formatted=False, **kwargs):
+        return await astream_chat_to_completion_decorator(self.astream_chat)(prompt, **kwargs)
+
+
 class LLMAgent:
     """
     基于大语言模型的智能代理，使用LlamaIndex ReActAgent实现
@@ -25,11 +81,13 @@ class LLMAgent:
         # 初始化LLM
         if self.use_ollama:
             try:
-                self.llm = Ollama(
+                self.llm = GatewayOllama(
                     model=settings.ollama_model,
                     base_url=settings.ollama_base_url,
                     temperature=0.3,
-                    context_window=8192
+                    context_window=settings.ollama_num_ctx,
+                    request_timeout=settings.ollama_request_timeout,
+                    keep_alive=settings.ollama_keep_alive
                 )
                 logger.info(f"成功初始化Ollama LLM，模型: {settings.ollama_model}")
             except Exception as e:
@@ -2,19 +2,22 @@ import asyncio
 from contextlib import AsyncExitStack
 from mcp import ClientSession
 from mcp.client.sse import sse_client
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Awaitable, Dict
 
 from src.config import settings
+from src.mcp.constants import ANSWER_STREAM_LOGGER
 from src.utils import logger
 
 class MCPClient:
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = None):
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 stream_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
         """
         初始化MCP客户端
         
         Args:
             host: MCP服务器主机地址，默认使用配置中的地址
             port: MCP服务器端口，默认使用配置中的端口
+            stream_callback: 接收generate_answer流式事件（context/token）的回调
         """
         # 设置服务器地址
         self.host = host or settings.api_host
@@ -28,6 +31,7 @@ class MCPClient:
         self._streams_context = None
         self._session_context = None
         self._connected = False
+        self.stream_callback = stream_callback
 
     async def connect(self):
         """连接到MCP服务器"""
@@ -41,7 +45,7 @@ class MCPClient:
             streams = await self._streams_context.__aenter__()
 
             # 创建会话
-            self._session_context = ClientSession(*streams)
+            self._session_context = ClientSession(*streams, logging_callback=self._handle_log_message)
             self.session: ClientSession = await self._session_context.__aenter__()
 
             # 初始化会话
@@ -59,6 +63,11 @@ class MCPClient:
             logger.error(f"连接MCP服务器失败: {str(e)}")
             raise Exception(f"连接MCP服务器失败: {str(e)}")
 
+    async def _handle_log_message(self, params):
+        """处理服务端推送的日志通知，generate_answer流式模式的事件转交给stream_callback"""
+        if params.logger == ANSWER_STREAM_LOGGER and self.stream_callback is not None:
+            await self.stream_callback(params.data)
+
     async def disconnect(self):
         """断开与MCP服务器的连接"""
         if self._session_context:
@@ -151,19 +160,23 @@ class MCPClient:
             # 调用完成后断开连接
             await self.disconnect()
     
-    async def call_generate_answer(self, query: str, top_k: int = 5) -> str:
+    async def call_generate_answer(self, query: str, top_k: int = 5, stream: bool = False) -> str:
         """
         调用生成回答工具
         
         Args:
             query: 查询文本
             top_k: 检索文档数量
+            stream: 是否使用流式模式，生成过程中的上下文和回答片段通过stream_callback推送
             
         Returns:
             生成的回答
         """
         try:
-            result = await self.call_tool("generate_answer", query=query, top_k=top_k)
+            params = {"query": query, "top_k": top_k}
+            if stream:
+                params["stream"] = True
+            result = await self.call_tool("generate_answer", **params)
             return result
         finally:
             # 调用完成后断开连接
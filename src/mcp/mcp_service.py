@@ -1,4 +1,5 @@
 import argparse
+import json
 import uvicorn
 import sys
 import os
@@ -6,7 +7,7 @@ from src.models.llm.ollama_llm import OllamaLLMClient
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))) 
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.sse import SseServerTransport
 from starlette.applications import Starlette
 from starlette.requests import Request
@@ -14,7 +15,9 @@ from starlette.routing import Mount, Route
 from mcp.server import Server
 
 from src.models import Vectorizer
+from src.models.retrieval.context_packer import ContextPacker
 from src.config import settings
+from src.mcp.constants import ANSWER_STREAM_LOGGER
 
 # 设置日志
 from src.utils import logger
@@ -28,6 +31,7 @@ class RetrievalService:
         self.vectorizer.load_vector_store()
         # 不在这里调用load_vector_store，而是在使用前检查并加载
         self.llm = OllamaLLMClient()
+        self.context_packer = ContextPacker() if settings.context_packing_enabled else None
     
     def is_initialized(self):
         """检查向量库是否已初始化"""
@@ -79,16 +83,41 @@ async def hybrid_search(query: str, top_k: int = 5) -> str:
         logger.error(f"混合搜索错误: {str(e)}")
         return f"检索过程中发生错误: {str(e)}"
 
+async def _stream_answer(query: str, context: list, ctx: Context) -> str:
+    """
+    流式生成回答：通过MCP日志通知先推送检索到的上下文，再逐段推送回答，同时上报进度，返回完整回答
+
+    SSE传输在工具调用期间可以向客户端推送通知，客户端按logger名称识别这些事件。
+    """
+    session = ctx.session
+    await session.send_log_message(
+        level="info",
+        data={"type": "context", "context": json.loads(json.dumps(context, ensure_ascii=False, default=str))},
+        logger=ANSWER_STREAM_LOGGER
+    )
+    parts = []
+    async for token in retrieval_service.llm.stream_answer(query, context):
+        parts.append(token)
+        await session.send_log_message(
+            level="info",
+            data={"type": "token", "content": token},
+            logger=ANSWER_STREAM_LOGGER
+        )
+        # 客户端提供了progressToken时上报已生成的片段数
+        await ctx.report_progress(len(parts))
+    return "".join(parts)
+
 @mcp.tool()
-async def generate_answer(query: str, top_k: int = 5) -> str:
+async def generate_answer(query: str, top_k: int = 5, stream: bool = False, ctx: Context = None) -> str:
     """
     基于用户查询生成回答，使用RAG方法检索相关文档并生成回答。
 
     Args:
         query: 用户的查询问题
         top_k: 检索的文档数量
+        stream: 是否在生成的同时通过日志通知推送上下文和回答片段，工具结果仍为完整回答
     """
-    logger.info(f"调用了MCP工具: generate_answer, query: {query}, top_k: {top_k}")
+    logger.info(f"调用了MCP工具: generate_answer, query: {query}, top_k: {top_k}, stream: {stream}")
     try:
         # 确保向量库已加载
         if not retrieval_service.is_initialized():
@@ -101,10 +130,17 @@ async def generate_answer(query: str, top_k: int = 5) -> str:
             k=top_k
         )
         
+        # 合并相邻片段、去掉重叠和重复内容，按token预算截取
+        if retrieval_service.context_packer is not None:
+            context, _ = retrieval_service.context_packer.pack(context)
+        
         # 使用LLM生成回答
         if retrieval_service.llm.use_ollama:
-            # 修复：添加await关键字等待协程执行完成
-            answer = await retrieval_service.llm.generate_answer(query, context)
+            if stream and ctx is not None:
+                answer = await _stream_answer(query, context, ctx)
+            else:
+                # 修复：添加await关键字等待协程执行完成
+                answer = await retrieval_service.llm.generate_answer(query, context)
             logger.info(f"LLM生成回答: {answer}")
             return answer
         else:
@@ -1,6 +1,7 @@
 # 模块初始化文件
 from src.models.vectorization.vectorizer import Vectorizer
 from src.models.graph.graph_store import GraphStore
+from src.models.graph.async_graph_store import AsyncGraphStore
 from src.models.llm.ollama_llm import OllamaLLM
 from src.models.summarization.document_summarizer import DocumentSummarizer
 
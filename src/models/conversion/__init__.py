@@ -0,0 +1,2 @@
+# 文档格式转换模块
+# 包含旧格式文档的转换、转换结果缓存等功能
\ No newline at end of file
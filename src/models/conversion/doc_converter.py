@@ -0,0 +1,130 @@
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Dict, Any, Tuple
+from langchain_community.document_loaders import UnstructuredFileLoader, Docx2txtLoader
+from langchain_community.docstore.document import Document
+from src.config import settings
+from src.utils import logger
+from src.utils.cache import DiskCache
+from src.utils.hashing import compute_file_hash
+
+
+class DocConverter:
+    """
+    旧格式文档(.doc)转换器
+
+    转换结果（文本和分页/分段结构）按转换方式和文件内容哈希缓存到磁盘，重复处理同一文件时不再调用LibreOffice；
+    两种转换方式得到的文本和元数据不同，缓存互不共用。
+    doc_converter_mode为persistent时，使用常驻的unoserver(无头LibreOffice)完成转换，
+    批量导入时只启动一次LibreOffice；否则沿用UnstructuredFileLoader逐个文件转换。
+    """
+
+    def __init__(self):
+        self.cache = DiskCache(
+            settings.conversion_cache_path,
+            max_bytes=settings.conversion_cache_max_bytes
+        )
+        self._server_process = None
+        self._lock = threading.Lock()
+
+    def load(self, file_path: str) -> List[Document]:
+        """加载文档，优先从当前转换方式的转换缓存读取"""
+        file_hash = compute_file_hash(file_path)
+        cached = self.cache.get(self._cache_key(self._mode(), file_hash))
+        if cached is not None:
+            logger.info(f"命中文档转换缓存: {file_path}")
+            return [
+                Document(page_content=item["page_content"], metadata={**item["metadata"], "source": file_path})
+                for item in cached
+            ]
+
+        documents, mode = self._convert(file_path)
+        # 按实际使用的转换方式缓存（常驻转换失败回退到逐文件转换时，结果不作为常驻转换的缓存）
+        self.cache.set(self._cache_key(mode, file_hash), [
+            {"page_content": doc.page_content, "metadata": self._serializable_metadata(doc.metadata)}
+            for doc in documents
+        ])
+        return documents
+
+    def close(self):
+        """关闭常驻的LibreOffice工作进程"""
+        with self._lock:
+            if self._server_process and self._server_process.poll() is None:
+                logger.info("正在关闭LibreOffice转换进程...")
+                self._server_process.terminate()
+                try:
+                    self._server_process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    self._server_process.kill()
+            self._server_process = None
+
+    def _serializable_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in metadata.items() if isinstance(v, (str, int, float, bool)) or v is None}
+
+    @staticmethod
+    def _mode() -> str:
+        return "persistent" if settings.doc_converter_mode.lower() == "persistent" else "per_file"
+
+    @staticmethod
+    def _cache_key(mode: str, file_hash: str) -> str:
+        return f"doc-{mode}-{file_hash}"
+
+    def _convert(self, file_path: str) -> Tuple[List[Document], str]:
+        """转换文档，返回(文档列表, 实际使用的转换方式)"""
+        if self._mode() == "persistent":
+            try:
+                return self._convert_with_server(file_path), "persistent"
+            except Exception as e:
+                logger.error(f"常驻LibreOffice转换失败: {str(e)}，回退到逐文件转换")
+        return UnstructuredFileLoader(file_path).load(), "per_file"
+
+    def _convert_with_server(self, file_path: str) -> List[Document]:
+        """通过常驻unoserver将.doc转换为.docx后读取文本"""
+        from unoserver.client import UnoClient
+
+        self._ensure_server()
+        client = UnoClient(server=settings.unoserver_host, port=str(settings.unoserver_port))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            out_path = os.path.join(tmp_dir, "converted.docx")
+            client.convert(inpath=os.path.abspath(file_path), outpath=out_path, convert_to="docx")
+            documents = Docx2txtLoader(out_path).load()
+
+        for doc in documents:
+            doc.metadata["source"] = file_path
+        return documents
+
+    def _server_ready(self) -> bool:
+        try:
+            with socket.create_connection((settings.unoserver_host, settings.unoserver_port), timeout=1):
+                return True
+        except OSError:
+            return False
+
+    def _ensure_server(self):
+        """确保unoserver已启动，已有外部实例监听同一端口时直接复用"""
+        with self._lock:
+            if self._server_process and self._server_process.poll() is None:
+                return
+            if self._server_ready():
+                return
+
+            logger.info(f"正在启动常驻LibreOffice转换进程: {settings.unoserver_host}:{settings.unoserver_port}")
+            self._server_process = subprocess.Popen(
+                ["unoserver", "--interface", settings.unoserver_host, "--port", str(settings.unoserver_port)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+
+            deadline = time.monotonic() + settings.unoserver_start_timeout
+            while time.monotonic() < deadline:
+                if self._server_process.poll() is not None:
+                    raise RuntimeError("unoserver进程启动后立即退出")
+                if self._server_ready():
+                    logger.info("LibreOffice转换进程已就绪")
+                    return
+                time.sleep(0.5)
+            raise TimeoutError("等待unoserver启动超时")
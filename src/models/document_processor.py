@@ -1,4 +1,5 @@
 from typing import List, Dict, Any, Optional
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import (
     TextLoader,
@@ -13,6 +14,9 @@ from src.models.storage.base_store import BaseDocumentStore
 from src.models.storage.sqlite_store import SQLiteStore
 from src.models.storage.mysql_store import MySQLStore
 from src.models.summarization.document_summarizer import DocumentSummarizer
+from src.models.summarization.extractive_selector import ExtractiveSelector
+from src.models.conversion.doc_converter import DocConverter
+from src.utils.cache import TTLCache
 from src.utils import logger
 
 class DocumentProcessor:
@@ -32,11 +36,29 @@ class DocumentProcessor:
             ".md": UnstructuredMarkdownLoader
         }
         
+        # 旧格式文档转换器，转换结果按内容哈希缓存
+        self.doc_converter = DocConverter()
+        
+        # 初始化表格抽取器（可选，依赖camelot，仅在启用时导入）
+        self.table_extractor = None
+        if settings.enable_table_extraction:
+            from src.models.table_processing.table_extractor import TableExtractor
+            self.table_extractor = TableExtractor()
+        
         # 初始化文档摘要生成器
         self.summarizer = DocumentSummarizer()
+        # 摘要前按片段向量的中心度预选片段，只把预算内最有代表性的片段发送给LLM
+        self.extractive_selector = None
+        if settings.summary_extractive_enabled:
+            self.extractive_selector = ExtractiveSelector(count_tokens=self.summarizer.token_counter.count)
         
         # 初始化存储
         self.store = self._init_document_store()
+        
+        # 文档摘要的进程内缓存，保存摘要时失效
+        self.summary_cache = None
+        if settings.document_cache_enabled:
+            self.summary_cache = TTLCache(settings.document_cache_max_entries, settings.document_cache_ttl)
     
     def load_document(self, file_path: str) -> List[Document]:
         """加载文档并返回Document对象列表"""
@@ -45,6 +67,10 @@ class DocumentProcessor:
         
         if not loader_class:
             raise ValueError(f"Unsupported file type: {file_extension}")
+        
+        # .doc需要经过LibreOffice转换，代价较高，走转换缓存
+        if file_extension == "doc":
+            return self.doc_converter.load(file_path)
             
         loader = loader_class(file_path)
         documents = loader.load()
@@ -54,16 +80,39 @@ class DocumentProcessor:
         """将文档切分成较小的片段"""
         return self.text_splitter.split_documents(documents)
     
+    def extract_tables(self, file_path: str) -> List[Document]:
+        """抽取文档中的表格，未启用表格抽取或文件类型不支持时返回空列表"""
+        if self.table_extractor is None:
+            return []
+        
+        file_extension = file_path.split(".")[-1].lower()
+        try:
+            if file_extension == "pdf":
+                return self.table_extractor.extract_tables_from_pdf(file_path)
+            if file_extension == "docx":
+                return self.table_extractor.extract_tables_from_docx(file_path)
+        except Exception as e:
+            logger.error(f"表格抽取失败: {str(e)}")
+        return []
+    
     def process_document(self, file_path: str) -> List[Document]:
-        """处理文档：加载并切分"""
+        """处理文档：加载并切分，启用表格抽取时表格片段追加在正文片段之后"""
         documents = self.load_document(file_path)
-        return self.split_documents(documents)
+        chunks = self.split_documents(documents)
+        
+        table_documents = self.extract_tables(file_path)
+        if table_documents:
+            logger.info(f"抽取到{len(table_documents)}个表格: {file_path}")
+            chunks.extend(self.split_documents(table_documents))
+        return chunks
     
     def extract_metadata(self, documents: List[Document]) -> List[Dict[str, Any]]:
         """提取文档元数据"""
         return [doc.metadata for doc in documents]
     
-    async def generate_document_summary(self, file_path: str, doc_id: str, filename: str) -> Optional[str]:
+    async def generate_document_summary(self, file_path: str, doc_id: str, filename: str,
+                                        chunks: Optional[List[Document]] = None,
+                                        chunk_embeddings: Optional[np.ndarray] = None) -> Optional[str]:
         """
         生成文档摘要并存储到SQLite数据库
         
@@ -71,30 +120,86 @@ class DocumentProcessor:
             file_path: 文档路径
             doc_id: 文档ID
             filename: 文件名
+            chunks: 文档片段，与chunk_embeddings同时传入且启用了抽取式预选时，只对预选出的片段生成摘要
+            chunk_embeddings: 片段向量（向量化时已计算）
             
         Returns:
-            Optional[str]: 生成的摘要，如果失败则返回None
+            Optional[str]: 生成的摘要，如果失败或摘要退化（部分块摘要或合并失败）则返回None，退化的摘要不保存
         """
         try:
-            # 加载原始文档（不分块）
-            documents = self.load_document(file_path)
-            
-            # 生成摘要
-            summary = await self.summarizer.summarize_documents(documents)
+            selected = self.select_summary_chunks(chunks, chunk_embeddings)
+            if selected is not None:
+                summary, degraded = await self.summarizer.summarize_text_with_status(
+                    "\n\n".join(chunk.page_content for chunk in selected)
+                )
+            else:
+                # 加载原始文档（不分块），对全文生成摘要
+                documents = self.load_document(file_path)
+                summary, degraded = await self.summarizer.summarize_documents_with_status(documents)
             
+            if degraded:
+                logger.warning(f"文档摘要不完整（部分块摘要或合并失败），不保存: {doc_id}")
+                return None
             # 存储摘要到SQLite
-            if summary and summary != "摘要生成失败" and summary != "多文档摘要生成失败":
+            if summary:
                 success = self.store.save_document_summary(doc_id, filename, summary)
+                self.invalidate_summary(doc_id)
                 if success:
                     return summary
             return None
         except Exception as e:
-            from src.utils import logger
             logger.error(f"生成文档摘要失败: {str(e)}")
             return None
     
+    def select_summary_chunks(self, chunks: Optional[List[Document]],
+                              chunk_embeddings: Optional[np.ndarray]) -> Optional[List[Document]]:
+        """抽取式预选参与摘要的片段，未启用、缺少向量或全文未超出预算时返回None（对全文生成摘要）"""
+        if self.extractive_selector is None or not chunks or chunk_embeddings is None:
+            return None
+        if len(chunk_embeddings) != len(chunks):
+            logger.warning(f"片段数({len(chunks)})与向量数({len(chunk_embeddings)})不一致，跳过抽取式预选")
+            return None
+        indices = self.extractive_selector.select([chunk.page_content for chunk in chunks], chunk_embeddings)
+        if len(indices) == len(chunks):
+            return None
+        return [chunks[i] for i in indices]
+    
     def get_document_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        return self.store.get_document_summary(doc_id)
+        if self.summary_cache is None:
+            return self.store.get_document_summary(doc_id)
+        
+        summary_info = self.summary_cache.get(doc_id)
+        if summary_info is None:
+            summary_info = self.store.get_document_summary(doc_id)
+            # 摘要可能尚未生成，不缓存空结果
+            if summary_info is not None:
+                self.summary_cache.set(doc_id, summary_info)
+        return summary_info
+    
+    def get_document_summaries(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量获取摘要，缓存未命中的文档用一次批量查询获取"""
+        if self.summary_cache is None:
+            return self.store.get_document_summaries(doc_ids)
+        
+        result = {}
+        missing = []
+        for doc_id in dict.fromkeys(doc_ids):
+            summary_info = self.summary_cache.get(doc_id)
+            if summary_info is None:
+                missing.append(doc_id)
+            else:
+                result[doc_id] = summary_info
+        if missing:
+            fetched = self.store.get_document_summaries(missing)
+            for doc_id, summary_info in fetched.items():
+                self.summary_cache.set(doc_id, summary_info)
+            result.update(fetched)
+        return result
+    
+    def invalidate_summary(self, doc_id: str):
+        """使指定文档的摘要缓存失效"""
+        if self.summary_cache is not None:
+            self.summary_cache.invalidate(doc_id)
     
     def get_all_document_summaries(self) -> List[Dict[str, Any]]:
         return self.store.get_all_document_summaries()
@@ -0,0 +1,135 @@
+from typing import List, Dict, Any, Optional, Tuple
+from neo4j import AsyncGraphDatabase
+from src.config import settings
+from src.models.graph import queries
+from src.models.graph.base_graph_store import BaseGraphStore
+from src.models.graph.schema import GraphSchemaManager
+
+
+class AsyncGraphStore(BaseGraphStore):
+    """基于AsyncGraphDatabase的图存储，方法与GraphStore一致，均为协程，供API在事件循环中直接调用"""
+
+    def __init__(self):
+        self.driver = AsyncGraphDatabase.driver(
+            settings.neo4j_uri,
+            auth=(settings.neo4j_user, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+            connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout
+        )
+
+    async def close(self):
+        """关闭数据库连接"""
+        await self.driver.close()
+
+    async def ensure_schema(self):
+        """创建约束和索引（幂等）"""
+        await GraphSchemaManager().ensure_schema_async(self.driver)
+
+    async def create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
+        """创建文档节点"""
+        async with self.driver.session() as session:
+            await session.execute_write(self._create_document_node, doc_id, metadata)
+
+    async def _create_document_node(self, tx, doc_id: str, metadata: Dict[str, Any]):
+        result = await tx.run(queries.CREATE_DOCUMENT_NODE, doc_id=doc_id, metadata=metadata)
+        await result.consume()
+
+    async def create_chunk_node(self, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
+        """创建文档片段节点并与文档建立关系"""
+        async with self.driver.session() as session:
+            await session.execute_write(
+                self._create_chunk_node,
+                chunk_id,
+                doc_id,
+                content,
+                metadata
+            )
+
+    async def _create_chunk_node(self, tx, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
+        result = await tx.run(
+            queries.CREATE_CHUNK_NODE,
+            chunk_id=chunk_id,
+            doc_id=doc_id,
+            content=content,
+            metadata=metadata
+        )
+        await result.consume()
+
+    async def create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int = None):
+        """批量创建文档片段节点并与文档建立关系，所有批次在同一个写事务中执行，最后建立片段之间的NEXT边"""
+        if not chunks:
+            return
+        batch_size = batch_size or settings.graph_write_batch_size
+        async with self.driver.session() as session:
+            await session.execute_write(self._create_chunk_nodes, doc_id, chunks, batch_size)
+
+    async def _create_chunk_nodes(self, tx, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int):
+        for i in range(0, len(chunks), batch_size):
+            result = await tx.run(queries.CREATE_CHUNK_NODES, doc_id=doc_id, rows=chunks[i:i + batch_size])
+            await result.consume()
+        result = await tx.run(queries.LINK_CHUNK_SEQUENCE, doc_id=doc_id)
+        await result.consume()
+
+    async def get_document_metadata(self, doc_id: str) -> Dict[str, Any]:
+        """获取文档元数据"""
+        async with self.driver.session() as session:
+            return await session.execute_read(self._get_document_metadata, doc_id)
+
+    async def _get_document_metadata(self, tx, doc_id: str):
+        result = await tx.run(queries.GET_DOCUMENT_METADATA, doc_id=doc_id)
+        record = await result.single()
+        return record["d"] if record else None
+
+    async def list_documents(self) -> List[Dict[str, Any]]:
+        """获取全部文档节点的元数据"""
+        async with self.driver.session() as session:
+            return await session.execute_read(self._list_documents)
+
+    async def _list_documents(self, tx):
+        result = await tx.run(queries.LIST_DOCUMENTS)
+        return [dict(record["d"]) async for record in result]
+
+    async def get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """获取文档的所有片段"""
+        async with self.driver.session() as session:
+            return await session.execute_read(self._get_document_chunks, doc_id)
+
+    async def _get_document_chunks(self, tx, doc_id: str):
+        result = await tx.run(queries.GET_DOCUMENT_CHUNKS, doc_id=doc_id)
+        return [record["c"] async for record in result]
+
+    async def get_document_chunks_page(self, doc_id: str, cursor: Optional[int] = None, limit: int = 100,
+                                       fields: Optional[List[str]] = None,
+                                       exclude: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """按chunk_index游标分页获取文档片段，返回(片段列表, 下一页游标)，没有下一页时游标为None"""
+        async with self.driver.session() as session:
+            return await session.execute_read(self._get_document_chunks_page, doc_id, cursor, limit, fields, exclude or [])
+
+    async def _get_document_chunks_page(self, tx, doc_id: str, cursor: Optional[int], limit: int,
+                                        fields: Optional[List[str]], exclude: List[str]):
+        result = await tx.run(
+            queries.GET_DOCUMENT_CHUNKS_PAGE,
+            doc_id=doc_id,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+            exclude=exclude
+        )
+        records = [record async for record in result]
+        chunks = [dict(record["props"]) for record in records]
+        next_cursor = records[-1]["chunk_index"] if len(records) == limit else None
+        return chunks, next_cursor
+
+    async def get_neighbor_chunks(self, chunk_ids: List[str], window: int) -> Dict[str, List[Dict[str, Any]]]:
+        """批量获取每个片段自身及其前后window个相邻片段，返回chunk_id到片段列表（按chunk_index排序）的映射"""
+        if not chunk_ids or window <= 0:
+            return {}
+        async with self.driver.session() as session:
+            return await session.execute_read(self._get_neighbor_chunks, chunk_ids, window)
+
+    async def _get_neighbor_chunks(self, tx, chunk_ids: List[str], window: int):
+        result = await tx.run(queries.get_neighbor_chunks_query(window), chunk_ids=chunk_ids)
+        return {
+            record["chunk_id"]: sorted((dict(c) for c in record["chunks"]), key=lambda c: c.get("chunk_index", 0))
+            async for record in result
+        }
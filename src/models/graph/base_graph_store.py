@@ -0,0 +1,63 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class BaseGraphStore(ABC):
+    """
+    图存储接口
+
+    API和检索链路通过该接口读写文档节点、片段节点及其关系，方法均为协程。
+    具体实现见AsyncGraphStore（Neo4j）和SQLiteGraphStore（嵌入式SQLite），通过settings.graph_store_type选择。
+    """
+
+    @abstractmethod
+    async def close(self):
+        """关闭连接"""
+        pass
+
+    @abstractmethod
+    async def ensure_schema(self):
+        """创建约束和索引（幂等）"""
+        pass
+
+    @abstractmethod
+    async def create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
+        """创建文档节点"""
+        pass
+
+    @abstractmethod
+    async def create_chunk_node(self, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
+        """创建文档片段节点并与文档建立关系"""
+        pass
+
+    @abstractmethod
+    async def create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int = None):
+        """批量创建文档片段节点并与文档建立关系，chunks中每项包含chunk_id、content、metadata"""
+        pass
+
+    @abstractmethod
+    async def get_document_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """获取文档元数据，文档不存在时返回None"""
+        pass
+
+    @abstractmethod
+    async def list_documents(self) -> List[Dict[str, Any]]:
+        """获取全部文档节点的元数据"""
+        pass
+
+    @abstractmethod
+    async def get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """获取文档的所有片段"""
+        pass
+
+    @abstractmethod
+    async def get_document_chunks_page(self, doc_id: str, cursor: Optional[int] = None, limit: int = 100,
+                                       fields: Optional[List[str]] = None,
+                                       exclude: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """按chunk_index游标分页获取文档片段，返回(片段列表, 下一页游标)，没有下一页时游标为None"""
+        pass
+
+    @abstractmethod
+    async def get_neighbor_chunks(self, chunk_ids: List[str], window: int) -> Dict[str, List[Dict[str, Any]]]:
+        """批量获取每个片段自身及其前后window个相邻片段，返回chunk_id到片段列表（按chunk_index排序）的映射"""
+        pass
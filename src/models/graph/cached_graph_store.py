@@ -0,0 +1,99 @@
+from typing import List, Dict, Any, Optional, Tuple
+from src.models.graph.base_graph_store import BaseGraphStore
+from src.utils.cache import TTLCache
+
+
+class CachedGraphStore:
+    """
+    带进程内读缓存的图存储
+
+    缓存文档元数据和文档片段（包括分页结果），入库后的文档几乎不再变化，热点文档可以直接从内存返回。
+    片段缓存按片段文本的字节数限制总量（max_chunk_bytes），单篇文档超出上限时直接读底层存储。
+    通过本类写入文档或片段时会使对应文档的缓存失效，也可以调用invalidate显式失效。
+    未缓存的方法直接转发给底层的图存储。
+    """
+
+    def __init__(self, graph_store: BaseGraphStore, max_entries: int = 1024, ttl: Optional[float] = None,
+                 max_chunk_bytes: Optional[int] = None):
+        self.graph_store = graph_store
+        self.metadata_cache = TTLCache(max_entries, ttl)
+        # 以doc_id为key，值为{查询参数: 结果}，便于按文档整体失效
+        self.chunks_cache = TTLCache(max_entries, ttl, max_bytes=max_chunk_bytes, sizeof=self._entries_size)
+
+    def __getattr__(self, name):
+        return getattr(self.graph_store, name)
+
+    def invalidate(self, doc_id: str):
+        """使指定文档的缓存失效"""
+        self.metadata_cache.invalidate(doc_id)
+        self.chunks_cache.invalidate(doc_id)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return {
+            "metadata": self.metadata_cache.stats(),
+            "chunks": self.chunks_cache.stats()
+        }
+
+    async def create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
+        await self.graph_store.create_document_node(doc_id, metadata)
+        self.invalidate(doc_id)
+
+    async def create_chunk_node(self, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
+        await self.graph_store.create_chunk_node(chunk_id, doc_id, content, metadata)
+        self.invalidate(doc_id)
+
+    async def create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int = None):
+        await self.graph_store.create_chunk_nodes(doc_id, chunks, batch_size)
+        self.invalidate(doc_id)
+
+    @staticmethod
+    def _entries_size(entries: Dict[Tuple, Any]) -> int:
+        """估算一篇文档缓存的片段占用的字节数（只计算字符串字段）"""
+        size = 0
+        for result in entries.values():
+            chunks = result[0] if isinstance(result, tuple) else result
+            for chunk in chunks:
+                size += sum(len(value.encode("utf-8")) for value in chunk.values() if isinstance(value, str))
+        return size
+
+    async def get_document_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        metadata = self.metadata_cache.get(doc_id)
+        if metadata is not None:
+            return metadata
+        node = await self.graph_store.get_document_metadata(doc_id)
+        if node is None:
+            # 不缓存不存在的文档，避免文档入库后仍返回404
+            return None
+        metadata = dict(node)
+        self.metadata_cache.set(doc_id, metadata)
+        return metadata
+
+    async def get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        return await self._get_chunks(doc_id, ("all",), lambda: self.graph_store.get_document_chunks(doc_id))
+
+    async def get_document_chunks_page(self, doc_id: str, cursor: Optional[int] = None, limit: int = 100,
+                                       fields: Optional[List[str]] = None,
+                                       exclude: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        key = ("page", cursor, limit, tuple(fields) if fields else None, tuple(exclude or []))
+        return await self._get_chunks(
+            doc_id,
+            key,
+            lambda: self.graph_store.get_document_chunks_page(doc_id, cursor, limit, fields, exclude)
+        )
+
+    async def _get_chunks(self, doc_id: str, key: Tuple, loader):
+        entries = self.chunks_cache.get(doc_id)
+        if entries is not None and key in entries:
+            return entries[key]
+
+        result = await loader()
+        if isinstance(result, tuple):
+            chunks, next_cursor = result
+            result = ([dict(chunk) for chunk in chunks], next_cursor)
+        else:
+            result = [dict(chunk) for chunk in result]
+
+        entries = dict(entries) if entries is not None else {}
+        entries[key] = result
+        self.chunks_cache.set(doc_id, entries)
+        return result
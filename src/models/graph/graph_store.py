@@ -1,29 +1,39 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from neo4j import GraphDatabase
 from src.config import settings
+from src.models.graph import queries
+from src.models.graph.schema import GraphSchemaManager
 
 class GraphStore:
+    # 节点标签及其唯一键，用于批量写入和快照导出/导入
+    NODE_KEYS = {
+        "Document": "doc_id",
+        "Chunk": "chunk_id"
+    }
+    
     def __init__(self):
         self.driver = GraphDatabase.driver(
             settings.neo4j_uri,
-            auth=(settings.neo4j_user, settings.neo4j_password)
+            auth=(settings.neo4j_user, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+            connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout
         )
     
     def close(self):
         """关闭数据库连接"""
         self.driver.close()
     
+    def ensure_schema(self):
+        """创建约束和索引（幂等）"""
+        GraphSchemaManager().ensure_schema(self.driver)
+    
     def create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
         """创建文档节点"""
         with self.driver.session() as session:
             session.execute_write(self._create_document_node, doc_id, metadata)
     
     def _create_document_node(self, tx, doc_id: str, metadata: Dict[str, Any]):
-        query = """
-        MERGE (d:Document {doc_id: $doc_id})
-        SET d += $metadata
-        """
-        tx.run(query, doc_id=doc_id, metadata=metadata)
+        tx.run(queries.CREATE_DOCUMENT_NODE, doc_id=doc_id, metadata=metadata)
     
     def create_chunk_node(self, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
         """创建文档片段节点并与文档建立关系"""
@@ -37,21 +47,36 @@ class GraphStore:
             )
     
     def _create_chunk_node(self, tx, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
-        query = """
-        MATCH (d:Document {doc_id: $doc_id})
-        MERGE (c:Chunk {chunk_id: $chunk_id})
-        SET c.content = $content
-        SET c += $metadata
-        MERGE (d)-[:CONTAINS]->(c)
-        """
         tx.run(
-            query,
+            queries.CREATE_CHUNK_NODE,
             chunk_id=chunk_id,
             doc_id=doc_id,
             content=content,
             metadata=metadata
         )
     
+    def create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int = None):
+        """
+        批量创建文档片段节点并与文档建立关系
+        
+        所有批次在同一个写事务中执行，每批一条UNWIND语句，最后按chunk_index建立片段之间的NEXT边
+        
+        Args:
+            doc_id: 所属文档的ID
+            chunks: 片段列表，每项包含chunk_id、content、metadata
+            batch_size: 每批写入的片段数，默认使用配置中的graph_write_batch_size
+        """
+        if not chunks:
+            return
+        batch_size = batch_size or settings.graph_write_batch_size
+        with self.driver.session() as session:
+            session.execute_write(self._create_chunk_nodes, doc_id, chunks, batch_size)
+    
+    def _create_chunk_nodes(self, tx, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int):
+        for i in range(0, len(chunks), batch_size):
+            tx.run(queries.CREATE_CHUNK_NODES, doc_id=doc_id, rows=chunks[i:i + batch_size]).consume()
+        tx.run(queries.LINK_CHUNK_SEQUENCE, doc_id=doc_id).consume()
+    
     def get_document_metadata(self, doc_id: str) -> Dict[str, Any]:
         """获取文档元数据"""
         with self.driver.session() as session:
@@ -59,11 +84,7 @@ class GraphStore:
             return result
     
     def _get_document_metadata(self, tx, doc_id: str):
-        query = """
-        MATCH (d:Document {doc_id: $doc_id})
-        RETURN d
-        """
-        result = tx.run(query, doc_id=doc_id)
+        result = tx.run(queries.GET_DOCUMENT_METADATA, doc_id=doc_id)
         record = result.single()
         return record["d"] if record else None
     
@@ -74,9 +95,113 @@ class GraphStore:
             return result
     
     def _get_document_chunks(self, tx, doc_id: str):
+        result = tx.run(queries.GET_DOCUMENT_CHUNKS, doc_id=doc_id)
+        return [record["c"] for record in result]
+    
+    def get_document_chunks_page(self, doc_id: str, cursor: Optional[int] = None, limit: int = 100,
+                                 fields: Optional[List[str]] = None,
+                                 exclude: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        按chunk_index游标分页获取文档片段
+        
+        Args:
+            doc_id: 文档ID
+            cursor: 上一页最后一个片段的chunk_index，None表示从头开始
+            limit: 每页片段数
+            fields: 只返回这些属性，None表示全部
+            exclude: 不返回的属性
+            
+        Returns:
+            (片段列表, 下一页游标)，没有下一页时游标为None
+        """
+        with self.driver.session() as session:
+            return session.execute_read(self._get_document_chunks_page, doc_id, cursor, limit, fields, exclude or [])
+    
+    def _get_document_chunks_page(self, tx, doc_id: str, cursor: Optional[int], limit: int,
+                                  fields: Optional[List[str]], exclude: List[str]):
+        result = tx.run(
+            queries.GET_DOCUMENT_CHUNKS_PAGE,
+            doc_id=doc_id,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+            exclude=exclude
+        )
+        records = list(result)
+        chunks = [dict(record["props"]) for record in records]
+        next_cursor = records[-1]["chunk_index"] if len(records) == limit else None
+        return chunks, next_cursor
+    
+    def get_neighbor_chunks(self, chunk_ids: List[str], window: int) -> Dict[str, List[Dict[str, Any]]]:
+        """批量获取每个片段自身及其前后window个相邻片段，返回chunk_id到片段列表（按chunk_index排序）的映射"""
+        if not chunk_ids or window <= 0:
+            return {}
+        with self.driver.session() as session:
+            return session.execute_read(self._get_neighbor_chunks, chunk_ids, window)
+    
+    def _get_neighbor_chunks(self, tx, chunk_ids: List[str], window: int):
+        result = tx.run(queries.get_neighbor_chunks_query(window), chunk_ids=chunk_ids)
+        return {
+            record["chunk_id"]: sorted((dict(c) for c in record["chunks"]), key=lambda c: c.get("chunk_index", 0))
+            for record in result
+        }
+    
+    def iter_nodes(self, label: str) -> Iterator[Dict[str, Any]]:
+        """流式读取指定标签的全部节点属性"""
+        if label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {label}")
+        with self.driver.session() as session:
+            result = session.run(f"MATCH (n:{label}) RETURN properties(n) AS props")
+            for record in result:
+                yield record["props"]
+    
+    def iter_relationships(self) -> Iterator[Dict[str, Any]]:
+        """流式读取Document/Chunk之间的全部关系"""
         query = """
-        MATCH (d:Document {doc_id: $doc_id})-[:CONTAINS]->(c:Chunk)
-        RETURN c
+        MATCH (a)-[r]->(b)
+        WHERE (a:Document OR a:Chunk) AND (b:Document OR b:Chunk)
+        RETURN
+            CASE WHEN a:Chunk THEN 'Chunk' ELSE 'Document' END AS source_label,
+            coalesce(a.chunk_id, a.doc_id) AS source_key,
+            type(r) AS type,
+            CASE WHEN b:Chunk THEN 'Chunk' ELSE 'Document' END AS target_label,
+            coalesce(b.chunk_id, b.doc_id) AS target_key,
+            properties(r) AS properties
+        """
+        with self.driver.session() as session:
+            result = session.run(query)
+            for record in result:
+                yield record.data()
+    
+    def import_nodes(self, label: str, rows: List[Dict[str, Any]]):
+        """使用UNWIND在一个事务中批量写入节点"""
+        if label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {label}")
+        if not rows:
+            return
+        key = self.NODE_KEYS[label]
+        query = f"""
+        UNWIND $rows AS row
+        MERGE (n:{label} {{{key}: row.{key}}})
+        SET n += row
         """
-        result = tx.run(query, doc_id=doc_id)
-        return [record["c"] for record in result]
\ No newline at end of file
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+    
+    def import_relationships(self, source_label: str, rel_type: str, target_label: str, rows: List[Dict[str, Any]]):
+        """使用UNWIND在一个事务中批量写入同一类型的关系，rows包含source_key、target_key和properties"""
+        if source_label not in self.NODE_KEYS or target_label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {source_label}, {target_label}")
+        if not rel_type.isidentifier():
+            raise ValueError(f"非法的关系类型: {rel_type}")
+        if not rows:
+            return
+        query = f"""
+        UNWIND $rows AS row
+        MATCH (a:{source_label} {{{self.NODE_KEYS[source_label]}: row.source_key}})
+        MATCH (b:{target_label} {{{self.NODE_KEYS[target_label]}: row.target_key}})
+        MERGE (a)-[r:{rel_type}]->(b)
+        SET r += row.properties
+        """
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
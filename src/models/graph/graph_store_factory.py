@@ -0,0 +1,29 @@
+from src.config import settings
+from src.models.graph.base_graph_store import BaseGraphStore
+from src.utils import logger
+
+
+def create_graph_store(snapshot: bool = False) -> BaseGraphStore:
+    """
+    根据配置创建图存储，实现类按需导入，使用SQLite时不需要安装neo4j驱动
+
+    Args:
+        snapshot: 为True时返回提供同步快照接口（iter_nodes/import_nodes等）的实现，Neo4j使用同步驱动
+    """
+    store_type = settings.graph_store_type.lower()
+
+    if store_type == "sqlite":
+        from src.models.graph.sqlite_graph_store import SQLiteGraphStore
+        logger.info("使用SQLite嵌入式图存储")
+        return SQLiteGraphStore()
+    if store_type != "neo4j":
+        logger.warning(f"未知的图存储类型: {store_type}，默认使用Neo4j")
+
+    if snapshot:
+        from src.models.graph.graph_store import GraphStore
+        logger.info("使用Neo4j图存储（同步驱动）")
+        return GraphStore()
+
+    from src.models.graph.async_graph_store import AsyncGraphStore
+    logger.info("使用Neo4j图存储")
+    return AsyncGraphStore()
@@ -0,0 +1,78 @@
+# 同步和异步图存储共用的Cypher语句
+
+CREATE_DOCUMENT_NODE = """
+MERGE (d:Document {doc_id: $doc_id})
+SET d += $metadata
+"""
+
+CREATE_CHUNK_NODE = """
+MATCH (d:Document {doc_id: $doc_id})
+MERGE (c:Chunk {chunk_id: $chunk_id})
+SET c.content = $content
+SET c += $metadata
+MERGE (d)-[:CONTAINS]->(c)
+"""
+
+CREATE_CHUNK_NODES = """
+MATCH (d:Document {doc_id: $doc_id})
+UNWIND $rows AS row
+MERGE (c:Chunk {chunk_id: row.chunk_id})
+SET c.content = row.content
+SET c += row.metadata
+MERGE (d)-[:CONTAINS]->(c)
+"""
+
+# 为同一文档中chunk_index连续的片段建立NEXT边（表格片段的编号与正文不连续，不进入正文的NEXT链）
+LINK_CHUNK_SEQUENCE = """
+MATCH (d:Document {doc_id: $doc_id})-[:CONTAINS]->(c:Chunk)
+WITH c ORDER BY c.chunk_index
+WITH collect(c) AS chunks
+UNWIND range(0, size(chunks) - 2) AS i
+WITH chunks[i] AS a, chunks[i + 1] AS b
+WHERE b.chunk_index = a.chunk_index + 1
+MERGE (a)-[:NEXT]->(b)
+"""
+
+
+def get_neighbor_chunks_query(window: int) -> str:
+    """沿NEXT边取每个片段前后window个相邻片段（变长路径的长度不能参数化）"""
+    return f"""
+    UNWIND $chunk_ids AS chunk_id
+    MATCH (c:Chunk {{chunk_id: chunk_id}})
+    OPTIONAL MATCH (c)-[:NEXT*1..{int(window)}]-(n:Chunk)
+    WITH chunk_id, c, collect(DISTINCT n) AS neighbors
+    RETURN chunk_id, neighbors + [c] AS chunks
+    """
+
+
+GET_DOCUMENT_METADATA = """
+MATCH (d:Document {doc_id: $doc_id})
+RETURN d
+"""
+
+LIST_DOCUMENTS = """
+MATCH (d:Document)
+RETURN d
+"""
+
+GET_DOCUMENT_CHUNKS = """
+MATCH (d:Document {doc_id: $doc_id})-[:CONTAINS]->(c:Chunk)
+RETURN c
+"""
+
+# 按chunk_index游标分页读取片段，属性投影在数据库端完成（例如不返回content）
+GET_DOCUMENT_CHUNKS_PAGE = """
+MATCH (c:Chunk {doc_id: $doc_id})
+WHERE $cursor IS NULL OR c.chunk_index > $cursor
+WITH c ORDER BY c.chunk_index LIMIT $limit
+RETURN c.chunk_index AS chunk_index,
+       [k IN keys(c) WHERE ($fields IS NULL OR k IN $fields) AND NOT k IN $exclude | [k, c[k]]] AS props
+"""
+
+# 图数据库约束和索引，均为幂等语句，启动时执行
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT document_doc_id_unique IF NOT EXISTS FOR (d:Document) REQUIRE d.doc_id IS UNIQUE",
+    "CREATE CONSTRAINT chunk_chunk_id_unique IF NOT EXISTS FOR (c:Chunk) REQUIRE c.chunk_id IS UNIQUE",
+    "CREATE INDEX chunk_doc_id_index IF NOT EXISTS FOR (c:Chunk) ON (c.doc_id)",
+    "CREATE INDEX chunk_doc_id_chunk_index_index IF NOT EXISTS FOR (c:Chunk) ON (c.doc_id, c.chunk_index)"
+]
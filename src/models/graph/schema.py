@@ -0,0 +1,46 @@
+from src.models.graph import queries
+from src.utils import logger
+
+
+class GraphSchemaManager:
+    """
+    图数据库结构管理
+
+    创建Document.doc_id、Chunk.chunk_id的唯一约束以及片段按文档查询的索引。
+    没有这些约束时每次MERGE都是按标签全量扫描，写入耗时随图的规模增长。
+    """
+
+    def ensure_schema(self, driver):
+        """使用同步驱动创建约束和索引"""
+        failures = 0
+        with driver.session() as session:
+            for statement in queries.SCHEMA_STATEMENTS:
+                try:
+                    session.run(statement).consume()
+                except Exception as e:
+                    failures += 1
+                    self._log_failure(statement, e)
+        self._log_result(failures)
+
+    async def ensure_schema_async(self, driver):
+        """使用异步驱动创建约束和索引"""
+        failures = 0
+        async with driver.session() as session:
+            for statement in queries.SCHEMA_STATEMENTS:
+                try:
+                    result = await session.run(statement)
+                    await result.consume()
+                except Exception as e:
+                    failures += 1
+                    self._log_failure(statement, e)
+        self._log_result(failures)
+
+    def _log_failure(self, statement: str, error: Exception):
+        # 已有重复数据时唯一约束会创建失败，需要先清理重复节点
+        logger.error(f"创建图数据库约束/索引失败: {statement}，错误: {str(error)}")
+
+    def _log_result(self, failures: int):
+        if failures:
+            logger.warning(f"图数据库约束和索引未全部创建: {failures}/{len(queries.SCHEMA_STATEMENTS)}条语句失败")
+        else:
+            logger.info("图数据库约束和索引已就绪")
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Type
+from peewee import SqliteDatabase, Model, CharField, TextField, IntegerField, CompositeKey
+from src.config import settings
+from src.models.graph.base_graph_store import BaseGraphStore
+from src.utils import logger
+
+
+class SQLiteGraphStore(BaseGraphStore):
+    """
+    基于SQLite的嵌入式图存储
+
+    适用于单机部署和CI，不需要运行Neo4j。文档和片段分别存放在节点表中，属性以JSON保存，
+    CONTAINS关系存放在邻接表中；片段按(doc_id, chunk_index)建索引，NEXT关系即同一文档中连续的chunk_index，
+    相邻片段直接按索引范围查询。数据库调用是同步的，放到线程中执行；快照导入导出使用的iter_*/import_*是同步接口。
+    """
+
+    NODE_KEYS = {
+        "Document": "doc_id",
+        "Chunk": "chunk_id"
+    }
+
+    def __init__(self, db_path: str = None):
+        db_path = db_path or settings.sqlite_graph_db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        self.db = SqliteDatabase(db_path, pragmas={"journal_mode": "wal"})
+        self.GraphDocument, self.GraphChunk, self.GraphEdge = self._create_models()
+        self._create_tables()
+        logger.info(f"成功初始化SQLite图存储: {db_path}")
+
+    def _create_models(self) -> Tuple[Type[Model], Type[Model], Type[Model]]:
+        """创建节点表和邻接表模型"""
+        class BaseModel(Model):
+            class Meta:
+                database = self.db
+
+        class GraphDocument(BaseModel):
+            doc_id = CharField(primary_key=True)
+            properties = TextField()
+
+            class Meta:
+                table_name = 'graph_documents'
+
+        class GraphChunk(BaseModel):
+            chunk_id = CharField(primary_key=True)
+            doc_id = CharField()
+            chunk_index = IntegerField(null=True)
+            properties = TextField()
+
+            class Meta:
+                table_name = 'graph_chunks'
+                indexes = (
+                    (('doc_id', 'chunk_index'), False),
+                )
+
+        class GraphEdge(BaseModel):
+            source_id = CharField()
+            rel_type = CharField()
+            target_id = CharField()
+
+            class Meta:
+                table_name = 'graph_edges'
+                primary_key = CompositeKey('source_id', 'rel_type', 'target_id')
+                indexes = (
+                    (('target_id', 'rel_type'), False),
+                )
+
+        return GraphDocument, GraphChunk, GraphEdge
+
+    def _create_tables(self):
+        with self.db.connection_context():
+            self.db.create_tables([self.GraphDocument, self.GraphChunk, self.GraphEdge], safe=True)
+
+    async def close(self):
+        """关闭数据库连接"""
+        if not self.db.is_closed():
+            self.db.close()
+
+    async def ensure_schema(self):
+        """创建表和索引（幂等）"""
+        await asyncio.to_thread(self._create_tables)
+
+    async def create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
+        """创建文档节点，已存在时合并属性"""
+        await asyncio.to_thread(self._create_document_node, doc_id, metadata)
+
+    def _create_document_node(self, doc_id: str, metadata: Dict[str, Any]):
+        with self.db.connection_context():
+            with self.db.atomic():
+                existing = self.GraphDocument.get_or_none(self.GraphDocument.doc_id == doc_id)
+                properties = json.loads(existing.properties) if existing else {"doc_id": doc_id}
+                properties.update(metadata)
+                self.GraphDocument.insert(
+                    doc_id=doc_id,
+                    properties=json.dumps(properties, ensure_ascii=False, default=str)
+                ).on_conflict_replace().execute()
+
+    async def create_chunk_node(self, chunk_id: str, doc_id: str, content: str, metadata: Dict[str, Any]):
+        """创建文档片段节点并与文档建立关系"""
+        await self.create_chunk_nodes(doc_id, [{"chunk_id": chunk_id, "content": content, "metadata": metadata}])
+
+    async def create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int = None):
+        """批量创建文档片段节点并与文档建立关系，所有批次在同一个事务中执行"""
+        if not chunks:
+            return
+        batch_size = batch_size or settings.graph_write_batch_size
+        await asyncio.to_thread(self._create_chunk_nodes, doc_id, chunks, batch_size)
+
+    def _create_chunk_nodes(self, doc_id: str, chunks: List[Dict[str, Any]], batch_size: int):
+        with self.db.connection_context():
+            with self.db.atomic():
+                # 与Neo4j实现一致，文档节点不存在时不写入片段
+                if not self.GraphDocument.select().where(self.GraphDocument.doc_id == doc_id).exists():
+                    logger.warning(f"文档节点不存在，跳过片段写入: {doc_id}")
+                    return
+
+                for i in range(0, len(chunks), batch_size):
+                    batch = chunks[i:i + batch_size]
+                    node_rows = []
+                    edge_rows = []
+                    for chunk in batch:
+                        properties = {"chunk_id": chunk["chunk_id"], "content": chunk["content"]}
+                        properties.update(chunk.get("metadata") or {})
+                        node_rows.append({
+                            "chunk_id": chunk["chunk_id"],
+                            "doc_id": doc_id,
+                            "chunk_index": properties.get("chunk_index"),
+                            "properties": json.dumps(properties, ensure_ascii=False, default=str)
+                        })
+                        edge_rows.append({"source_id": doc_id, "rel_type": "CONTAINS", "target_id": chunk["chunk_id"]})
+                    self.GraphChunk.insert_many(node_rows).on_conflict_replace().execute()
+                    self.GraphEdge.insert_many(edge_rows).on_conflict_ignore().execute()
+
+    async def get_document_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """获取文档元数据"""
+        return await asyncio.to_thread(self._get_document_metadata, doc_id)
+
+    def _get_document_metadata(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self.db.connection_context():
+            document = self.GraphDocument.get_or_none(self.GraphDocument.doc_id == doc_id)
+            return json.loads(document.properties) if document else None
+
+    async def list_documents(self) -> List[Dict[str, Any]]:
+        """获取全部文档节点的元数据"""
+        return await asyncio.to_thread(lambda: list(self.iter_nodes("Document")))
+
+    async def get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        """获取文档的所有片段"""
+        return await asyncio.to_thread(self._get_document_chunks, doc_id)
+
+    def _get_document_chunks(self, doc_id: str) -> List[Dict[str, Any]]:
+        with self.db.connection_context():
+            query = (self.GraphChunk
+                     .select(self.GraphChunk.properties)
+                     .join(self.GraphEdge, on=(self.GraphEdge.target_id == self.GraphChunk.chunk_id))
+                     .where((self.GraphEdge.source_id == doc_id) & (self.GraphEdge.rel_type == "CONTAINS"))
+                     .order_by(self.GraphChunk.chunk_index)
+                     .tuples())
+            return [json.loads(properties) for (properties,) in query]
+
+    async def get_document_chunks_page(self, doc_id: str, cursor: Optional[int] = None, limit: int = 100,
+                                       fields: Optional[List[str]] = None,
+                                       exclude: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """按chunk_index游标分页获取文档片段，返回(片段列表, 下一页游标)，没有下一页时游标为None"""
+        return await asyncio.to_thread(self._get_document_chunks_page, doc_id, cursor, limit, fields, exclude or [])
+
+    def _get_document_chunks_page(self, doc_id: str, cursor: Optional[int], limit: int,
+                                  fields: Optional[List[str]], exclude: List[str]):
+        with self.db.connection_context():
+            query = self.GraphChunk.select(self.GraphChunk.chunk_index, self.GraphChunk.properties).where(
+                self.GraphChunk.doc_id == doc_id
+            )
+            if cursor is not None:
+                query = query.where(self.GraphChunk.chunk_index > cursor)
+            rows = list(query.order_by(self.GraphChunk.chunk_index).limit(limit).tuples())
+
+        chunks = []
+        for _, properties in rows:
+            chunks.append({
+                k: v for k, v in json.loads(properties).items()
+                if (fields is None or k in fields) and k not in exclude
+            })
+        next_cursor = rows[-1][0] if len(rows) == limit else None
+        return chunks, next_cursor
+
+    async def get_neighbor_chunks(self, chunk_ids: List[str], window: int) -> Dict[str, List[Dict[str, Any]]]:
+        """批量获取每个片段自身及其前后window个相邻片段，返回chunk_id到片段列表（按chunk_index排序）的映射"""
+        if not chunk_ids or window <= 0:
+            return {}
+        return await asyncio.to_thread(self._get_neighbor_chunks, chunk_ids, window)
+
+    def _get_neighbor_chunks(self, chunk_ids: List[str], window: int) -> Dict[str, List[Dict[str, Any]]]:
+        # 起点片段与同一文档中索引相差不超过window的片段自连接，一次查询取回全部起点的相邻片段
+        Origin = self.GraphChunk.alias()
+        query = (self.GraphChunk
+                 .select(Origin.chunk_id, self.GraphChunk.properties)
+                 .join(Origin, on=((Origin.doc_id == self.GraphChunk.doc_id) &
+                                   (self.GraphChunk.chunk_index.between(Origin.chunk_index - window,
+                                                                        Origin.chunk_index + window))))
+                 .where(Origin.chunk_id.in_(chunk_ids))
+                 .order_by(Origin.chunk_id, self.GraphChunk.chunk_index)
+                 .tuples())
+        with self.db.connection_context():
+            result = {}
+            for chunk_id, properties in query:
+                result.setdefault(chunk_id, []).append(json.loads(properties))
+            return result
+
+    def iter_nodes(self, label: str) -> Iterator[Dict[str, Any]]:
+        """流式读取指定标签的全部节点属性"""
+        if label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {label}")
+        model = self.GraphDocument if label == "Document" else self.GraphChunk
+        with self.db.connection_context():
+            for (properties,) in model.select(model.properties).tuples().iterator():
+                yield json.loads(properties)
+
+    def iter_relationships(self) -> Iterator[Dict[str, Any]]:
+        """流式读取全部关系，NEXT关系由同一文档中连续的chunk_index推导，与Neo4j导出的快照格式一致"""
+        with self.db.connection_context():
+            for source_id, rel_type, target_id in self.GraphEdge.select(
+                    self.GraphEdge.source_id, self.GraphEdge.rel_type, self.GraphEdge.target_id).tuples().iterator():
+                yield {
+                    "source_label": "Document",
+                    "source_key": source_id,
+                    "type": rel_type,
+                    "target_label": "Chunk",
+                    "target_key": target_id,
+                    "properties": {}
+                }
+
+            previous = None
+            query = (self.GraphChunk
+                     .select(self.GraphChunk.doc_id, self.GraphChunk.chunk_id, self.GraphChunk.chunk_index)
+                     .where(self.GraphChunk.chunk_index.is_null(False))
+                     .order_by(self.GraphChunk.doc_id, self.GraphChunk.chunk_index)
+                     .tuples())
+            for doc_id, chunk_id, chunk_index in query.iterator():
+                if previous is not None and previous[0] == doc_id and previous[2] + 1 == chunk_index:
+                    yield {
+                        "source_label": "Chunk",
+                        "source_key": previous[1],
+                        "type": "NEXT",
+                        "target_label": "Chunk",
+                        "target_key": chunk_id,
+                        "properties": {}
+                    }
+                previous = (doc_id, chunk_id, chunk_index)
+
+    def import_nodes(self, label: str, rows: List[Dict[str, Any]]):
+        """在一个事务中批量写入节点，已存在的节点合并属性"""
+        if label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {label}")
+        if not rows:
+            return
+        key = self.NODE_KEYS[label]
+        model = self.GraphDocument if label == "Document" else self.GraphChunk
+        field = getattr(model, key)
+        with self.db.connection_context():
+            with self.db.atomic():
+                existing = {
+                    node_key: json.loads(properties)
+                    for node_key, properties in model.select(field, model.properties)
+                    .where(field.in_([row[key] for row in rows])).tuples()
+                }
+                node_rows = []
+                for row in rows:
+                    properties = {**existing.get(row[key], {}), **row}
+                    node_row = {key: row[key], "properties": json.dumps(properties, ensure_ascii=False, default=str)}
+                    if label == "Chunk":
+                        node_row.update(doc_id=properties.get("doc_id", ""), chunk_index=properties.get("chunk_index"))
+                    node_rows.append(node_row)
+                model.insert_many(node_rows).on_conflict_replace().execute()
+
+    def import_relationships(self, source_label: str, rel_type: str, target_label: str, rows: List[Dict[str, Any]]):
+        """
+        批量写入同一类型的关系，rows包含source_key、target_key和properties
+
+        NEXT关系由chunk_index表示，不单独保存；其他关系写入邻接表，不保存关系属性。
+        """
+        if source_label not in self.NODE_KEYS or target_label not in self.NODE_KEYS:
+            raise ValueError(f"不支持的节点标签: {source_label}, {target_label}")
+        if not rel_type.isidentifier():
+            raise ValueError(f"非法的关系类型: {rel_type}")
+        if not rows or rel_type == "NEXT":
+            return
+        with self.db.connection_context():
+            with self.db.atomic():
+                self.GraphEdge.insert_many([
+                    {"source_id": row["source_key"], "rel_type": rel_type, "target_id": row["target_key"]}
+                    for row in rows
+                ]).on_conflict_ignore().execute()
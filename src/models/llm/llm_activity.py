@@ -0,0 +1,61 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class LLMActivity:
+    """
+    跟踪交互式LLM请求（问答）
+
+    问答请求在interactive()中执行；摘要等后台任务调用LLM前先等待wait_until_idle()，
+    有交互式请求进行时让出Ollama的处理能力，交互式请求优先。
+    """
+
+    def __init__(self):
+        self._active = 0
+        self._last_finished = 0.0
+        # Event与事件循环绑定，在首次使用时按当前事件循环创建
+        self._idle = None
+        self._idle_loop = None
+
+    @property
+    def active(self) -> int:
+        """正在进行的交互式请求数"""
+        return self._active
+
+    def _get_idle_event(self) -> asyncio.Event:
+        loop = asyncio.get_running_loop()
+        if self._idle is None or self._idle_loop is not loop:
+            self._idle = asyncio.Event()
+            if self._active == 0:
+                self._idle.set()
+            self._idle_loop = loop
+        return self._idle
+
+    @asynccontextmanager
+    async def interactive(self):
+        """标记一个交互式请求，期间后台任务不发起新的LLM调用"""
+        self._active += 1
+        self._get_idle_event().clear()
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._last_finished = time.monotonic()
+            if self._active == 0:
+                self._get_idle_event().set()
+
+    async def wait_until_idle(self, grace: float = 0.0):
+        """等待没有交互式请求，且距最后一个交互式请求结束至少grace秒"""
+        while True:
+            if self._active == 0:
+                remaining = self._last_finished + grace - time.monotonic()
+                if remaining <= 0:
+                    return
+                await asyncio.sleep(remaining)
+                continue
+            await self._get_idle_event().wait()
+
+
+# 进程内共享的交互式请求跟踪器
+llm_activity = LLMActivity()
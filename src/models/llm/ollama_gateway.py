@@ -0,0 +1,199 @@
+import asyncio
+import heapq
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from langchain_ollama import OllamaLLM, OllamaEmbeddings
+from src.config import settings
+from src.utils import logger
+
+# 调用方的优先级，数值越小越先获得Ollama的处理能力
+OLLAMA_PRIORITIES = {"query": 0, "agent": 1, "summary": 2}
+
+
+class _Waiter:
+    __slots__ = ("wake", "granted")
+
+    def __init__(self, wake):
+        self.wake = wake
+        self.granted = False
+
+
+class OllamaGateway:
+    """
+    进程内共享的Ollama访问入口
+
+    并发限制只在当前进程内生效：主服务（API和挂载的MCP）、单独运行的MCP服务和代理各自有一组名额，
+    同时运行时各进程的max_in_flight之和应不超过Ollama的OLLAMA_NUM_PARALLEL。
+    所有OllamaLLMClient共用同一个OllamaLLM和OllamaEmbeddings实例，也就共用其中保持长连接的HTTP连接池；
+    生成请求经过全局的并发限制：同时发往Ollama的请求数不超过max_in_flight，其余请求按调用方优先级
+    （问答 > 代理 > 摘要）排队，排队超过queue_timeout或队列已满时失败，单次调用超过request_timeout时取消。
+    限流器基于线程锁实现，事件循环中的协程和线程池中的同步调用（LlamaIndex代理）共用同一组并发名额。
+    """
+
+    def __init__(self, max_in_flight: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None, request_timeout: Optional[float] = None):
+        self.max_in_flight = max_in_flight or settings.ollama_max_in_flight
+        self.max_queue = settings.ollama_max_queue if max_queue is None else max_queue
+        self.queue_timeout = queue_timeout or settings.ollama_queue_timeout
+        self.request_timeout = request_timeout or settings.ollama_request_timeout
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._stats = {priority: {"requests": 0, "queued": 0, "timeouts": 0, "rejected": 0}
+                       for priority in OLLAMA_PRIORITIES}
+        self._llm = None
+        self._embedding_model = None
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Ollama客户端（httpx）参数：保持长连接的连接池和超时"""
+        import httpx
+        return {
+            "timeout": self.request_timeout,
+            "limits": httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_connections
+            )
+        }
+
+    def get_llm(self, config: Dict[str, Any]):
+        """获取共享的OllamaLLM实例，首次调用时按config创建"""
+        with self._lock:
+            if self._llm is None:
+                self._llm = OllamaLLM(**config, keep_alive=settings.ollama_keep_alive,
+                                      client_kwargs=self.client_kwargs())
+            return self._llm
+
+    def get_embedding_model(self, config: Dict[str, Any]):
+        """获取共享的OllamaEmbeddings实例，首次调用时按config创建"""
+        with self._lock:
+            if self._embedding_model is None:
+                self._embedding_model = OllamaEmbeddings(**config, client_kwargs=self.client_kwargs())
+            return self._embedding_model
+
+    @asynccontextmanager
+    async def slot(self, priority: str):
+        """在协程中占用一个并发名额，名额不足时按优先级排队"""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    @contextmanager
+    def sync_slot(self, priority: str):
+        """在线程中（同步调用）占用一个并发名额，不能在事件循环线程中使用"""
+        self._acquire_sync(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def ainvoke(self, chain, inputs: Dict[str, Any], priority: str) -> Any:
+        """在并发限制内调用链，超过request_timeout时取消"""
+        async with self.slot(priority):
+            return await asyncio.wait_for(chain.ainvoke(inputs), self.request_timeout)
+
+    async def astream(self, chain, inputs: Dict[str, Any], priority: str) -> AsyncIterator[Any]:
+        """在并发限制内流式调用链，输出结束前一直占用名额，从开始到输出结束超过request_timeout时取消"""
+        async with self.slot(priority):
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.request_timeout
+            stream = chain.astream(inputs).__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+                    except StopAsyncIteration:
+                        return
+                    yield chunk
+            finally:
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queued": len(self._waiters),
+                "priorities": {priority: dict(counts) for priority, counts in self._stats.items()}
+            }
+
+    def _enqueue(self, priority: str, wake) -> Optional[_Waiter]:
+        """有空闲名额时直接占用并返回None，否则加入等待队列并返回等待项"""
+        if priority not in OLLAMA_PRIORITIES:
+            raise ValueError(f"不支持的Ollama调用优先级: {priority}，可选: {', '.join(OLLAMA_PRIORITIES)}")
+        with self._lock:
+            stats = self._stats[priority]
+            stats["requests"] += 1
+            if self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                stats["rejected"] += 1
+                raise RuntimeError(f"Ollama请求队列已满（{self.max_queue}），请稍后再试")
+            stats["queued"] += 1
+            waiter = _Waiter(wake)
+            heapq.heappush(self._waiters, (OLLAMA_PRIORITIES[priority], next(self._sequence), waiter))
+            return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """等待超时或被取消，返回是否在此之前已经获得名额"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters = [item for item in self._waiters if item[2] is not waiter]
+            heapq.heapify(self._waiters)
+            return False
+
+    async def _acquire(self, priority: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(priority, wake)
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not self._abandon(waiter):
+                self._timeout(priority)
+        except asyncio.CancelledError:
+            # 已经分配到的名额要归还
+            if self._abandon(waiter):
+                self._release()
+            raise
+
+    def _acquire_sync(self, priority: str):
+        event = threading.Event()
+        waiter = self._enqueue(priority, event.set)
+        if waiter is None:
+            return
+        if not event.wait(self.queue_timeout) and not self._abandon(waiter):
+            self._timeout(priority)
+
+    def _timeout(self, priority: str):
+        with self._lock:
+            self._stats[priority]["timeouts"] += 1
+        logger.warning(f"等待Ollama空闲超时（{priority}，{self.queue_timeout}秒）")
+        raise TimeoutError(f"等待Ollama空闲超时（{self.queue_timeout}秒）")
+
+    def _release(self):
+        """归还名额：有等待的请求时直接转交给优先级最高的请求"""
+        with self._lock:
+            if not self._waiters:
+                self._in_flight -= 1
+                return
+            _, _, waiter = heapq.heappop(self._waiters)
+            waiter.granted = True
+        waiter.wake()
+
+
+# 进程内共享的Ollama访问入口
+ollama_gateway = OllamaGateway()
@@ -1,16 +1,21 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Optional
 from langchain_ollama import OllamaLLM, OllamaEmbeddings
 from langchain_core.prompts import PromptTemplate
 from src.config import settings
+from src.models.llm.ollama_gateway import ollama_gateway
+from src.models.llm.response_cache import get_llm_response_cache
 
 # 定义OllamaLLM的配置参数
 OLLAMA_CONFIG = {
     "base_url": settings.ollama_base_url,  # Ollama服务的基础URL
     "model": settings.ollama_model,        # 使用的模型名称
-    "num_ctx": 8192,                      # 上下文窗口大小
+    "num_ctx": settings.ollama_num_ctx,   # 上下文窗口大小
     "temperature": 0.3                    # 温度参数
 }
 
+# 影响生成结果的模型参数，作为LLM响应缓存key的一部分
+MODEL_OPTIONS = {key: value for key, value in OLLAMA_CONFIG.items() if key != "base_url"}
+
 # 定义嵌入模型的配置参数
 EMBEDDING_CONFIG = {
     "base_url": settings.ollama_base_url,
@@ -22,11 +27,11 @@ class OllamaLLMClient:
         self.use_ollama = settings.use_ollama
 
         if self.use_ollama:
-            # 初始化Ollama LLM
-            self.llm = OllamaLLM(**OLLAMA_CONFIG)
+            # 初始化Ollama LLM（进程内共享同一实例和HTTP连接池）
+            self.llm = ollama_gateway.get_llm(OLLAMA_CONFIG)
 
             # 初始化Ollama嵌入模型（如果需要使用Ollama进行嵌入）
-            self.embedding_model = OllamaEmbeddings(**EMBEDDING_CONFIG)
+            self.embedding_model = ollama_gateway.get_embedding_model(EMBEDDING_CONFIG)
 
             # 初始化RAG提示模板
             self.rag_prompt = PromptTemplate(
@@ -44,6 +49,9 @@ class OllamaLLMClient:
             # 初始化RAG链（使用RunnableSequence替代LLMChain）
             self.rag_chain = self.rag_prompt | self.llm
 
+            # 提示词完全相同的问答直接返回缓存的回答
+            self.response_cache = get_llm_response_cache()
+
     def get_embedding_model(self):
         """获取嵌入模型（如果使用Ollama）"""
         if self.use_ollama:
@@ -55,15 +63,52 @@ class OllamaLLMClient:
         if not self.use_ollama:
             return "Ollama LLM未启用，请在配置中启用。"
 
-        # 格式化上下文
-        formatted_context = "\n\n".join([f"文档 {i + 1}:\n{doc['content']}" for i, doc in enumerate(context)])
+        inputs = {"context": self._format_context(context), "question": question}
+        key = self._response_cache_key(inputs)
+        if key is not None:
+            cached = await self.response_cache.aget("rag_answer", key)
+            if cached is not None:
+                return cached
 
         # 生成回答
         try:
-            response = await self.rag_chain.ainvoke({
-                "context": formatted_context,
-                "question": question
-            })
-            return response
+            response = await ollama_gateway.ainvoke(self.rag_chain, inputs, priority="query")
         except Exception as e:
             return f"生成回答时出错: {str(e)}"
+        if key is not None and response:
+            await self.response_cache.aset(key, response)
+        return response
+
+    async def stream_answer(self, question: str, context: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        """根据检索到的上下文流式生成回答，按模型输出的顺序逐段返回文本"""
+        if not self.use_ollama:
+            yield "Ollama LLM未启用，请在配置中启用。"
+            return
+
+        inputs = {"context": self._format_context(context), "question": question}
+        key = self._response_cache_key(inputs)
+        if key is not None:
+            cached = await self.response_cache.aget("rag_answer", key)
+            if cached is not None:
+                yield cached
+                return
+
+        parts = []
+        async for token in ollama_gateway.astream(self.rag_chain, inputs, priority="query"):
+            if token:
+                parts.append(token)
+                yield token
+        # 只缓存完整生成的回答
+        if key is not None and parts:
+            await self.response_cache.aset(key, "".join(parts))
+
+    def _response_cache_key(self, inputs: Dict[str, Any]) -> Optional[str]:
+        """RAG链的缓存key，未启用缓存时返回None"""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.fingerprint(MODEL_OPTIONS, self.rag_prompt.format(**inputs))
+
+    @staticmethod
+    def _format_context(context: List[Dict[str, Any]]) -> str:
+        """格式化上下文"""
+        return "\n\n".join([f"文档 {i + 1}:\n{doc['content']}" for i, doc in enumerate(context)])
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+from src.config import settings
+from src.utils.cache import DiskCache, TTLCache
+from src.utils.hashing import compute_text_hash
+
+
+class LLMResponseCache:
+    """
+    LLM响应的精确匹配缓存
+
+    key为(模型及生成参数, 渲染后的完整提示词)的哈希，提示词完全相同的请求直接返回缓存的响应，不发送给模型。
+    内存LRU在前、磁盘缓存在后，磁盘缓存在进程重启后仍然有效；设置ttl（秒）时条目过期后视为未命中。
+    按链（调用方）分别统计命中率。在事件循环中使用aget/aset，磁盘读写放到线程中执行。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 1024,
+                 max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.ttl = ttl or None
+        # 条目自带写入时间，过期由本类判断，内存和磁盘中的条目按同一时间过期
+        self.memory = TTLCache(max_entries)
+        self.disk = DiskCache(cache_dir, max_bytes) if cache_dir else None
+        self._lock = threading.Lock()
+        self._chains = {}
+
+    @staticmethod
+    def fingerprint(options: Dict[str, Any], prompt: str) -> str:
+        """根据模型、生成参数和渲染后的提示词计算缓存key"""
+        return compute_text_hash(json.dumps({"options": options, "prompt": prompt},
+                                            ensure_ascii=False, sort_keys=True))
+
+    def get(self, chain: str, key: str) -> Optional[str]:
+        """读取缓存的响应，未命中或已过期时返回None"""
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = self._load(key)
+        if entry is not None and self._expired(entry):
+            self.invalidate(key)
+            entry = None
+        self._record(chain, entry is not None)
+        return entry["response"] if entry is not None else None
+
+    async def aget(self, chain: str, key: str) -> Optional[str]:
+        """get的协程版本，内存未命中时在线程中读取磁盘"""
+        entry = self.memory.get(key)
+        if entry is None and self.disk is not None:
+            entry = await asyncio.to_thread(self._load, key)
+        if entry is not None and self._expired(entry):
+            await asyncio.to_thread(self.invalidate, key)
+            entry = None
+        self._record(chain, entry is not None)
+        return entry["response"] if entry is not None else None
+
+    def set(self, key: str, response: str):
+        entry = {"response": response, "created_at": time.time()}
+        self.memory.set(key, entry)
+        if self.disk is not None:
+            self.disk.set(key, entry)
+
+    async def aset(self, key: str, response: str):
+        """set的协程版本，在线程中写入磁盘"""
+        await asyncio.to_thread(self.set, key, response)
+
+    def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """从磁盘读取条目并放入内存"""
+        entry = self.disk.get(key)
+        if entry is not None:
+            self.memory.set(key, entry)
+        return entry
+
+    def invalidate(self, key: str):
+        self.memory.invalidate(key)
+        if self.disk is not None:
+            self.disk.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chains = {
+                chain: {**counts, "hit_rate": counts["hits"] / (counts["hits"] + counts["misses"])}
+                for chain, counts in self._chains.items()
+            }
+        memory = self.memory.stats()
+        return {
+            "ttl": self.ttl,
+            "memory_entries": memory["size"],
+            "max_entries": memory["max_entries"],
+            "persistent": self.disk is not None,
+            "chains": chains
+        }
+
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl is not None and entry["created_at"] + self.ttl < time.time()
+
+    def _record(self, chain: str, hit: bool):
+        with self._lock:
+            counts = self._chains.setdefault(chain, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_llm_response_cache() -> Optional[LLMResponseCache]:
+    """获取进程内共享的LLM响应缓存，未启用时返回None"""
+    global _response_cache
+    if not settings.llm_response_cache_enabled:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache(
+                settings.llm_response_cache_path,
+                settings.llm_response_cache_max_entries,
+                settings.llm_response_cache_max_bytes,
+                settings.llm_response_cache_ttl
+            )
+    return _response_cache
@@ -0,0 +1,2 @@
+# 检索模块
+# 包含检索结果的上下文扩展等功能
\ No newline at end of file
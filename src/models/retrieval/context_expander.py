@@ -0,0 +1,56 @@
+from functools import reduce
+from typing import List, Dict, Any
+from src.models.graph.base_graph_store import BaseGraphStore
+from src.models.retrieval.context_packer import join_adjacent
+from src.utils import logger
+
+
+class ContextExpander:
+    """
+    检索结果上下文扩展
+
+    对重排后的最终结果，沿图数据库中的NEXT边一次性取回每个片段前后的相邻片段并按顺序拼接（去掉分块重叠的文字），
+    在不扩大hybrid_search候选集（以及重排开销）的情况下补全被截断的上下文。
+    """
+
+    def __init__(self, graph_store: BaseGraphStore):
+        self.graph_store = graph_store
+
+    async def expand(self, hits: List[Dict[str, Any]], window: int) -> List[Dict[str, Any]]:
+        """
+        Args:
+            hits: hybrid_search返回的检索结果
+            window: 前后各扩展的片段数，0表示不扩展
+
+        Returns:
+            List[Dict[str, Any]]: 扩展后的检索结果，content替换为拼接后的内容，
+            并附带expanded_chunk_ids和expanded_chunk_range（扩展后的chunk_index范围）
+        """
+        if window <= 0 or not hits:
+            return hits
+
+        chunk_ids = [hit["metadata"]["chunk_id"] for hit in hits if hit.get("metadata", {}).get("chunk_id")]
+        if not chunk_ids:
+            # 早期入库的片段元数据中没有chunk_id，无法关联到图中的节点
+            logger.warning("检索结果中没有chunk_id，跳过上下文扩展")
+            return hits
+
+        try:
+            neighbors = await self.graph_store.get_neighbor_chunks(chunk_ids, window)
+        except Exception as e:
+            logger.error(f"获取相邻片段失败: {str(e)}")
+            return hits
+
+        expanded = []
+        for hit in hits:
+            chunks = neighbors.get(hit.get("metadata", {}).get("chunk_id"))
+            if not chunks:
+                expanded.append(hit)
+                continue
+            expanded.append({
+                **hit,
+                "content": reduce(join_adjacent, (chunk["content"] for chunk in chunks)),
+                "expanded_chunk_ids": [chunk["chunk_id"] for chunk in chunks],
+                "expanded_chunk_range": [chunks[0].get("chunk_index"), chunks[-1].get("chunk_index")]
+            })
+        return expanded
@@ -0,0 +1,179 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from src.config import settings
+from src.utils import logger
+from src.utils.tokens import TokenCounter
+
+# 判定为相邻片段重叠部分的最短字符数，避免偶然相同的标点被当作重叠删除
+MIN_OVERLAP = 5
+# 近似重复判定使用的字符n-gram长度
+SHINGLE_SIZE = 5
+
+
+def join_adjacent(first: str, second: str) -> str:
+    """拼接前后相邻的两段文本，去掉second开头与first结尾重复的部分（chunk_overlap产生的重复文字）"""
+    if second in first:
+        return first
+    overlap = _overlap(first, second)
+    if overlap >= MIN_OVERLAP:
+        return first + second[overlap:]
+    return first + "\n" + second
+
+
+def _overlap(first: str, second: str) -> int:
+    """first的后缀与second的前缀的最长重合长度（KMP前缀函数，线性时间）"""
+    n = min(len(first), len(second))
+    if n == 0:
+        return 0
+    text = second[:n] + "\0" + first[-n:]
+    prefix = [0] * len(text)
+    for i in range(1, len(text)):
+        k = prefix[i - 1]
+        while k and text[i] != text[k]:
+            k = prefix[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        prefix[i] = k
+    return prefix[-1]
+
+
+class ContextPacker:
+    """
+    问答上下文打包
+
+    位于检索（及上下文扩展）和提示词渲染之间：同一文档中相邻或重叠的片段合并为一段，去掉分块时
+    chunk_overlap产生的重复文字；内容几乎被排名更靠前的结果包含的片段直接丢弃；其余结果按得分顺序
+    放入token预算，超出预算的结果不再发送给LLM。
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, dedup_threshold: Optional[float] = None,
+                 token_counter: Optional[TokenCounter] = None):
+        self.token_budget = token_budget or settings.context_token_budget
+        self.dedup_threshold = dedup_threshold if dedup_threshold is not None else settings.context_dedup_threshold
+        self.token_counter = token_counter or TokenCounter(settings.summarize_tokenizer)
+
+    def pack(self, hits: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Args:
+            hits: 检索结果，按得分从高到低排列
+
+        Returns:
+            Tuple[List[Dict[str, Any]], Dict[str, Any]]: 打包后的上下文（按得分顺序），以及打包统计
+            （原始和打包后的token数、节省的token数、合并/去重/超出预算丢弃的结果数）
+        """
+        original_tokens = sum(self.token_counter.count(hit["content"]) for hit in hits)
+        merged = self._merge_adjacent(hits)
+        unique = self._drop_near_duplicates(merged)
+        packed = self._fill_budget(unique)
+
+        packed_tokens = sum(self.token_counter.count(item["content"]) for item in packed)
+        stats = {
+            "original_tokens": original_tokens,
+            "packed_tokens": packed_tokens,
+            "saved_tokens": original_tokens - packed_tokens,
+            "merged": len(hits) - len(merged),
+            "deduplicated": len(merged) - len(unique),
+            "dropped": len(unique) - len(packed)
+        }
+        if hits:
+            logger.info(f"上下文打包: {len(hits)}个结果 -> {len(packed)}段，token数 {original_tokens} -> {packed_tokens}"
+                        f"（合并{stats['merged']}，去重{stats['deduplicated']}，超出预算{stats['dropped']}）")
+        return packed, stats
+
+    def _merge_adjacent(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """合并同一文档中chunk_index相邻或重叠的结果，合并后的结果取其中最靠前的排名和元数据"""
+        groups = {}
+        standalone = []
+        for rank, hit in enumerate(hits):
+            span = self._span(hit)
+            metadata = hit.get("metadata", {})
+            doc = metadata.get("doc_id") or metadata.get("source")
+            if span is None or doc is None:
+                standalone.append((rank, hit))
+                continue
+            groups.setdefault(doc, []).append((span, rank, hit))
+
+        merged = list(standalone)
+        for items in groups.values():
+            items.sort(key=lambda item: item[0])
+            current = self._new_group(*items[0])
+            for (start, end), rank, hit in items[1:]:
+                if start <= current["end"] + 1:
+                    if end > current["end"]:
+                        current["content"] = join_adjacent(current["content"], hit["content"])
+                        current["end"] = end
+                    current["chunk_ids"] += [c for c in self._chunk_ids(hit) if c not in current["chunk_ids"]]
+                    current["count"] += 1
+                    if rank < current["rank"]:
+                        current["rank"], current["hit"] = rank, hit
+                    continue
+                merged.append(self._merged_item(current))
+                current = self._new_group((start, end), rank, hit)
+            merged.append(self._merged_item(current))
+
+        merged.sort(key=lambda item: item[0])
+        return [hit for _, hit in merged]
+
+    def _new_group(self, span: Tuple[int, int], rank: int, hit: Dict[str, Any]) -> Dict[str, Any]:
+        return {"rank": rank, "hit": hit, "end": span[1], "content": hit["content"],
+                "chunk_ids": self._chunk_ids(hit), "count": 1}
+
+    @staticmethod
+    def _merged_item(group: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if group["count"] == 1:
+            return group["rank"], group["hit"]
+        return group["rank"], {
+            **group["hit"],
+            "content": group["content"],
+            "merged_chunk_ids": group["chunk_ids"]
+        }
+
+    @staticmethod
+    def _span(hit: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+        """结果覆盖的chunk_index范围，经过上下文扩展的结果为扩展后的范围"""
+        span = hit.get("expanded_chunk_range")
+        if span and all(isinstance(index, int) for index in span):
+            return span[0], span[1]
+        index = hit.get("metadata", {}).get("chunk_index")
+        return (index, index) if isinstance(index, int) else None
+
+    @staticmethod
+    def _chunk_ids(hit: Dict[str, Any]) -> List[str]:
+        if hit.get("expanded_chunk_ids"):
+            return list(hit["expanded_chunk_ids"])
+        chunk_id = hit.get("metadata", {}).get("chunk_id")
+        return [chunk_id] if chunk_id else []
+
+    def _drop_near_duplicates(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """丢弃字符n-gram大部分已出现在排名更靠前的结果中的结果"""
+        kept = []
+        kept_shingles = []
+        for hit in hits:
+            shingles = self._shingles(hit["content"])
+            if any(len(shingles & other) >= self.dedup_threshold * len(shingles) for other in kept_shingles):
+                continue
+            kept.append(hit)
+            kept_shingles.append(shingles)
+        return kept
+
+    @staticmethod
+    def _shingles(text: str) -> set:
+        text = re.sub(r"\s+", "", text)
+        if len(text) <= SHINGLE_SIZE:
+            return {text}
+        return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+    def _fill_budget(self, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按得分顺序放入token预算，放不下的结果跳过；得分最高的结果单独超出预算时截断"""
+        packed = []
+        used = 0
+        for hit in hits:
+            tokens = self.token_counter.count(hit["content"])
+            if used + tokens <= self.token_budget:
+                packed.append(hit)
+                used += tokens
+            elif not packed:
+                content = self.token_counter.split(hit["content"], self.token_budget)[0]
+                packed.append({**hit, "content": content})
+                used += self.token_counter.count(content)
+        return packed
@@ -0,0 +1,2 @@
+# 快照模块
+# 包含语料快照的导出、导入等功能
\ No newline at end of file
@@ -0,0 +1,233 @@
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Iterator
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.config import settings
+from src.models.vectorization.vectorizer import Vectorizer
+from src.models.graph.graph_store import GraphStore
+from src.models.storage.base_store import BaseDocumentStore
+from src.utils import logger
+
+SNAPSHOT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+VECTORS_FILE = "vectors.parquet"
+DOCUMENTS_FILE = "documents.parquet"
+CHUNKS_FILE = "chunks.parquet"
+RELATIONSHIPS_FILE = "relationships.parquet"
+SUMMARIES_FILE = "summaries.parquet"
+
+NODE_SCHEMA = pa.schema([
+    ("key", pa.string()),
+    ("properties", pa.string())
+])
+
+RELATIONSHIP_SCHEMA = pa.schema([
+    ("source_label", pa.string()),
+    ("source_key", pa.string()),
+    ("type", pa.string()),
+    ("target_label", pa.string()),
+    ("target_key", pa.string()),
+    ("properties", pa.string())
+])
+
+SUMMARY_SCHEMA = pa.schema([
+    ("doc_id", pa.string()),
+    ("filename", pa.string()),
+    ("summary", pa.string()),
+    ("created_at", pa.timestamp("us")),
+    ("updated_at", pa.timestamp("us"))
+])
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _to_json(value: Dict[str, Any]) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class CorpusSnapshot:
+    """
+    语料快照
+
+    将向量（含嵌入）、图节点/关系和文档摘要导出为Parquet文件；导入时直接写入已有向量，
+    不需要重新解析文档、计算嵌入或生成摘要。
+    """
+
+    def __init__(self, vectorizer: Vectorizer, graph_store: GraphStore, store: BaseDocumentStore,
+                 batch_size: int = 5000):
+        self.vectorizer = vectorizer
+        self.graph_store = graph_store
+        self.store = store
+        self.batch_size = batch_size
+
+    def _embedding_model_name(self) -> str:
+        return settings.ollama_embedding_model if settings.use_ollama else settings.embedding_model
+
+    def export(self, output_dir: str) -> Dict[str, int]:
+        """导出快照到目录，返回各部分的记录数"""
+        os.makedirs(output_dir, exist_ok=True)
+        counts = {}
+
+        start = time.perf_counter()
+        counts["vectors"], dim = self._export_vectors(os.path.join(output_dir, VECTORS_FILE))
+        logger.info(f"已导出{counts['vectors']}个向量，耗时{time.perf_counter() - start:.2f}秒")
+
+        start = time.perf_counter()
+        counts["documents"] = self._export_nodes("Document", os.path.join(output_dir, DOCUMENTS_FILE))
+        counts["chunks"] = self._export_nodes("Chunk", os.path.join(output_dir, CHUNKS_FILE))
+        counts["relationships"] = self._write_batches(
+            os.path.join(output_dir, RELATIONSHIPS_FILE),
+            RELATIONSHIP_SCHEMA,
+            (
+                [{**row, "properties": _to_json(row["properties"])} for row in batch]
+                for batch in _batched(self.graph_store.iter_relationships(), self.batch_size)
+            )
+        )
+        logger.info(f"已导出图数据: {counts['documents']}个文档节点, {counts['chunks']}个片段节点, "
+                    f"{counts['relationships']}条关系，耗时{time.perf_counter() - start:.2f}秒")
+
+        start = time.perf_counter()
+        counts["summaries"] = self._write_batches(
+            os.path.join(output_dir, SUMMARIES_FILE),
+            SUMMARY_SCHEMA,
+            self.store.iter_summary_rows(self.batch_size)
+        )
+        logger.info(f"已导出{counts['summaries']}条文档摘要，耗时{time.perf_counter() - start:.2f}秒")
+
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "vector_store_type": settings.vector_store_type,
+            "embedding_model": self._embedding_model_name(),
+            "embedding_dim": dim,
+            "counts": counts
+        }
+        with open(os.path.join(output_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return counts
+
+    def restore(self, input_dir: str) -> Dict[str, int]:
+        """从快照目录导入到当前配置的向量库、图数据库和摘要存储"""
+        with open(os.path.join(input_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的快照版本: {manifest.get('version')}")
+        if manifest.get("embedding_model") != self._embedding_model_name():
+            raise ValueError(
+                f"快照的嵌入模型({manifest.get('embedding_model')})与当前配置({self._embedding_model_name()})不一致，"
+                f"导入的向量无法用于检索"
+            )
+
+        counts = defaultdict(int)
+
+        start = time.perf_counter()
+        for label, filename, name in (("Document", DOCUMENTS_FILE, "documents"), ("Chunk", CHUNKS_FILE, "chunks")):
+            for batch in self._iter_batches(os.path.join(input_dir, filename)):
+                rows = [json.loads(p) for p in batch.column("properties").to_pylist()]
+                self.graph_store.import_nodes(label, rows)
+                counts[name] += len(rows)
+
+        for batch in self._iter_batches(os.path.join(input_dir, RELATIONSHIPS_FILE)):
+            groups = defaultdict(list)
+            for row in batch.to_pylist():
+                groups[(row["source_label"], row["type"], row["target_label"])].append({
+                    "source_key": row["source_key"],
+                    "target_key": row["target_key"],
+                    "properties": json.loads(row["properties"])
+                })
+            for (source_label, rel_type, target_label), rows in groups.items():
+                self.graph_store.import_relationships(source_label, rel_type, target_label, rows)
+                counts["relationships"] += len(rows)
+        logger.info(f"已导入图数据: {counts['documents']}个文档节点, {counts['chunks']}个片段节点, "
+                    f"{counts['relationships']}条关系，耗时{time.perf_counter() - start:.2f}秒")
+
+        start = time.perf_counter()
+        dim = manifest.get("embedding_dim")
+        for batch in self._iter_batches(os.path.join(input_dir, VECTORS_FILE)):
+            # 从Arrow缓冲区直接得到float32数组，不经过Python列表
+            embeddings = batch.column("embedding").flatten().to_numpy(zero_copy_only=True).reshape(batch.num_rows, dim)
+            self.vectorizer.import_embeddings(
+                batch.column("id").to_pylist(),
+                batch.column("text").to_pylist(),
+                [json.loads(m) for m in batch.column("metadata").to_pylist()],
+                embeddings
+            )
+            counts["vectors"] += batch.num_rows
+        self.vectorizer.save_imported_embeddings()
+        logger.info(f"已导入{counts['vectors']}个向量，耗时{time.perf_counter() - start:.2f}秒")
+
+        start = time.perf_counter()
+        for batch in self._iter_batches(os.path.join(input_dir, SUMMARIES_FILE)):
+            rows = batch.to_pylist()
+            self.store.restore_summary_rows(rows)
+            counts["summaries"] += len(rows)
+        logger.info(f"已导入{counts['summaries']}条文档摘要，耗时{time.perf_counter() - start:.2f}秒")
+
+        return dict(counts)
+
+    def _export_vectors(self, path: str):
+        writer = None
+        count = 0
+        dim = None
+        try:
+            for ids, texts, metadatas, embeddings in self.vectorizer.export_embeddings(self.batch_size):
+                if writer is None:
+                    dim = int(embeddings.shape[1])
+                    schema = pa.schema([
+                        ("id", pa.string()),
+                        ("text", pa.string()),
+                        ("metadata", pa.string()),
+                        ("embedding", pa.list_(pa.float32(), dim))
+                    ])
+                    writer = pq.ParquetWriter(path, schema)
+                table = pa.Table.from_arrays([
+                    pa.array(ids, pa.string()),
+                    pa.array(texts, pa.string()),
+                    pa.array([_to_json(m) for m in metadatas], pa.string()),
+                    pa.FixedSizeListArray.from_arrays(pa.array(embeddings.reshape(-1)), dim)
+                ], schema=schema)
+                writer.write_table(table)
+                count += len(ids)
+        finally:
+            if writer is not None:
+                writer.close()
+        return count, dim
+
+    def _export_nodes(self, label: str, path: str) -> int:
+        key = self.graph_store.NODE_KEYS[label]
+        return self._write_batches(
+            path,
+            NODE_SCHEMA,
+            (
+                [{"key": props[key], "properties": _to_json(props)} for props in batch]
+                for batch in _batched(self.graph_store.iter_nodes(label), self.batch_size)
+            )
+        )
+
+    def _write_batches(self, path: str, schema: pa.Schema, batches: Iterable[List[Dict[str, Any]]]) -> int:
+        count = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            for rows in batches:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                count += len(rows)
+        return count
+
+    def _iter_batches(self, path: str) -> Iterator[pa.RecordBatch]:
+        if not os.path.exists(path):
+            return
+        yield from pq.ParquetFile(path).iter_batches(batch_size=self.batch_size)
@@ -1,12 +1,59 @@
+import base64
+import json
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List, Type
-from peewee import Database, Model, CharField, TextField, DateTimeField
+from typing import Optional, Dict, Any, List, Type, Iterator, Set
+from peewee import Database, Model, CharField, TextField, DateTimeField, fn
+from playhouse.migrate import SchemaMigrator, make_index_name, migrate
 from datetime import datetime
+from src.config import settings
 from src.utils import logger
 
+# 列表接口可以投影的摘要字段
+SUMMARY_FIELDS = ('doc_id', 'filename', 'summary', 'preview', 'created_at', 'updated_at')
+# 未指定fields时返回的字段，与原有接口一致
+DEFAULT_SUMMARY_FIELDS = ('doc_id', 'filename', 'summary', 'created_at', 'updated_at')
+
+# 压缩后的摘要以该前缀开头，未压缩的数据原样读取，开关压缩不需要迁移已有数据
+ZSTD_PREFIX = "zstd:"
+
+
+def compress_summary(text: Optional[str]) -> Optional[str]:
+    """启用压缩且摘要足够长时，以zstd压缩并base64编码（兼容TEXT列）"""
+    if text is None or not settings.summary_compression or len(text) < settings.summary_compression_min_length:
+        return text
+    import zstandard
+    compressed = zstandard.ZstdCompressor(level=settings.summary_compression_level).compress(text.encode("utf-8"))
+    return ZSTD_PREFIX + base64.b64encode(compressed).decode("ascii")
+
+
+def decompress_summary(value: Optional[str]) -> Optional[str]:
+    """解压compress_summary的结果，未压缩的数据原样返回"""
+    if not isinstance(value, str) or not value.startswith(ZSTD_PREFIX):
+        return value
+    import zstandard
+    return zstandard.ZstdDecompressor().decompress(base64.b64decode(value[len(ZSTD_PREFIX):])).decode("utf-8")
+
+
+class CompressedTextField(TextField):
+    """写入时按配置透明压缩、读取时自动解压的文本字段"""
+
+    def db_value(self, value):
+        return super().db_value(compress_summary(value))
+
+    def python_value(self, value):
+        return decompress_summary(super().python_value(value))
+
+
 class BaseDocumentStore(ABC):
     def __init__(self, db: Database):
         self.db = db
+        if settings.summary_compression:
+            try:
+                import zstandard  # noqa: F401
+            except ImportError:
+                raise ImportError("启用摘要压缩需要安装zstandard: pip install zstandard")
         self.db.connect(reuse_if_open=True)
         
         # 创建模型类
@@ -15,8 +62,15 @@ class BaseDocumentStore(ABC):
         
         try:
             self.db.create_tables([self.DocumentSummary])
+            self._ensure_columns()
+            self._ensure_indexes()
         except Exception as e:
             raise
+        
+        # 摘要总数缓存，避免每次分页都执行COUNT(*)
+        self._count_lock = threading.Lock()
+        self._cached_count = None
+        self._cached_count_at = 0.0
     
     def _create_base_model(self) -> Type[Model]:
         """创建基础模型类"""
@@ -30,38 +84,244 @@ class BaseDocumentStore(ABC):
         class DocumentSummary(self.BaseModel):
             doc_id = CharField(primary_key=True)
             filename = CharField()
-            summary = TextField()
+            summary = CompressedTextField()
+            # 写入时截取的摘要预览，列表页不需要读取摘要全文
+            preview = TextField(null=True)
             created_at = DateTimeField(default=datetime.now)
             updated_at = DateTimeField(default=datetime.now)
             
             class Meta:
                 table_name = 'document_summaries'
+                # 列表按created_at倒序分页，doc_id作为相同时间的排序依据
+                indexes = (
+                    (('created_at', 'doc_id'), False),
+                )
         return DocumentSummary
     
+    def _ensure_columns(self):
+        """为旧版本创建的表补充新增的列，并回填预览"""
+        table_name = self.DocumentSummary._meta.table_name
+        columns = {column.name for column in self.db.get_columns(table_name)}
+        if 'preview' not in columns:
+            logger.info(f"为{table_name}添加列: preview")
+            migrate(SchemaMigrator.from_database(self.db).add_column(table_name, 'preview', self.DocumentSummary.preview))
+            self.DocumentSummary.update(
+                preview=fn.SUBSTR(self.DocumentSummary.summary, 1, settings.summary_preview_length)
+            ).execute()
+    
+    def _ensure_indexes(self):
+        """为已存在的表补建缺失的索引（MySQL在表已存在时create_tables不会创建新索引）"""
+        table_name = self.DocumentSummary._meta.table_name
+        existing = {index.name for index in self.db.get_indexes(table_name)}
+        migrator = SchemaMigrator.from_database(self.db)
+        for columns, unique in self.DocumentSummary._meta.indexes:
+            # 与create_tables使用相同的索引命名规则
+            name = make_index_name(table_name, columns)
+            if name not in existing:
+                logger.info(f"为{table_name}创建索引: {name}")
+                migrate(migrator.add_index(table_name, columns, unique))
+    
     def close(self):
         if not self.db.is_closed():
             self.db.close()
     
     @property
     def connection_context(self):
+        """每次数据库操作使用的连接上下文，默认在操作结束后关闭连接"""
         return self.db.connection_context()
 
+    def _summary_insert_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """批量写入的行数据，补充预览和时间"""
+        now = datetime.now()
+        return [{
+            'doc_id': row['doc_id'],
+            'filename': row['filename'],
+            'summary': row['summary'],
+            'preview': self._summary_preview(row['summary']),
+            'created_at': now,
+            'updated_at': now
+        } for row in rows]
+    
+    @staticmethod
+    def _summary_preview(summary: str) -> str:
+        """生成列表页使用的摘要预览"""
+        return summary[:settings.summary_preview_length]
+    
+    def _summary_projection(self, fields: Optional[List[str]] = None):
+        """
+        解析列表接口要返回的字段，返回(查询的列, 返回的字段)
+
+        游标分页依赖created_at和doc_id，这两列总是查询，但只在被请求时返回。字段不合法时抛出ValueError。
+        """
+        fields = list(fields) if fields else list(DEFAULT_SUMMARY_FIELDS)
+        invalid = [field for field in fields if field not in SUMMARY_FIELDS]
+        if invalid:
+            raise ValueError(f"不支持的字段: {', '.join(invalid)}，可选字段: {', '.join(SUMMARY_FIELDS)}")
+        selected = set(fields) | {'doc_id', 'created_at'}
+        columns = [getattr(self.DocumentSummary, name) for name in SUMMARY_FIELDS if name in selected]
+        return columns, fields
+    
+    def get_cached_summaries_count(self) -> int:
+        """
+        获取摘要总数的近似值
+
+        COUNT(*)的结果在进程内缓存summary_count_cache_ttl秒，新保存的摘要最迟在缓存过期后计入。
+        """
+        with self._count_lock:
+            now = time.monotonic()
+            if self._cached_count is None or now - self._cached_count_at > settings.summary_count_cache_ttl:
+                self._cached_count = self.get_summaries_count()
+                self._cached_count_at = now
+            return self._cached_count
+    
+    def invalidate_summaries_count(self):
+        """使摘要总数缓存失效"""
+        with self._count_lock:
+            self._cached_count = None
+    
+    @staticmethod
+    def encode_summary_cursor(created_at: datetime, doc_id: str) -> str:
+        """将一行摘要的排序键编码为分页游标"""
+        raw = json.dumps([created_at.isoformat(), doc_id])
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+    
+    @staticmethod
+    def decode_summary_cursor(cursor: str):
+        """解析分页游标，返回(created_at, doc_id)，游标无效时抛出ValueError"""
+        try:
+            created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return datetime.fromisoformat(created_at), doc_id
+        except Exception:
+            raise ValueError(f"无效的分页游标: {cursor}")
+    
+    def _next_summary_cursor(self, rows: List[Dict[str, Any]], page_size: int) -> Optional[str]:
+        if len(rows) < page_size:
+            return None
+        return self.encode_summary_cursor(rows[-1]['created_at'], rows[-1]['doc_id'])
+    
+    def get_summaries_by_cursor(self, cursor: Optional[str] = None, page_size: int = 10,
+                                fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        按游标（keyset）分页获取文档摘要
+
+        按(created_at, doc_id)倒序排列，下一页从上一页最后一行之后继续，走created_at索引，不需要OFFSET，
+        翻页深度不影响查询耗时。cursor为空时返回第一页，返回的next_cursor为None时表示没有下一页。
+        fields指定返回的字段，例如列表页只取doc_id、filename、preview，不读取摘要全文。
+        """
+        model = self.DocumentSummary
+        columns, fields = self._summary_projection(fields)
+        query = model.select(*columns).order_by(model.created_at.desc(), model.doc_id.desc())
+        if cursor:
+            created_at, doc_id = self.decode_summary_cursor(cursor)
+            query = query.where(
+                (model.created_at < created_at) |
+                ((model.created_at == created_at) & (model.doc_id < doc_id))
+            )
+        
+        with self.connection_context:
+            rows = list(query.limit(page_size).dicts())
+        
+        return {
+            'total': self.get_cached_summaries_count(),
+            'page_size': page_size,
+            'summaries': [{field: row[field] for field in fields} for row in rows],
+            'next_cursor': self._next_summary_cursor(rows, page_size)
+        }
+
+    def iter_summary_rows(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """按doc_id顺序分批读取全部摘要行，用于快照导出"""
+        with self.connection_context:
+            batch = []
+            query = self.DocumentSummary.select().order_by(self.DocumentSummary.doc_id).dicts()
+            for row in query.iterator():
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+    
+    def restore_summary_rows(self, rows: List[Dict[str, Any]]):
+        """在一个事务中批量写入摘要行（保留原有时间戳），用于快照导入"""
+        if not rows:
+            return
+        with self.connection_context:
+            with self.db.atomic():
+                rows = [
+                    {**row, 'preview': row.get('preview') or self._summary_preview(row['summary'])}
+                    for row in rows
+                ]
+                self.DocumentSummary.insert_many(rows).on_conflict_replace().execute()
+        self.invalidate_summaries_count()
+
     @abstractmethod
     def save_document_summary(self, doc_id: str, filename: str, summary: str) -> bool:
         pass
     
+    @abstractmethod
+    def save_document_summaries(self, rows: List[Dict[str, Any]], batch_size: int = 500) -> bool:
+        """在一个事务中批量写入摘要（多行upsert），rows中每项包含doc_id、filename、summary"""
+        pass
+    
     @abstractmethod
     def get_document_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
         pass
     
+    def get_document_summaries(self, doc_ids: List[str], batch_size: int = 500) -> Dict[str, Dict[str, Any]]:
+        """用IN查询批量获取摘要，返回doc_id到摘要的映射，不存在的doc_id不出现在结果中"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        result = {}
+        with self.connection_context:
+            try:
+                for i in range(0, len(doc_ids), batch_size):
+                    query = (self.DocumentSummary
+                             .select(self.DocumentSummary.doc_id, self.DocumentSummary.filename,
+                                     self.DocumentSummary.summary, self.DocumentSummary.created_at,
+                                     self.DocumentSummary.updated_at)
+                             .where(self.DocumentSummary.doc_id.in_(doc_ids[i:i + batch_size]))
+                             .dicts())
+                    for row in query:
+                        result[row['doc_id']] = row
+            except Exception as e:
+                logger.error(f"批量获取文档摘要失败: {str(e)}")
+        return result
+    
+    def get_summarized_doc_ids(self, doc_ids: List[str], batch_size: int = 500) -> Set[str]:
+        """返回doc_ids中已有摘要的doc_id，查询失败时抛出异常（不能当作没有摘要处理）"""
+        doc_ids = list(dict.fromkeys(doc_ids))
+        result = set()
+        with self.connection_context:
+            for i in range(0, len(doc_ids), batch_size):
+                query = (self.DocumentSummary
+                         .select(self.DocumentSummary.doc_id)
+                         .where(self.DocumentSummary.doc_id.in_(doc_ids[i:i + batch_size]))
+                         .tuples())
+                result.update(doc_id for doc_id, in query)
+        return result
+    
     @abstractmethod
     def get_all_document_summaries(self) -> List[Dict[str, Any]]:
         pass
     
     @abstractmethod
-    def get_paginated_summaries(self, page: int, page_size: int) -> Dict[str, Any]:
+    def get_paginated_summaries(self, page: int, page_size: int, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         pass
     
     @abstractmethod
     def get_summaries_count(self) -> int:
-        pass
\ No newline at end of file
+        pass
+    
+    @abstractmethod
+    def search_summaries(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """全文检索文档摘要和文件名，按相关度从高到低返回doc_id、filename、score、snippet"""
+        pass
+    
+    @staticmethod
+    def _summary_snippet(text: str, terms: List[str], width: int = 80) -> str:
+        """截取摘要中第一个命中词附近的片段"""
+        positions = [text.find(term) for term in terms if term and text.find(term) >= 0]
+        if not positions:
+            return text[:width * 2]
+        start = max(0, min(positions) - width)
+        snippet = text[start:start + width * 2]
+        return ("..." if start > 0 else "") + snippet + ("..." if start + width * 2 < len(text) else "")
\ No newline at end of file
@@ -1,62 +1,66 @@
-from peewee import MySQLDatabase, Model, CharField, TextField, DateTimeField
+from peewee import MySQLDatabase
+from playhouse.pool import PooledMySQLDatabase
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from src.config import settings
 from src.utils import logger
-from .base_store import BaseDocumentStore
+from .base_store import BaseDocumentStore, decompress_summary
+
+# 摘要全文索引名称，InnoDB的FULLTEXT索引随写入自动维护
+FULLTEXT_INDEX = 'document_summaries_fulltext'
 
 class MySQLStore(BaseDocumentStore):
     def __init__(self):
-        # 创建数据库连接
-        db = MySQLDatabase(
-            settings.mysql_db_name,
+        if settings.summary_compression:
+            # FULLTEXT索引直接索引存储的列值，压缩后的摘要无法被全文检索匹配
+            raise ValueError("MySQL存储不支持摘要压缩（SUMMARY_COMPRESSION），启用后摘要全文检索无法匹配新写入的摘要")
+        connect_kwargs = dict(
             user=settings.mysql_user,
             password=settings.mysql_password,
             host=settings.mysql_host,
             port=settings.mysql_port
         )
-        # 调用父类初始化
-        super().__init__(db)
-        
-        # 定义模型类
-        class BaseModel(Model):
-            class Meta:
-                database = self.db
-        
-        # 定义文档摘要模型
-        class DocumentSummary(BaseModel):
-            doc_id = CharField(primary_key=True)
-            filename = CharField()
-            summary = TextField()
-            created_at = DateTimeField(default=datetime.now)
-            updated_at = DateTimeField(default=datetime.now)
-            
-            class Meta:
-                table_name = 'document_summaries'
-        
-        # 保存模型类的引用
-        self.DocumentSummary = DocumentSummary
+        # 创建数据库连接，使用连接池时connection_context结束后连接归还到池中而不是断开，
+        # 空闲超过stale_timeout的连接在取出时丢弃重建，避免使用已被服务端断开的连接
+        if settings.mysql_pool_enabled:
+            db = PooledMySQLDatabase(
+                settings.mysql_db_name,
+                max_connections=settings.mysql_max_connections,
+                stale_timeout=settings.mysql_stale_timeout,
+                timeout=settings.mysql_pool_timeout,
+                **connect_kwargs
+            )
+        else:
+            db = MySQLDatabase(settings.mysql_db_name, **connect_kwargs)
         
         try:
-            # 创建表
-            self.db.create_tables([DocumentSummary])
+            # 调用父类初始化，会自动创建模型类和表
+            super().__init__(db)
+            self._ensure_fulltext_index()
             logger.info(f"成功初始化MySQL数据库: {settings.mysql_db_name}")
         except Exception as e:
             logger.error(f"初始化MySQL数据库失败: {str(e)}")
             raise
+        finally:
+            # 初始化占用的连接归还到连接池
+            if not self.db.is_closed():
+                self.db.close()
     
     # 使用装饰器的简化方式
     def save_document_summary(self, doc_id: str, filename: str, summary: str) -> bool:
-        with self.db.connection_context():
+        with self.connection_context:
             try:
+                preview = self._summary_preview(summary)
                 self.DocumentSummary.insert(
                     doc_id=doc_id,
                     filename=filename,
-                    summary=summary
+                    summary=summary,
+                    preview=preview
                 ).on_conflict(
-                    conflict_target=[self.DocumentSummary.doc_id],
+                    # MySQL的ON DUPLICATE KEY UPDATE不支持指定冲突列
                     update={
                         self.DocumentSummary.summary: summary,
+                        self.DocumentSummary.preview: preview,
                         self.DocumentSummary.updated_at: datetime.now()
                     }
                 ).execute()
@@ -65,8 +69,28 @@ class MySQLStore(BaseDocumentStore):
                 logger.error(f"保存文档摘要失败: {str(e)}")
                 return False
 
+    def save_document_summaries(self, rows: List[Dict[str, Any]], batch_size: int = 500) -> bool:
+        """在一个事务中按批执行多行upsert，已存在的文档更新摘要和预览"""
+        if not rows:
+            return True
+        rows = self._summary_insert_rows(rows)
+        with self.connection_context:
+            try:
+                with self.db.atomic():
+                    for i in range(0, len(rows), batch_size):
+                        self.DocumentSummary.insert_many(rows[i:i + batch_size]).on_conflict(
+                            # MySQL的ON DUPLICATE KEY UPDATE不支持指定冲突列
+                            preserve=[self.DocumentSummary.summary, self.DocumentSummary.preview],
+                            update={self.DocumentSummary.updated_at: datetime.now()}
+                        ).execute()
+                self.invalidate_summaries_count()
+                return True
+            except Exception as e:
+                logger.error(f"批量保存文档摘要失败: {str(e)}")
+                return False
+
     def get_document_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 summary = self.DocumentSummary.get_or_none(self.DocumentSummary.doc_id == doc_id)
                 if summary:
@@ -85,7 +109,7 @@ class MySQLStore(BaseDocumentStore):
 
     def get_all_document_summaries(self) -> List[Dict[str, Any]]:
         """获取所有文档摘要(不推荐使用，建议使用分页查询)"""
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 return [{
                     'doc_id': s.doc_id,
@@ -98,41 +122,81 @@ class MySQLStore(BaseDocumentStore):
                 logger.error(f"获取所有文档摘要失败: {str(e)}")
                 return []
 
-    def get_paginated_summaries(self, page: int = 1, page_size: int = 10) -> Dict[str, Any]:
-        """分页获取文档摘要"""
-        with self.db.connection_context():
+    def get_paginated_summaries(self, page: int = 1, page_size: int = 10,
+                                fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """分页获取文档摘要，fields指定返回的字段（默认返回摘要全文）"""
+        columns, fields = self._summary_projection(fields)
+        # 总数使用缓存的近似值，避免每次分页都执行COUNT(*)
+        total = self.get_cached_summaries_count()
+        with self.connection_context:
             try:
-                query = self.DocumentSummary.select().order_by(self.DocumentSummary.created_at.desc())  # 使用self.DocumentSummary
-                total = query.count()
+                query = self.DocumentSummary.select(*columns).order_by(
+                    self.DocumentSummary.created_at.desc(),
+                    self.DocumentSummary.doc_id.desc()
+                )
                 
-                summaries = query.paginate(page, page_size)
+                rows = list(query.paginate(page, page_size).dicts())
                 
                 return {
                     'total': total,
                     'page': page,
                     'page_size': page_size,
-                    'summaries': [{
-                        'doc_id': s.doc_id,
-                        'filename': s.filename,
-                        'summary': s.summary,
-                        'created_at': s.created_at,
-                        'updated_at': s.updated_at
-                    } for s in summaries]
+                    'summaries': [{field: row[field] for field in fields} for row in rows],
+                    # 可以用该游标切换到keyset分页继续翻页
+                    'next_cursor': self._next_summary_cursor(rows, page_size)
                 }
             except Exception as e:
                 logger.error(f"分页获取文档摘要失败: {str(e)}")
                 return {
-                    'total': 0,
+                    'total': total,
                     'page': page,
                     'page_size': page_size,
-                    'summaries': []
+                    'summaries': [],
+                    'next_cursor': None
                 }
 
     def get_summaries_count(self) -> int:
         """获取文档摘要总数"""
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 return self.DocumentSummary.select().count()  # 使用self.DocumentSummary
             except Exception as e:
                 logger.error(f"获取文档摘要总数失败: {str(e)}")
-                return 0
\ No newline at end of file
+                return 0
+
+    def _ensure_fulltext_index(self):
+        """创建摘要和文件名的全文索引（已存在时跳过）"""
+        table_name = self.DocumentSummary._meta.table_name
+        if FULLTEXT_INDEX in {index.name for index in self.db.get_indexes(table_name)}:
+            return
+        # 中文没有空格分词，需要使用ngram解析器（MariaDB不支持，可配置为空）
+        parser = f" WITH PARSER {settings.mysql_fulltext_parser}" if settings.mysql_fulltext_parser else ""
+        logger.info(f"为{table_name}创建全文索引: {FULLTEXT_INDEX}")
+        self.db.execute_sql(
+            f"ALTER TABLE {table_name} ADD FULLTEXT INDEX {FULLTEXT_INDEX} (filename, summary){parser}"
+        )
+
+    def search_summaries(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """全文检索文档摘要和文件名，按MATCH ... AGAINST的相关度排序"""
+        terms = query.split()
+        if not terms:
+            return []
+        with self.connection_context:
+            try:
+                cursor = self.db.execute_sql(
+                    """SELECT doc_id, filename, summary,
+                              MATCH(filename, summary) AGAINST (%s IN NATURAL LANGUAGE MODE) AS score
+                       FROM document_summaries
+                       WHERE MATCH(filename, summary) AGAINST (%s IN NATURAL LANGUAGE MODE)
+                       ORDER BY score DESC LIMIT %s""",
+                    (query, query, limit)
+                )
+                return [{
+                    'doc_id': doc_id,
+                    'filename': filename,
+                    'score': float(score),
+                    'snippet': self._summary_snippet(decompress_summary(summary), terms)
+                } for doc_id, filename, summary, score in cursor.fetchall()]
+            except Exception as e:
+                logger.error(f"全文检索文档摘要失败: {str(e)}")
+                return []
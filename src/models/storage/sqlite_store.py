@@ -1,10 +1,16 @@
-from peewee import SqliteDatabase
+from contextlib import contextmanager
+from peewee import SqliteDatabase, fn
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from src.config import settings
 from src.utils import logger
 import os
-from .base_store import BaseDocumentStore
+from .base_store import BaseDocumentStore, decompress_summary
+
+# 摘要全文索引（FTS5外部内容表），由触发器与document_summaries保持同步
+FTS_TABLE = 'document_summaries_fts'
+# trigram分词按3个字符切分，中文等不以空格分词的文本也能按子串检索
+FTS_MIN_TERM_LENGTH = 3
 
 class SQLiteStore(BaseDocumentStore):
     def __init__(self):
@@ -13,24 +19,56 @@ class SQLiteStore(BaseDocumentStore):
         if not os.path.exists(db_dir):
             os.makedirs(db_dir)
             
-        # 创建数据库连接
-        db = SqliteDatabase(settings.sqlite_db_path)
+        # 创建数据库连接，WAL模式下读写互不阻塞
+        db = SqliteDatabase(
+            settings.sqlite_db_path,
+            timeout=settings.sqlite_busy_timeout,
+            pragmas={
+                'journal_mode': settings.sqlite_journal_mode,
+                'synchronous': settings.sqlite_synchronous,
+                'cache_size': settings.sqlite_cache_size,
+                'mmap_size': settings.sqlite_mmap_size,
+                # REPLACE删除旧行时也触发删除触发器，保证全文索引同步
+                'recursive_triggers': 1
+            }
+        )
+        # 全文索引触发器通过该函数取得解压后的摘要
+        db.register_function(decompress_summary, 'summary_text', 1)
         # 调用父类初始化，会自动创建模型类
         super().__init__(db)
+        self._ensure_fulltext_index()
         
         logger.info(f"成功初始化SQLite数据库: {settings.sqlite_db_path}")
 
+    @property
+    def connection_context(self):
+        """
+        复用当前线程的连接
+
+        peewee的SQLite连接按线程保存，这里只在线程首次访问时建立连接，之后不再每次调用都打开/关闭连接，
+        连接上的页缓存和mmap也得以保留。
+        """
+        return self._reuse_connection()
+
+    @contextmanager
+    def _reuse_connection(self):
+        self.db.connect(reuse_if_open=True)
+        yield
+
     def save_document_summary(self, doc_id: str, filename: str, summary: str) -> bool:
-        with self.db.connection_context():
+        with self.connection_context:
             try:
+                preview = self._summary_preview(summary)
                 self.DocumentSummary.insert(
                     doc_id=doc_id,
                     filename=filename,
-                    summary=summary
+                    summary=summary,
+                    preview=preview
                 ).on_conflict(
                     conflict_target=[self.DocumentSummary.doc_id],
                     update={
                         self.DocumentSummary.summary: summary,
+                        self.DocumentSummary.preview: preview,
                         self.DocumentSummary.updated_at: datetime.now()
                     }
                 ).execute()
@@ -39,8 +77,28 @@ class SQLiteStore(BaseDocumentStore):
                 logger.error(f"保存文档摘要失败: {str(e)}")
                 return False
 
+    def save_document_summaries(self, rows: List[Dict[str, Any]], batch_size: int = 500) -> bool:
+        """在一个事务中按批执行多行upsert，已存在的文档更新摘要和预览"""
+        if not rows:
+            return True
+        rows = self._summary_insert_rows(rows)
+        with self.connection_context:
+            try:
+                with self.db.atomic():
+                    for i in range(0, len(rows), batch_size):
+                        self.DocumentSummary.insert_many(rows[i:i + batch_size]).on_conflict(
+                            conflict_target=[self.DocumentSummary.doc_id],
+                            preserve=[self.DocumentSummary.summary, self.DocumentSummary.preview],
+                            update={self.DocumentSummary.updated_at: datetime.now()}
+                        ).execute()
+                self.invalidate_summaries_count()
+                return True
+            except Exception as e:
+                logger.error(f"批量保存文档摘要失败: {str(e)}")
+                return False
+
     def get_document_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 summary = self.DocumentSummary.get_or_none(self.DocumentSummary.doc_id == doc_id)
                 if summary:
@@ -58,7 +116,7 @@ class SQLiteStore(BaseDocumentStore):
 
     def get_all_document_summaries(self) -> List[Dict[str, Any]]:
         """获取所有文档摘要(不推荐使用，建议使用分页查询)"""
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 return [{
                     'doc_id': s.doc_id,
@@ -71,41 +129,133 @@ class SQLiteStore(BaseDocumentStore):
                 logger.error(f"获取所有文档摘要失败: {str(e)}")
                 return []
 
-    def get_paginated_summaries(self, page: int = 1, page_size: int = 10) -> Dict[str, Any]:
-        """分页获取文档摘要"""
-        with self.db.connection_context():
+    def get_paginated_summaries(self, page: int = 1, page_size: int = 10,
+                                fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """分页获取文档摘要，fields指定返回的字段（默认返回摘要全文）"""
+        columns, fields = self._summary_projection(fields)
+        # 总数使用缓存的近似值，避免每次分页都执行COUNT(*)
+        total = self.get_cached_summaries_count()
+        with self.connection_context:
             try:
-                query = self.DocumentSummary.select().order_by(self.DocumentSummary.created_at.desc())
-                total = query.count()
+                query = self.DocumentSummary.select(*columns).order_by(
+                    self.DocumentSummary.created_at.desc(),
+                    self.DocumentSummary.doc_id.desc()
+                )
                 
-                summaries = query.paginate(page, page_size)
+                rows = list(query.paginate(page, page_size).dicts())
                 
                 return {
                     'total': total,
                     'page': page,
                     'page_size': page_size,
-                    'summaries': [{
-                        'doc_id': s.doc_id,
-                        'filename': s.filename,
-                        'summary': s.summary,
-                        'created_at': s.created_at,
-                        'updated_at': s.updated_at
-                    } for s in summaries]
+                    'summaries': [{field: row[field] for field in fields} for row in rows],
+                    # 可以用该游标切换到keyset分页继续翻页
+                    'next_cursor': self._next_summary_cursor(rows, page_size)
                 }
             except Exception as e:
                 logger.error(f"分页获取文档摘要失败: {str(e)}")
                 return {
-                    'total': 0,
+                    'total': total,
                     'page': page,
                     'page_size': page_size,
-                    'summaries': []
+                    'summaries': [],
+                    'next_cursor': None
                 }
 
     def get_summaries_count(self) -> int:
         """获取文档摘要总数"""
-        with self.db.connection_context():
+        with self.connection_context:
             try:
                 return self.DocumentSummary.select().count()
             except Exception as e:
                 logger.error(f"获取文档摘要总数失败: {str(e)}")
-                return 0
\ No newline at end of file
+                return 0
+
+    def _ensure_fulltext_index(self):
+        """
+        创建摘要全文索引和同步触发器（幂等），首次创建时用已有数据填充索引
+
+        摘要可能是压缩存储的，触发器和填充都通过summary_text()索引解压后的文本。
+        """
+        with self.connection_context:
+            exists = self.db.table_exists(FTS_TABLE)
+            statements = [
+                f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+                    filename, summary, content='document_summaries', content_rowid='rowid', tokenize='trigram'
+                )""",
+                # 每次启动重建触发器，保证触发器定义与当前版本一致
+                f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+                f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+                f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+                f"""CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON document_summaries BEGIN
+                    INSERT INTO {FTS_TABLE}(rowid, filename, summary)
+                    VALUES (new.rowid, new.filename, summary_text(new.summary));
+                END""",
+                f"""CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON document_summaries BEGIN
+                    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename, summary)
+                    VALUES ('delete', old.rowid, old.filename, summary_text(old.summary));
+                END""",
+                f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON document_summaries BEGIN
+                    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename, summary)
+                    VALUES ('delete', old.rowid, old.filename, summary_text(old.summary));
+                    INSERT INTO {FTS_TABLE}(rowid, filename, summary)
+                    VALUES (new.rowid, new.filename, summary_text(new.summary));
+                END"""
+            ]
+            with self.db.atomic():
+                for statement in statements:
+                    self.db.execute_sql(statement)
+                if not exists:
+                    self.db.execute_sql(
+                        f"INSERT INTO {FTS_TABLE}(rowid, filename, summary) "
+                        f"SELECT rowid, filename, summary_text(summary) FROM document_summaries"
+                    )
+
+    def search_summaries(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        全文检索文档摘要和文件名
+
+        按bm25相关度排序（文件名权重更高）。trigram索引只能匹配不少于3个字符的词，
+        查询中的词都短于3个字符时退化为LIKE扫描，按创建时间倒序返回。
+        """
+        terms = query.split()
+        fts_terms = [term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH]
+        with self.connection_context:
+            try:
+                if fts_terms:
+                    match = " OR ".join('"' + term.replace('"', '""') + '"' for term in fts_terms)
+                    cursor = self.db.execute_sql(
+                        f"""SELECT s.doc_id, s.filename, s.summary, bm25({FTS_TABLE}, 2.0, 1.0) AS rank
+                            FROM {FTS_TABLE} JOIN document_summaries s ON s.rowid = {FTS_TABLE}.rowid
+                            WHERE {FTS_TABLE} MATCH ? ORDER BY rank LIMIT ?""",
+                        (match, limit)
+                    )
+                    # bm25越小越相关，取负值使score越大越相关
+                    rows = [(doc_id, filename, decompress_summary(summary), -rank)
+                            for doc_id, filename, summary, rank in cursor]
+                elif terms:
+                    condition = None
+                    for term in terms:
+                        term_condition = (fn.summary_text(self.DocumentSummary.summary).contains(term) |
+                                          self.DocumentSummary.filename.contains(term))
+                        condition = term_condition if condition is None else condition | term_condition
+                    query_set = (self.DocumentSummary
+                                 .select(self.DocumentSummary.doc_id, self.DocumentSummary.filename,
+                                         self.DocumentSummary.summary)
+                                 .where(condition)
+                                 .order_by(self.DocumentSummary.created_at.desc())
+                                 .limit(limit)
+                                 .tuples())
+                    rows = [(doc_id, filename, summary, 0.0) for doc_id, filename, summary in query_set]
+                else:
+                    rows = []
+
+                return [{
+                    'doc_id': doc_id,
+                    'filename': filename,
+                    'score': score,
+                    'snippet': self._summary_snippet(summary, terms)
+                } for doc_id, filename, summary, score in rows]
+            except Exception as e:
+                logger.error(f"全文检索文档摘要失败: {str(e)}")
+                return []
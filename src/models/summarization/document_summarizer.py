@@ -1,9 +1,22 @@
-from typing import List
+import asyncio
+import re
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from langchain_core.documents import Document
-from src.models.llm.ollama_llm import OllamaLLMClient
+from src.config import settings
+from src.models.llm.llm_activity import llm_activity
+from src.models.llm.ollama_gateway import ollama_gateway
+from src.models.llm.ollama_llm import OllamaLLMClient, MODEL_OPTIONS
+from src.models.llm.response_cache import get_llm_response_cache
 from src.utils import logger
+from src.utils.cache import DiskCache
+from src.utils.hashing import compute_text_hash
+from src.utils.tokens import TokenCounter
 from langchain_core.prompts import PromptTemplate
 
+# 句子边界（保留句末标点）
+SENTENCE_BOUNDARY = re.compile(r"(?<=[。！？!?；\n])|(?<=\. )")
+
 class DocumentSummarizer:
     def __init__(self):
         """
@@ -39,65 +52,113 @@ class DocumentSummarizer:
         # 初始化摘要链
         self.summary_chain = self.summary_prompt | self.llm
         self.merge_chain = self.merge_prompt | self.llm
+        
+        # 限制同时发往Ollama的摘要请求数（全局并发由ollama_gateway限制）；
+        # 信号量与事件循环绑定，在首次使用时按当前事件循环创建
+        self._semaphore = None
+        self._semaphore_loop = None
+        
+        # 内容寻址的摘要缓存：块摘要和合并结果按(模型, 提示词版本, 输入内容哈希)缓存，最终摘要按全文哈希缓存，
+        # 文档重新上传或局部修改时只有变化的块及其上层的合并需要调用LLM
+        self.cache = None
+        if settings.summary_cache_enabled:
+            self.cache = DiskCache(settings.summary_cache_path, settings.summary_cache_max_bytes)
+        # LLM响应缓存：按渲染后的完整提示词匹配，命中时不等待也不占用并发；摘要缓存启用时块摘要和合并结果
+        # 已按内容缓存，不再写入响应缓存，避免同一结果在两个缓存中各存一份
+        self.response_cache = get_llm_response_cache() if self.cache is None else None
+        # 提示词模板变化时缓存自动失效
+        self.prompt_version = compute_text_hash(self.summary_prompt.template + self.merge_prompt.template)[:16]
+        
+        # 按token数而不是字符数确定分块和合并分组的大小，尽量填满模型的上下文窗口
+        self.token_counter = TokenCounter(settings.summarize_tokenizer)
+        self.chunk_tokens = self._input_budget(self.summary_prompt.format(content=""))
+        self.merge_tokens = self._input_budget(self.merge_prompt.format(summaries=""))
+    
+    def _cache_key(self, kind: str, content: str) -> str:
+        return compute_text_hash(f"{kind}|{settings.ollama_model}|{self.prompt_version}|{compute_text_hash(content)}")
+    
+    async def _cache_get(self, key: str) -> Optional[str]:
+        # 磁盘读写放到线程中执行，不阻塞事件循环
+        return await asyncio.to_thread(self.cache.get, key) if self.cache is not None else None
+    
+    async def _cache_set(self, key: str, value: str):
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, value)
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(settings.summarize_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    def _input_budget(self, prompt: str) -> int:
+        """每次LLM调用可用于输入内容的token数：上下文窗口减去提示词本身和为输出预留的token"""
+        budget = settings.ollama_num_ctx - self.token_counter.count(prompt) - settings.summarize_output_tokens
+        return max(256, budget)
     
-    def _chunk_text(self, text: str, max_chunk_size: int = 4000) -> List[str]:
+    def _chunk_text(self, text: str, max_tokens: Optional[int] = None) -> List[str]:
         """
         将长文本分割成适合LLM处理的小块
         
+        按段落累加，每块尽量填满token预算；超出预算的段落按句子切分，超出预算的句子按token数直接切断。
+        
         Args:
             text: 需要分割的文本
-            max_chunk_size: 每块的最大字符数
+            max_tokens: 每块的最大token数，默认为摘要调用的输入预算
             
         Returns:
             List[str]: 分割后的文本块列表
         """
-        # 简单按段落分割
-        paragraphs = text.split("\n\n")
+        max_tokens = max_tokens or self.chunk_tokens
         chunks = []
-        current_chunk = ""
+        current = []
+        current_tokens = 0
         
-        for para in paragraphs:
-            # 如果当前段落加上当前块不超过最大大小，则添加到当前块
-            if len(current_chunk) + len(para) + 2 <= max_chunk_size:
-                if current_chunk:
-                    current_chunk += "\n\n"
-                current_chunk += para
-            else:
-                # 如果当前块不为空，添加到chunks
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # 如果单个段落超过最大块大小，需要进一步分割
-                if len(para) > max_chunk_size:
-                    # 按句子分割
-                    sentences = para.replace("。", "。\n").replace("！", "！\n").replace("？", "？\n").split("\n")
-                    current_chunk = ""
-                    
-                    for sentence in sentences:
-                        if len(current_chunk) + len(sentence) + 1 <= max_chunk_size:
-                            if current_chunk:
-                                current_chunk += " "
-                            current_chunk += sentence
-                        else:
-                            if current_chunk:
-                                chunks.append(current_chunk)
-                            # 如果单个句子超过最大块大小，直接截断
-                            if len(sentence) > max_chunk_size:
-                                # 按最大块大小分割
-                                for i in range(0, len(sentence), max_chunk_size):
-                                    chunks.append(sentence[i:i+max_chunk_size])
-                                current_chunk = ""
-                            else:
-                                current_chunk = sentence
-                else:
-                    current_chunk = para
+        for para in text.split("\n\n"):
+            if not para.strip():
+                continue
+            tokens = self.token_counter.count(para)
+            units = [(para, tokens)] if tokens <= max_tokens else self._split_paragraph(para, max_tokens)
+            for unit, unit_tokens in units:
+                # 段落之间的分隔符按1个token计
+                if current and current_tokens + unit_tokens + 1 > max_tokens:
+                    chunks.append("\n\n".join(current))
+                    current = []
+                    current_tokens = 0
+                current_tokens += unit_tokens + (1 if current else 0)
+                current.append(unit)
         
         # 添加最后一个块
-        if current_chunk:
-            chunks.append(current_chunk)
+        if current:
+            chunks.append("\n\n".join(current))
             
         return chunks
     
+    def _split_paragraph(self, para: str, max_tokens: int) -> List[Tuple[str, int]]:
+        """将超出预算的段落按句子重新组合成不超过max_tokens的片段，返回(片段, token数)列表"""
+        pieces = []
+        current = ""
+        current_tokens = 0
+        for sentence in SENTENCE_BOUNDARY.split(para):
+            if not sentence:
+                continue
+            tokens = self.token_counter.count(sentence)
+            if current and current_tokens + tokens > max_tokens:
+                pieces.append((current, current_tokens))
+                current = ""
+                current_tokens = 0
+            if tokens > max_tokens:
+                # 单个句子超出预算，按token数直接切断
+                pieces.extend((piece, self.token_counter.count(piece))
+                              for piece in self.token_counter.split(sentence, max_tokens))
+                continue
+            current += sentence
+            current_tokens += tokens
+        if current:
+            pieces.append((current, current_tokens))
+        return pieces
+    
     async def summarize_document(self, document: Document) -> str:
         """
         对单个Document对象进行摘要
@@ -114,56 +175,186 @@ class DocumentSummarizer:
             logger.error(f"摘要生成失败: {str(e)}")
             return "摘要生成失败"
     
-    async def summarize_text(self, text: str, max_recursion: int = 3, max_length: int = 2000) -> str:
+    async def summarize_text(self, text: str, max_recursion: Optional[int] = None, max_length: Optional[int] = None,
+                             timings: Optional[List[Dict[str, Any]]] = None) -> str:
+        """对文本内容进行map-reduce摘要，参数见summarize_text_with_status"""
+        summary, _ = await self.summarize_text_with_status(text, max_recursion, max_length, timings)
+        return summary
+    
+    async def summarize_text_with_status(self, text: str, max_recursion: Optional[int] = None,
+                                         max_length: Optional[int] = None,
+                                         timings: Optional[List[Dict[str, Any]]] = None) -> Tuple[str, bool]:
         """
-        对文本内容进行摘要，递归处理直到摘要长度合适
+        对文本内容进行map-reduce摘要，同时返回摘要是否退化
+        
+        文本按token数分块，每块不超过上下文窗口减去提示词和输出预留后的预算；
+        map阶段并发（受summarize_concurrency限制）对每个块生成摘要；reduce阶段按summarize_merge_group_size和token预算分组，
+        每一层并发使用merge_prompt合并各组摘要，直到只剩一个摘要或达到最大层数。
         
         Args:
             text: 文本内容
-            max_recursion: 最大递归深度
-            max_length: 期望的最大摘要长度
+            max_recursion: reduce阶段的最大层数，默认为summarize_max_recursion
+            max_length: 达到最大层数时返回的拼接摘要的最大长度（字符），默认为summarize_max_length
+            timings: 传入列表时，追加每一层的耗时统计（level、inputs、outputs、seconds）
             
         Returns:
-            str: 文本摘要
+            Tuple[str, bool]: (文本摘要, 是否退化)；有块摘要失败（含占位文本）、合并退化为拼接或整体失败时为退化，
+            退化的摘要不应作为最终结果保存
         """
+        max_recursion = settings.summarize_max_recursion if max_recursion is None else max_recursion
+        max_length = max_length or settings.summarize_max_length
         try:
-            # 检查文本长度，如果较短则直接摘要
-            if len(text) <= max_length:
-                return await self.summary_chain.ainvoke({"content": text})
+            # 最终摘要按全文及摘要参数缓存
+            final_key = self._cache_key(
+                "final",
+                f"{max_recursion}|{max_length}|{settings.summarize_merge_group_size}|"
+                f"{self.chunk_tokens}|{self.merge_tokens}|{text}"
+            )
+            cached = await self._cache_get(final_key)
+            if cached is not None:
+                logger.info("命中最终摘要缓存")
+                return cached, False
+            
+            summary, degraded = await self._summarize_text(text, max_recursion, max_length, timings)
+            # 有块摘要失败或合并退化为拼接时不缓存，下次重新调用LLM
+            if not degraded:
+                await self._cache_set(final_key, summary)
+            return summary, degraded
+        except Exception as e:
+            logger.error(f"摘要生成过程中出错: {str(e)}")
+            return "摘要生成失败", True
+    
+    async def _summarize_text(self, text: str, max_recursion: int, max_length: int,
+                              timings: Optional[List[Dict[str, Any]]]) -> Tuple[str, bool]:
+        """返回(摘要, 是否退化)，任一块摘要失败或任一次合并失败时视为退化"""
+        try:
+            # 不超过一次调用的token预算时直接摘要
+            if self.token_counter.count(text) <= self.chunk_tokens:
+                return await self._summarize_chunk(0, 1, text)
             
             # 对长文本进行分块处理
             chunks = self._chunk_text(text)
             logger.info(f"文本已分割为{len(chunks)}个块进行摘要")
             
-            # 对每个块生成摘要
-            chunk_summaries = []
-            for i, chunk in enumerate(chunks):
-                try:
-                    summary = await self.summary_chain.ainvoke({"content": chunk})
-                    chunk_summaries.append(summary)
-                    logger.info(f"已完成第{i+1}/{len(chunks)}块的摘要生成")
-                except Exception as chunk_error:
-                    logger.error(f"处理第{i+1}块时出错: {str(chunk_error)}")
-                    chunk_summaries.append(f"[此部分摘要生成失败]")
-            
-            # 合并摘要
-            combined_summaries = "\n\n".join([f"部分{i+1}:\n{summary}" for i, summary in enumerate(chunk_summaries)])
-            
-            # 检查是否达到最大递归深度
-            if max_recursion <= 0:
-                logger.warning("已达到最大递归深度，返回当前摘要")
-                return combined_summaries[:max_length] + "..." if len(combined_summaries) > max_length else combined_summaries
+            # map：并发对每个块生成摘要，结果保持原有顺序
+            start = time.perf_counter()
+            results = await asyncio.gather(*[
+                self._summarize_chunk(i, len(chunks), chunk) for i, chunk in enumerate(chunks)
+            ])
+            summaries = [summary for summary, _ in results]
+            degraded = any(failed for _, failed in results)
+            self._record_timing(timings, 0, len(chunks), len(summaries), time.perf_counter() - start)
             
-            # 如果合并后的摘要仍然很长，递归处理
-            if len(combined_summaries) > max_length:
-                logger.info(f"合并后的摘要仍然很长({len(combined_summaries)}字符)，进行递归摘要")
-                return await self.summarize_text(combined_summaries, max_recursion-1, max_length)
+            # reduce：逐层分组合并，每层的各组并发执行
+            level = 0
+            group_size = max(2, settings.summarize_merge_group_size)
+            while len(summaries) > 1:
+                if level >= max_recursion:
+                    logger.warning("已达到最大递归深度，返回当前摘要")
+                    combined_summaries = self._format_summaries(summaries)
+                    if len(combined_summaries) > max_length:
+                        combined_summaries = combined_summaries[:max_length] + "..."
+                    return combined_summaries, degraded
+                
+                level += 1
+                start = time.perf_counter()
+                groups = self._group_summaries(summaries, group_size)
+                results = await asyncio.gather(*[self._merge_group(level, group) for group in groups])
+                self._record_timing(timings, level, len(summaries), len(results), time.perf_counter() - start)
+                summaries = [merged for merged, _ in results]
+                degraded = degraded or any(failed for _, failed in results)
             
-            return combined_summaries
+            return summaries[0], degraded
                 
         except Exception as e:
             logger.error(f"摘要生成过程中出错: {str(e)}")
-            return "摘要生成失败"
+            return "摘要生成失败", True
+    
+    async def _summarize_chunk(self, index: int, total: int, chunk: str) -> Tuple[str, bool]:
+        """在并发限制内对单个块生成摘要，返回(摘要, 是否失败)；命中缓存时不调用LLM，失败时返回占位文本（不缓存）"""
+        key = self._cache_key("map", chunk)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            logger.info(f"第{index+1}/{total}块命中摘要缓存")
+            return cached, False
+        try:
+            summary = await self._invoke_chain("summary_map", self.summary_chain, self.summary_prompt,
+                                               {"content": chunk})
+            await self._cache_set(key, summary)
+            logger.info(f"已完成第{index+1}/{total}块的摘要生成")
+            return summary, False
+        except Exception as chunk_error:
+            logger.error(f"处理第{index+1}块时出错: {str(chunk_error)}")
+            return "[此部分摘要生成失败]", True
+    
+    async def _merge_group(self, level: int, group: List[str]) -> Tuple[str, bool]:
+        """
+        在并发限制内合并一组摘要，返回(合并结果, 是否失败)
+
+        只有一个摘要时直接返回，命中缓存时不调用LLM，失败时退化为拼接（不缓存）
+        """
+        if len(group) == 1:
+            return group[0], False
+        content = self._format_summaries(group)
+        key = self._cache_key("merge", content)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached, False
+        try:
+            merged = await self._invoke_chain("summary_merge", self.merge_chain, self.merge_prompt,
+                                              {"summaries": content})
+            await self._cache_set(key, merged)
+            return merged, False
+        except Exception as merge_error:
+            logger.error(f"第{level}层合并摘要时出错: {str(merge_error)}")
+            return self._format_summaries(group), True
+    
+    async def _invoke_chain(self, name: str, chain, prompt: PromptTemplate, inputs: Dict[str, str]) -> str:
+        """调用摘要链：命中LLM响应缓存时直接返回；否则等待交互式问答结束，在并发限制内调用"""
+        key = None
+        if self.response_cache is not None:
+            key = self.response_cache.fingerprint(MODEL_OPTIONS, prompt.format(**inputs))
+            cached = await self.response_cache.aget(name, key)
+            if cached is not None:
+                return cached
+        # 交互式问答优先，有问答请求时暂不发起新的调用
+        await llm_activity.wait_until_idle()
+        async with self._get_semaphore():
+            # 与问答、代理共用全局并发限制，排队时问答优先
+            response = await ollama_gateway.ainvoke(chain, inputs, priority="summary")
+        if key is not None and response:
+            await self.response_cache.aset(key, response)
+        return response
+    
+    def _group_summaries(self, summaries: List[str], group_size: int) -> List[List[str]]:
+        """按顺序分组，每组最多group_size个摘要，且格式化后不超过合并调用的token预算"""
+        groups = []
+        current = []
+        current_tokens = 0
+        for summary in summaries:
+            # 加上"部分N:"标签和分隔符
+            tokens = self.token_counter.count(summary) + 4
+            if current and (len(current) >= group_size or current_tokens + tokens > self.merge_tokens):
+                groups.append(current)
+                current = []
+                current_tokens = 0
+            current.append(summary)
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+    
+    @staticmethod
+    def _format_summaries(summaries: List[str]) -> str:
+        return "\n\n".join([f"部分{i+1}:\n{summary}" for i, summary in enumerate(summaries)])
+    
+    @staticmethod
+    def _record_timing(timings: Optional[List[Dict[str, Any]]], level: int, inputs: int, outputs: int, seconds: float):
+        """记录并输出一层的耗时，level为0表示map阶段"""
+        stage = "map阶段" if level == 0 else f"reduce第{level}层"
+        logger.info(f"摘要{stage}: {inputs}个输入 -> {outputs}个输出，耗时{seconds:.2f}秒")
+        if timings is not None:
+            timings.append({"level": level, "inputs": inputs, "outputs": outputs, "seconds": seconds})
     
     async def summarize_documents(self, documents: List[Document]) -> str:
         """
@@ -175,10 +366,15 @@ class DocumentSummarizer:
         Returns:
             str: 合并后的文档摘要
         """
+        summary, _ = await self.summarize_documents_with_status(documents)
+        return summary
+    
+    async def summarize_documents_with_status(self, documents: List[Document]) -> Tuple[str, bool]:
+        """对多个Document对象进行摘要，返回(合并后的文档摘要, 是否退化)"""
         try:
             # 合并所有文档内容
             combined_text = "\n\n".join([doc.page_content for doc in documents])
-            return await self.summarize_text(combined_text)
+            return await self.summarize_text_with_status(combined_text)
         except Exception as e:
             logger.error(f"多文档摘要生成失败: {str(e)}")
-            return "多文档摘要生成失败"
\ No newline at end of file
+            return "多文档摘要生成失败", True
\ No newline at end of file
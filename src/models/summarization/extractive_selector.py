@@ -0,0 +1,91 @@
+from typing import Callable, List, Optional
+import numpy as np
+from src.config import settings
+from src.utils import logger
+from src.utils.tokens import estimate_tokens
+
+
+class ExtractiveSelector:
+    """
+    摘要前的抽取式预选
+
+    以片段向量的余弦相似度构建图，用TextRank（PageRank）计算每个片段的中心度；
+    再按中心度贪心选择片段，同时惩罚与已选片段的相似度（MMR），避免选出重复内容，
+    直到达到token预算。选出的片段按原文顺序返回，只有这些片段会发送给LLM生成摘要。
+    """
+
+    def __init__(self, token_budget: Optional[int] = None, diversity: Optional[float] = None,
+                 damping: float = 0.85, max_iter: int = 100, tol: float = 1e-6,
+                 count_tokens: Optional[Callable[[str], int]] = None):
+        self.token_budget = token_budget if token_budget is not None else settings.summary_extractive_token_budget
+        self.diversity = diversity if diversity is not None else settings.summary_extractive_diversity
+        self.damping = damping
+        self.max_iter = max_iter
+        self.tol = tol
+        self.count_tokens = count_tokens or estimate_tokens
+
+    def centrality(self, embeddings: np.ndarray) -> np.ndarray:
+        """计算每个片段在相似度图中的TextRank得分"""
+        n = len(embeddings)
+        if n == 0:
+            return np.zeros(0)
+        similarity = self._similarity(embeddings)
+        np.fill_diagonal(similarity, 0.0)
+        similarity = np.clip(similarity, 0.0, None)
+
+        # 行归一化得到转移矩阵，孤立节点均匀跳转
+        row_sums = similarity.sum(axis=1, keepdims=True)
+        transition = np.divide(similarity, row_sums, out=np.full_like(similarity, 1.0 / n), where=row_sums > 0)
+
+        scores = np.full(n, 1.0 / n)
+        for _ in range(self.max_iter):
+            updated = (1 - self.damping) / n + self.damping * transition.T @ scores
+            if np.abs(updated - scores).sum() < self.tol:
+                scores = updated
+                break
+            scores = updated
+        return scores
+
+    def select(self, texts: List[str], embeddings: np.ndarray) -> List[int]:
+        """
+        在token预算内选择最有代表性的片段
+
+        Args:
+            texts: 片段文本，按原文顺序
+            embeddings: 片段向量，与texts一一对应
+
+        Returns:
+            List[int]: 选中片段的下标，按原文顺序；全文不超过预算时返回全部片段
+        """
+        tokens = [self.count_tokens(text) for text in texts]
+        if sum(tokens) <= self.token_budget:
+            return list(range(len(texts)))
+
+        similarity = self._similarity(embeddings)
+        scores = self.centrality(embeddings)
+        scores = scores / scores.max()
+
+        selected = []
+        used = 0
+        max_similarity = np.zeros(len(texts))
+        candidates = set(range(len(texts)))
+        while candidates:
+            # MMR：中心度越高越好，与已选片段越相似越差
+            best = max(candidates, key=lambda i: (1 - self.diversity) * scores[i] - self.diversity * max_similarity[i])
+            candidates.discard(best)
+            if used + tokens[best] > self.token_budget:
+                continue
+            selected.append(best)
+            used += tokens[best]
+            max_similarity = np.maximum(max_similarity, similarity[best])
+
+        logger.info(f"抽取式预选: {len(texts)}个片段中选出{len(selected)}个，"
+                    f"token数 {sum(tokens)} -> {used}（预算{self.token_budget}）")
+        return sorted(selected)
+
+    @staticmethod
+    def _similarity(embeddings: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+        return vectors @ vectors.T
@@ -0,0 +1,202 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import numpy as np
+from langchain_core.documents import Document
+from src.config import settings
+from src.models.llm.llm_activity import LLMActivity, llm_activity
+from src.utils import logger
+
+# 摘要任务的优先级，数值越小越先执行；交互式问答不进入队列，始终优先于所有摘要任务
+SUMMARY_PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class SummaryScheduler:
+    """
+    后台摘要调度器
+
+    上传接口在文档可检索后立即返回，摘要任务进入优先级队列，由固定数量的worker在后台生成；
+    worker在没有交互式问答请求（LLM空闲）时才开始新的任务。每个文档的摘要状态
+    （queued/running/completed/failed）保存在内存中，可通过get_status查询；
+    队列不做持久化，服务重启后通过recover重新提交没有摘要的文档。
+    """
+
+    def __init__(self, doc_processor, activity: Optional[LLMActivity] = None,
+                 workers: Optional[int] = None, idle_delay: Optional[float] = None,
+                 max_status_entries: Optional[int] = None):
+        self.doc_processor = doc_processor
+        self.activity = activity or llm_activity
+        self.workers = workers or settings.summary_scheduler_workers
+        self.idle_delay = settings.summary_scheduler_idle_delay if idle_delay is None else idle_delay
+        self.max_status_entries = max_status_entries or settings.summary_scheduler_max_status_entries
+        self._queue = None
+        self._tasks = []
+        self._jobs = OrderedDict()
+        self._sequence = itertools.count()
+
+    async def start(self):
+        """启动worker（在事件循环中调用）"""
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        # 启动前提交的任务重新入队
+        for job in self._jobs.values():
+            if job["status"] == "queued":
+                self._queue.put_nowait((job["priority_value"], next(self._sequence), job))
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"摘要调度器已启动，worker数: {self.workers}")
+
+    async def stop(self):
+        """停止worker，正在生成的摘要被取消，排队中的任务丢弃（下次启动时由recover重新提交）"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, doc_id: str, file_path: str, filename: str,
+               chunks: Optional[List[Document]] = None, chunk_embeddings: Optional[np.ndarray] = None,
+               priority: str = "normal") -> Dict[str, Any]:
+        """
+        提交摘要任务，同一文档已在排队时以新任务替换
+
+        Returns:
+            Dict[str, Any]: 任务状态
+        """
+        if priority not in SUMMARY_PRIORITIES:
+            raise ValueError(f"不支持的摘要优先级: {priority}，可选: {', '.join(SUMMARY_PRIORITIES)}")
+        job = {
+            "doc_id": doc_id,
+            "file_path": file_path,
+            "filename": filename,
+            "chunks": chunks,
+            "chunk_embeddings": chunk_embeddings,
+            "priority": priority,
+            "priority_value": SUMMARY_PRIORITIES[priority],
+            "status": "queued",
+            "queued_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None
+        }
+        self._jobs[doc_id] = job
+        self._jobs.move_to_end(doc_id)
+        if self._queue is not None:
+            self._queue.put_nowait((job["priority_value"], next(self._sequence), job))
+        self._trim_status()
+        return self._public_status(job)
+
+    async def recover(self, graph_store) -> int:
+        """
+        重新提交已入库但没有摘要、也不在调度器中的文档，按low优先级从原始文件生成摘要
+
+        Args:
+            graph_store: 图存储，从中读取全部文档节点的元数据
+
+        Returns:
+            int: 重新提交的文档数
+        """
+        documents = [doc for doc in await graph_store.list_documents()
+                     if doc.get("doc_id") and doc["doc_id"] not in self._jobs]
+        if not documents:
+            return 0
+        try:
+            summarized = await asyncio.to_thread(
+                self.doc_processor.store.get_summarized_doc_ids, [doc["doc_id"] for doc in documents]
+            )
+        except Exception as e:
+            # 查询失败时不能把所有文档当作没有摘要，否则会重新摘要整个语料
+            logger.error(f"查询已有摘要失败，跳过重新提交: {str(e)}")
+            return 0
+        recovered = 0
+        for doc in documents:
+            if doc["doc_id"] in summarized:
+                continue
+            file_path = doc.get("original_file_path")
+            if not file_path or not os.path.exists(file_path):
+                logger.warning(f"文档没有摘要且原始文件不存在，无法重新提交: {doc['doc_id']}")
+                continue
+            self.submit(doc["doc_id"], file_path, doc.get("filename") or os.path.basename(file_path), priority="low")
+            recovered += 1
+        if recovered:
+            logger.info(f"已重新提交{recovered}个没有摘要的文档")
+        return recovered
+
+    def get_status(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """获取文档的摘要任务状态，没有记录时返回None"""
+        job = self._jobs.get(doc_id)
+        return self._public_status(job) if job else None
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0}
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return {"workers": self.workers, "interactive_requests": self.activity.active, **counts}
+
+    async def _worker(self, index: int):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                # 已被同一文档的新任务替换
+                if self._jobs.get(job["doc_id"]) is not job or job["status"] != "queued":
+                    continue
+                # 等待没有交互式问答请求后再开始
+                await self.activity.wait_until_idle(self.idle_delay)
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]):
+        job["status"] = "running"
+        job["started_at"] = time.time()
+        logger.info(f"开始生成文档摘要: {job['doc_id']}（优先级{job['priority']}）")
+        try:
+            summary = await self.doc_processor.generate_document_summary(
+                job["file_path"],
+                job["doc_id"],
+                job["filename"],
+                chunks=job["chunks"],
+                chunk_embeddings=job["chunk_embeddings"]
+            )
+            if summary is None:
+                job["status"] = "failed"
+                # 生成失败或摘要不完整时不保存，recover在下次启动时重新提交
+                job["error"] = "摘要生成失败或不完整"
+            else:
+                job["status"] = "completed"
+        except asyncio.CancelledError:
+            job["status"] = "failed"
+            job["error"] = "任务已取消"
+            raise
+        except Exception as e:
+            logger.error(f"后台生成文档摘要失败({job['doc_id']}): {str(e)}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = time.time()
+            # 释放片段和向量
+            job["chunks"] = None
+            job["chunk_embeddings"] = None
+
+    def _trim_status(self):
+        """状态记录超出上限时，丢弃最早的已结束任务"""
+        excess = len(self._jobs) - self.max_status_entries
+        if excess <= 0:
+            return
+        for doc_id in [doc_id for doc_id, job in self._jobs.items()
+                       if job["status"] in ("completed", "failed")][:excess]:
+            del self._jobs[doc_id]
+
+    @staticmethod
+    def _public_status(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "doc_id": job["doc_id"],
+            "status": job["status"],
+            "priority": job["priority"],
+            "queued_at": job["queued_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"]
+        }
@@ -1,85 +1,126 @@
-import pandas as pd
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any
 from docx.api import Document
+from pypdf import PdfReader
 import camelot
 from langchain.schema import Document as LangchainDocument
+from src.config import settings
+from src.utils import logger
+from src.utils.cache import DiskCache
+from src.utils.hashing import compute_file_hash
+
+# 内容流中的画线(x y l)和画矩形(x y w h re)操作符，lattice模式依赖这些线条识别表格
+_RULING_PATTERN = re.compile(rb"(?:-?[\d.]+\s+){2}(?:(?:-?[\d.]+\s+){2}re|l)\b")
+# 页面上至少出现这么多条线才认为可能有表格
+_MIN_RULING_OPS = 4
+
+
+def _read_pdf_tables(pdf_path: str, pages: str) -> List[Dict[str, Any]]:
+    """在子进程中对指定页码运行camelot，只返回可序列化的表格数据"""
+    tables = camelot.read_pdf(pdf_path, pages=pages, flavor='lattice')
+    return [{"page": int(table.page), "rows": table.df.values.tolist()} for table in tables]
+
 
 class TableExtractor:
     """表格数据提取器，专门处理文档中的表格"""
-    
+
+    def __init__(self):
+        self.cache = DiskCache(settings.table_cache_path, max_bytes=settings.table_cache_max_bytes)
+
+    def _find_ruling_pages(self, pdf_path: str) -> List[int]:
+        """找出含有线条的页码（从1开始），没有线条的页面lattice模式不可能抽出表格"""
+        reader = PdfReader(pdf_path)
+        pages = []
+        for i, page in enumerate(reader.pages):
+            try:
+                contents = page.get_contents()
+                data = contents.get_data() if contents is not None else b""
+            except Exception:
+                # 解析失败时保守处理，交给camelot判断
+                pages.append(i + 1)
+                continue
+            if len(_RULING_PATTERN.findall(data)) >= _MIN_RULING_OPS:
+                pages.append(i + 1)
+        return pages
+
+    def _extract_pdf_table_rows(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """按页分组并行运行camelot"""
+        pages = self._find_ruling_pages(pdf_path)
+        if not pages:
+            return []
+
+        size = max(1, settings.table_extraction_pages_per_task)
+        groups = [",".join(str(p) for p in pages[i:i + size]) for i in range(0, len(pages), size)]
+        logger.info(f"PDF共有{len(pages)}页可能包含表格，分为{len(groups)}个任务抽取: {pdf_path}")
+
+        if len(groups) == 1:
+            return _read_pdf_tables(pdf_path, groups[0])
+
+        tables = []
+        workers = max(1, min(settings.table_extraction_workers, len(groups)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(_read_pdf_tables, [pdf_path] * len(groups), groups):
+                tables.extend(result)
+        return tables
+
+    def _table_to_text(self, index: int, rows: List[List[str]]) -> str:
+        """生成表格的文本描述"""
+        table_text = f"表格{index + 1}内容:\n"
+        # 添加列名
+        col_names = rows[0]
+        table_text += "列标题: " + " | ".join(col_names) + "\n"
+
+        # 添加每行数据，并进行自然语言描述
+        for idx, row in enumerate(rows[1:], start=1):
+            table_text += f"行{idx}: " + " | ".join(row) + "\n"
+
+            # 为每行生成自然语言描述
+            row_desc = "该行数据表示: "
+            for j, val in enumerate(row):
+                if j < len(col_names):
+                    row_desc += f"{col_names[j]}为{val}, "
+            table_text += row_desc.rstrip(", ") + "\n"
+        return table_text
+
     def extract_tables_from_pdf(self, pdf_path):
-        """从PDF中提取表格并转换为结构化文本"""
-        # 使用camelot提取表格（更精确）
-        tables = camelot.read_pdf(pdf_path, pages='all', flavor='lattice')
-        
+        """从PDF中提取表格并转换为结构化文本，结果按文件内容哈希缓存"""
+        cache_key = f"pdf-lattice-{compute_file_hash(pdf_path)}"
+        tables = self.cache.get(cache_key)
+        if tables is None:
+            tables = self._extract_pdf_table_rows(pdf_path)
+            self.cache.set(cache_key, tables)
+        else:
+            logger.info(f"命中表格抽取缓存: {pdf_path}")
+
         extracted_docs = []
         for i, table in enumerate(tables):
-            # 将表格转换为DataFrame
-            df = table.df
-            
-            # 生成表格的文本描述
-            table_text = f"表格{i+1}内容:\n"
-            # 添加列名
-            table_text += "列标题: " + " | ".join(df.iloc[0].tolist()) + "\n"
-            
-            # 添加每行数据，并进行自然语言描述
-            for idx, row in df.iloc[1:].iterrows():
-                row_values = row.tolist()
-                table_text += f"行{idx}: " + " | ".join(row_values) + "\n"
-                
-                # 为每行生成自然语言描述
-                col_names = df.iloc[0].tolist()
-                row_desc = "该行数据表示: "
-                for j, val in enumerate(row_values):
-                    if j < len(col_names):
-                        row_desc += f"{col_names[j]}为{val}, "
-                table_text += row_desc.rstrip(", ") + "\n"
-            
-            # 创建文档对象
-            metadata = {"source": pdf_path, "content_type": "table", "table_index": i}
-            doc = LangchainDocument(page_content=table_text, metadata=metadata)
+            if not table["rows"]:
+                continue
+            metadata = {"source": pdf_path, "content_type": "table", "table_index": i, "page": table["page"]}
+            doc = LangchainDocument(page_content=self._table_to_text(i, table["rows"]), metadata=metadata)
             extracted_docs.append(doc)
-            
+
         return extracted_docs
-    
+
     def extract_tables_from_docx(self, docx_path):
-        """从Word文档中提取表格并转换为结构化文本"""
-        doc = Document(docx_path)
-        
+        """从Word文档中提取表格并转换为结构化文本，结果按文件内容哈希缓存"""
+        cache_key = f"docx-{compute_file_hash(docx_path)}"
+        tables = self.cache.get(cache_key)
+        if tables is None:
+            doc = Document(docx_path)
+            tables = [[[cell.text for cell in row.cells] for row in table.rows] for table in doc.tables]
+            self.cache.set(cache_key, tables)
+        else:
+            logger.info(f"命中表格抽取缓存: {docx_path}")
+
         extracted_docs = []
-        for i, table in enumerate(doc.tables):
-            # 提取表格数据到DataFrame
-            data = []
-            for row in table.rows:
-                row_data = [cell.text for cell in row.cells]
-                data.append(row_data)
-                
-            if not data:
+        for i, rows in enumerate(tables):
+            if not rows:
                 continue
-                
-            df = pd.DataFrame(data[1:], columns=data[0] if data else None)
-            
-            # 生成表格的文本描述（与PDF处理类似）
-            table_text = f"表格{i+1}内容:\n"
-            # 添加列名
-            if len(data) > 0:
-                table_text += "列标题: " + " | ".join(data[0]) + "\n"
-            
-            # 添加每行数据，并进行自然语言描述
-            for idx, row in enumerate(data[1:]):
-                table_text += f"行{idx+1}: " + " | ".join(row) + "\n"
-                
-                # 为每行生成自然语言描述
-                if len(data) > 0:
-                    col_names = data[0]
-                    row_desc = "该行数据表示: "
-                    for j, val in enumerate(row):
-                        if j < len(col_names):
-                            row_desc += f"{col_names[j]}为{val}, "
-                    table_text += row_desc.rstrip(", ") + "\n"
-            
-            # 创建文档对象
+
             metadata = {"source": docx_path, "content_type": "table", "table_index": i}
-            doc = LangchainDocument(page_content=table_text, metadata=metadata)
+            doc = LangchainDocument(page_content=self._table_to_text(i, rows), metadata=metadata)
             extracted_docs.append(doc)
-            
-        return extracted_docs
\ No newline at end of file
+
+        return extracted_docs
@@ -0,0 +1,39 @@
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from src.utils.cache import TTLCache
+from src.utils.hashing import compute_text_hash
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    记录文档片段向量的嵌入模型包装
+
+    向量化时计算出的片段向量按文本哈希保存在内存LRU中（float32），
+    摘要前的抽取式预选直接复用这些向量，不需要再次调用嵌入模型。查询向量不缓存。
+    """
+
+    def __init__(self, embedding_model: Embeddings, max_entries: int = 8192):
+        self.embedding_model = embedding_model
+        self.cache = TTLCache(max_entries)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self.embedding_model.embed_documents(texts)
+        for text, embedding in zip(texts, embeddings):
+            self.cache.set(compute_text_hash(text), np.asarray(embedding, dtype=np.float32))
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embedding_model.embed_query(text)
+
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """获取一组片段的向量，优先使用向量化时记录的结果，未命中的片段批量计算"""
+        vectors: List[Optional[np.ndarray]] = [self.cache.get(compute_text_hash(text)) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embed_documents([texts[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                vectors[i] = np.asarray(embedding, dtype=np.float32)
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
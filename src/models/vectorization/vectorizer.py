@@ -1,14 +1,18 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from pymilvus import connections, utility
 from langchain_chroma import Chroma
 from sentence_transformers import CrossEncoder
 from src.config import settings
 from src.models.llm.ollama_llm import OllamaLLMClient
+from src.models.vectorization.cached_embeddings import CachedEmbeddings
 from src.utils import logger
 import os
+import threading
 from langchain_milvus.vectorstores import Milvus
 
 class Vectorizer:
@@ -21,17 +25,25 @@ class Vectorizer:
             self.embedding_model = HuggingFaceEmbeddings(
                 model_name=settings.embedding_model
             )
+        # 记录片段向量，供摘要前的抽取式预选复用
+        self.embedding_model = CachedEmbeddings(self.embedding_model, settings.embedding_cache_max_entries)
         
         self.reranker = CrossEncoder(settings.reranker_model)
         self.vector_store = None
+        # 并发上传会在线程池中同时写向量库（FAISS的save_local写同一目录），写入需串行
+        self._write_lock = threading.Lock()
         
     def initialize_vector_store(self, documents: List[Document]):
-        """初始化向量数据库"""
+        """初始化向量数据库，多个线程同时调用时依次执行"""
         # 确保有文档才初始化，避免空向量库的维度问题
         if not documents:
             logger.warning("尝试使用空文档列表初始化向量库，不允许此操作")
             return
             
+        with self._write_lock:
+            self._initialize_vector_store(documents)
+        
+    def _initialize_vector_store(self, documents: List[Document]):
         if settings.vector_store_type.lower() == "chroma":
             # 确保目录存在
             if not os.path.exists(settings.vector_store_path):
@@ -80,6 +92,10 @@ class Vectorizer:
                 logger.info(f"已成功回退到FAISS向量库并保存到{settings.vector_store_path}")
         logger.info(f"成功初始化向量库，类型: {settings.vector_store_type}，文档数量: {len(documents)}")
         
+    def get_chunk_embeddings(self, documents: List[Document]) -> np.ndarray:
+        """获取文档片段的向量，优先复用向量化时已计算的结果"""
+        return self.embedding_model.get_embeddings([doc.page_content for doc in documents])
+        
     def check_milvus_connection(self) -> bool:
         """仅检查Milvus连接是否正常，不创建collection
         
@@ -362,4 +378,132 @@ class Vectorizer:
                         "metadata": doc.metadata
                     })
         
-        return chunks
\ No newline at end of file
+        return chunks
+    
+    def export_embeddings(self, batch_size: int = 5000) -> Iterator[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """
+        分批导出向量库中的全部文档片段及其向量，用于快照导出
+        
+        Yields:
+            (ids, texts, metadatas, embeddings)，embeddings为float32的二维数组
+        """
+        if self.vector_store is None:
+            logger.warning("向量库尚未初始化，没有可导出的向量")
+            return
+        
+        store_type = settings.vector_store_type.lower()
+        if store_type == "chroma":
+            collection = self.vector_store._collection
+            total = collection.count()
+            for offset in range(0, total, batch_size):
+                result = collection.get(
+                    include=["embeddings", "documents", "metadatas"],
+                    limit=batch_size,
+                    offset=offset
+                )
+                yield (
+                    result["ids"],
+                    result["documents"],
+                    [m or {} for m in result["metadatas"]],
+                    np.asarray(result["embeddings"], dtype=np.float32)
+                )
+        elif isinstance(self.vector_store, FAISS):
+            index = self.vector_store.index
+            for start in range(0, index.ntotal, batch_size):
+                count = min(batch_size, index.ntotal - start)
+                ids = [self.vector_store.index_to_docstore_id[i] for i in range(start, start + count)]
+                docs = [self.vector_store.docstore.search(doc_id) for doc_id in ids]
+                yield (
+                    ids,
+                    [doc.page_content for doc in docs],
+                    [doc.metadata for doc in docs],
+                    np.asarray(index.reconstruct_n(start, count), dtype=np.float32)
+                )
+        elif store_type == "milvus":
+            store = self.vector_store
+            iterator = store.col.query_iterator(batch_size=batch_size, output_fields=["*"])
+            try:
+                while True:
+                    rows = iterator.next()
+                    if not rows:
+                        break
+                    ids, texts, metadatas, vectors = [], [], [], []
+                    for row in rows:
+                        row = dict(row)
+                        ids.append(str(row.pop(store._primary_field)))
+                        texts.append(row.pop(store._text_field))
+                        vectors.append(row.pop(store._vector_field))
+                        metadatas.append(row)
+                    yield ids, texts, metadatas, np.asarray(vectors, dtype=np.float32)
+            finally:
+                iterator.close()
+        else:
+            raise ValueError(f"不支持导出的向量库类型: {settings.vector_store_type}")
+    
+    def import_embeddings(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]], embeddings: np.ndarray):
+        """
+        直接写入已计算好的向量，不重新做嵌入，用于快照恢复
+        
+        FAISS直接将float32数组加入索引，不做额外拷贝；导入结束后需调用save_imported_embeddings持久化。
+        """
+        if not ids:
+            return
+        
+        store_type = settings.vector_store_type.lower()
+        if store_type == "chroma":
+            if self.vector_store is None:
+                os.makedirs(settings.vector_store_path, exist_ok=True)
+                self.vector_store = Chroma(
+                    persist_directory=settings.vector_store_path,
+                    embedding_function=self.embedding_model
+                )
+            self.vector_store._collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=[m or None for m in metadatas]
+            )
+        elif store_type == "faiss":
+            if self.vector_store is None:
+                import faiss
+                self.vector_store = FAISS(
+                    embedding_function=self.embedding_model,
+                    index=faiss.IndexFlatL2(embeddings.shape[1]),
+                    docstore=InMemoryDocstore(),
+                    index_to_docstore_id={}
+                )
+            start = self.vector_store.index.ntotal
+            self.vector_store.index.add(np.ascontiguousarray(embeddings, dtype=np.float32))
+            self.vector_store.docstore.add({
+                doc_id: Document(page_content=text, metadata=metadata)
+                for doc_id, text, metadata in zip(ids, texts, metadatas)
+            })
+            self.vector_store.index_to_docstore_id.update({start + i: doc_id for i, doc_id in enumerate(ids)})
+        elif store_type == "milvus":
+            if self.vector_store is None:
+                self.vector_store = Milvus(
+                    embedding_function=self.embedding_model,
+                    collection_name=settings.milvus_collection,
+                    connection_args=self._get_milvus_connection_args(),
+                    index_params={
+                        "index_type": settings.milvus_index_type,
+                        "metric_type": settings.milvus_metric_type,
+                        "params": settings.milvus_index_params
+                    },
+                    search_params=settings.milvus_search_params
+                )
+            # Milvus主键由服务端生成，不沿用快照中的id
+            self.vector_store.add_embeddings(
+                texts=texts,
+                embeddings=embeddings.tolist(),
+                metadatas=metadatas
+            )
+        else:
+            raise ValueError(f"不支持导入的向量库类型: {settings.vector_store_type}")
+    
+    def save_imported_embeddings(self):
+        """持久化导入的向量（FAISS需要显式保存到本地，其他类型写入即持久化）"""
+        if isinstance(self.vector_store, FAISS):
+            os.makedirs(settings.vector_store_path, exist_ok=True)
+            with self._write_lock:
+                self.vector_store.save_local(settings.vector_store_path)
@@ -0,0 +1,209 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Dict
+from src.utils import logger
+
+
+class DiskCache:
+    """
+    基于文件系统的JSON缓存
+
+    每个key对应一个文件，按key末两位分目录存放（key以内容哈希结尾，带类型前缀时也能均匀分布）。读取时会刷新文件的修改时间，
+    配置了max_bytes时，总大小在首次写入时扫描一次，之后随写入和删除增量维护；超出上限时才扫描目录，
+    按最近访问时间淘汰最旧的条目，直到低于上限的90%。方法都是同步文件I/O，在事件循环中应放到线程中调用。
+    """
+
+    # 淘汰后保留的容量比例，留出余量避免之后每次写入都触发淘汰
+    EVICT_TARGET_RATIO = 0.9
+
+    def __init__(self, cache_dir: str, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[-2:], f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            # 刷新访问时间，供LRU淘汰使用
+            os.utime(path, None)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取缓存失败({key}): {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.max_bytes:
+            self._ensure_total()
+        # 先写临时文件再替换，避免并发读取到半截内容
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            previous = self._file_size(path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"写入缓存失败({key}): {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if self.max_bytes:
+            with self._lock:
+                self._total += size - previous
+                over_limit = self._total > self.max_bytes
+            if over_limit:
+                self._evict()
+
+    def delete(self, key: str):
+        path = self._path(key)
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total -= size
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _scan(self):
+        """扫描缓存目录，返回[(访问时间, 大小, 路径)]和总大小"""
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        return entries, total
+
+    def _ensure_total(self):
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan()[1]
+
+    def _evict(self):
+        """按访问时间从旧到新删除条目，直到总大小低于上限的EVICT_TARGET_RATIO"""
+        with self._lock:
+            # 重新扫描校正总大小（其他进程也可能写入同一目录）
+            entries, total = self._scan()
+            target = self.max_bytes * self.EVICT_TARGET_RATIO
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                    except FileNotFoundError:
+                        pass
+            self._total = total
+
+
+class TTLCache:
+    """
+    线程安全的内存LRU缓存
+
+    超过max_entries时淘汰最久未使用的条目；设置ttl（秒）时条目过期后视为未命中。
+    设置max_bytes时还按sizeof估算的条目大小限制总量，单个条目超过max_bytes时不缓存。
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None,
+                 max_bytes: Optional[int] = None, sizeof: Optional[Callable[[Any], int]] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value, _ = item
+            if expires_at is not None and expires_at < time.monotonic():
+                self._pop(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Any, value: Any):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self.sizeof(value) if self.max_bytes and self.sizeof else 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            self._data[key] = (expires_at, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def _pop(self, key: Any):
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+
+    def invalidate(self, key: Any):
+        with self._lock:
+            self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0
+            }
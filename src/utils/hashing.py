@@ -0,0 +1,15 @@
+import hashlib
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """计算文件内容的SHA256，用作内容寻址缓存的key"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def compute_text_hash(text: str) -> str:
+    """计算文本内容的SHA256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -0,0 +1,55 @@
+import math
+import re
+from typing import List, Optional
+from src.utils import logger
+
+# CJK汉字、标点和全角字符，大多数分词器中每个字符约占一个token
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数：CJK字符每个按1个token计，其余字符按每4个字符1个token计"""
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+class TokenCounter:
+    """
+    文本token计数器
+
+    配置了tokenizer（HuggingFace模型名或本地路径，应与Ollama中的模型一致）时使用它实际分词计数，
+    未配置或加载失败（未安装transformers、无法下载等）时退化为estimate_tokens估算。
+    """
+
+    def __init__(self, tokenizer_name: Optional[str] = None):
+        self.tokenizer = None
+        if tokenizer_name:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+                logger.info(f"使用tokenizer计算token数: {tokenizer_name}")
+            except Exception as e:
+                logger.warning(f"加载tokenizer失败({tokenizer_name})，将使用估算的token数: {str(e)}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.tokenizer is None:
+            return estimate_tokens(text)
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+
+    def split(self, text: str, max_tokens: int) -> List[str]:
+        """将文本按max_tokens切成多段，用于无法按段落和句子切分的超长文本"""
+        if max_tokens <= 0:
+            return [text]
+        if self.tokenizer is not None:
+            ids = self.tokenizer.encode(text, add_special_tokens=False)
+            return [self.tokenizer.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
+        # 估算时按平均每token的字符数切分
+        tokens = estimate_tokens(text)
+        if tokens <= max_tokens:
+            return [text]
+        size = max(1, len(text) * max_tokens // tokens)
+        return [text[i:i + size] for i in range(0, len(text), size)]
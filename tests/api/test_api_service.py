@@ -2,7 +2,7 @@ import pytest
 from fastapi.testclient import TestClient
 import uuid
 import os
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 
 from src.api.api_service import app, RAGSystem
 from src.config import settings
@@ -13,6 +13,8 @@ client = TestClient(app)
 def mock_rag_system():
     """创建模拟的RAG系统组件"""
     with patch('src.api.api_service.rag_system') as mock_system:
+        # 图存储是异步的，方法需要可await
+        mock_system.graph_store = AsyncMock()
         yield mock_system
 
 def test_get_document_success(mock_rag_system):
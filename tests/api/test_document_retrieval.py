@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -98,4 +99,52 @@ def test_get_all_document_summaries(client):
             "status": "success",
             "count": len(test_summaries),
             "summaries": test_summaries
-        }
\ No newline at end of file
+        }
+
+
+def test_get_document_paginated(client, fixed_uuid, tmp_path):
+    """测试按游标分页获取文档片段"""
+    test_metadata = {
+        "doc_id": fixed_uuid,
+        "filename": "test_document.pdf",
+        "doc_dir": str(tmp_path)
+    }
+    test_page = [
+        {"chunk_id": f"{fixed_uuid}_chunk_2", "chunk_index": 2},
+        {"chunk_id": f"{fixed_uuid}_chunk_3", "chunk_index": 3}
+    ]
+
+    with patch('src.api.api_service.rag_system.graph_store.get_document_metadata', return_value=test_metadata), \
+         patch('src.api.api_service.rag_system.graph_store.get_document_chunks_page', return_value=(test_page, 3)) as mock_page, \
+         patch('src.api.api_service.rag_system.doc_processor.get_document_summary', return_value=None):
+
+        response = client.get(f"/documents/{fixed_uuid}?cursor=1&limit=2&exclude_fields=content")
+
+        assert response.status_code == 200
+        assert response.json()["chunks"] == test_page
+        assert response.json()["next_cursor"] == 3
+        mock_page.assert_called_once_with(
+            fixed_uuid,
+            cursor=1,
+            limit=2,
+            fields=None,
+            exclude=['source', 'doc_id', 'content']
+        )
+
+def test_stream_document_chunks(client, fixed_uuid, tmp_path):
+    """测试以NDJSON流的形式获取文档片段"""
+    test_metadata = {"doc_id": fixed_uuid, "doc_dir": str(tmp_path)}
+    pages = [
+        ([{"chunk_id": f"{fixed_uuid}_chunk_0", "chunk_index": 0}], 0),
+        ([{"chunk_id": f"{fixed_uuid}_chunk_1", "chunk_index": 1}], None)
+    ]
+
+    with patch('src.api.api_service.rag_system.graph_store.get_document_metadata', return_value=test_metadata), \
+         patch('src.api.api_service.rag_system.graph_store.get_document_chunks_page', side_effect=pages):
+
+        response = client.get(f"/documents/{fixed_uuid}/chunks/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["chunk_index"] for line in lines] == [0, 1]
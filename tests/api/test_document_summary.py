@@ -15,12 +15,14 @@ async def test_document_summary_generation(client, test_file, fixed_uuid, mock_d
     
     with patch('uuid.uuid4', return_value=uuid.UUID(fixed_uuid)), \
          patch('src.api.api_service.rag_system.doc_processor.load_document', return_value=mock_documents), \
-         patch('src.api.api_service.rag_system.doc_processor.summarizer.summarize_documents', return_value=mock_summary), \
+         patch('src.api.api_service.rag_system.doc_processor.summarizer.summarize_documents_with_status', return_value=(mock_summary, False)), \
          patch('src.api.api_service.rag_system.doc_processor.store.save_document_summary', return_value=True) as mock_save_summary, \
          patch('src.api.api_service.rag_system.doc_processor.process_document', return_value=mock_documents), \
          patch('src.api.api_service.rag_system.vectorizer.initialize_vector_store'), \
          patch('src.api.api_service.rag_system.graph_store.create_document_node'), \
-         patch('src.api.api_service.rag_system.graph_store.create_chunk_node'):
+         patch('src.api.api_service.rag_system.graph_store.create_chunk_nodes'), \
+         patch('src.api.api_service._get_chunk_embeddings', return_value=None), \
+         patch('src.api.api_service.rag_system.summary_scheduler', None):
         
         # 发送上传请求
         with open(test_file, "rb") as f:
@@ -32,7 +34,8 @@ async def test_document_summary_generation(client, test_file, fixed_uuid, mock_d
         # 验证响应状态码
         assert response.status_code == 200
         response_data = response.json()
-        assert response_data["summary_generated"] == True
+        # 未启用后台调度时在返回前生成摘要
+        assert response_data["summary_status"] == "completed"
         
         # 验证摘要是否被保存到数据库
         mock_save_summary.assert_called_once_with(fixed_uuid, "test_document.txt", mock_summary)
@@ -42,11 +45,13 @@ async def test_document_summary_generation_failure(client, test_file, fixed_uuid
     """测试文档摘要生成失败的情况"""
     with patch('uuid.uuid4', return_value=uuid.UUID(fixed_uuid)), \
          patch('src.api.api_service.rag_system.doc_processor.load_document', return_value=mock_documents), \
-         patch('src.api.api_service.rag_system.doc_processor.summarizer.summarize_documents', return_value="摘要生成失败"), \
+         patch('src.api.api_service.rag_system.doc_processor.summarizer.summarize_documents_with_status', return_value=("摘要生成失败", True)), \
          patch('src.api.api_service.rag_system.doc_processor.process_document', return_value=mock_documents), \
          patch('src.api.api_service.rag_system.vectorizer.initialize_vector_store'), \
          patch('src.api.api_service.rag_system.graph_store.create_document_node'), \
-         patch('src.api.api_service.rag_system.graph_store.create_chunk_node'):
+         patch('src.api.api_service.rag_system.graph_store.create_chunk_nodes'), \
+         patch('src.api.api_service._get_chunk_embeddings', return_value=None), \
+         patch('src.api.api_service.rag_system.summary_scheduler', None):
         
         # 发送上传请求
         with open(test_file, "rb") as f:
@@ -58,7 +63,7 @@ async def test_document_summary_generation_failure(client, test_file, fixed_uuid
         # 验证响应状态码
         assert response.status_code == 200
         response_data = response.json()
-        assert response_data["summary_generated"] == False
+        assert response_data["summary_status"] == "failed"
 
 @pytest.mark.asyncio
 async def test_document_summary_direct_generation(test_file_with_content):
@@ -75,7 +80,7 @@ async def test_document_summary_direct_generation(test_file_with_content):
     doc_processor = DocumentProcessor()
     
     with patch.object(doc_processor, 'load_document', return_value=mock_documents), \
-         patch.object(doc_processor.summarizer, 'summarize_documents', return_value=mock_summary), \
+         patch.object(doc_processor.summarizer, 'summarize_documents_with_status', return_value=(mock_summary, False)), \
          patch.object(doc_processor.store, 'save_document_summary', return_value=True) as mock_save_summary:
         
         # 生成摘要
@@ -85,4 +90,39 @@ async def test_document_summary_direct_generation(test_file_with_content):
         
         # 验证结果
         assert summary == mock_summary
-        mock_save_summary.assert_called_once_with(doc_id, filename, mock_summary)
\ No newline at end of file
+        mock_save_summary.assert_called_once_with(doc_id, filename, mock_summary)
+
+@pytest.mark.asyncio
+async def test_degraded_summary_is_not_saved(test_file_with_content):
+    """测试部分块摘要失败（含占位文本）的摘要不保存，返回None"""
+    mock_documents = [
+        Document(page_content="测试文档内容", metadata={"source": test_file_with_content})
+    ]
+    doc_processor = DocumentProcessor()
+    degraded_summary = "部分1:\n第一部分摘要\n\n部分2:\n[此部分摘要生成失败]"
+
+    with patch.object(doc_processor, 'load_document', return_value=mock_documents), \
+         patch.object(doc_processor.summarizer, 'summarize_documents_with_status',
+                      return_value=(degraded_summary, True)), \
+         patch.object(doc_processor.store, 'save_document_summary', return_value=True) as mock_save_summary:
+
+        summary = await doc_processor.generate_document_summary(test_file_with_content, "test-doc-id", "test_document.txt")
+
+        assert summary is None
+        mock_save_summary.assert_not_called()
+
+async def test_summary_status_not_scheduled(client, fixed_uuid, tmp_path):
+    """测试调度器中没有记录、也没有摘要的已入库文档返回not_scheduled，不存在的文档返回404"""
+    test_metadata = {"doc_id": fixed_uuid, "filename": "test_document.txt", "doc_dir": str(tmp_path)}
+    with patch('src.api.api_service.rag_system.summary_scheduler', None), \
+         patch('src.api.api_service.rag_system.doc_processor.get_document_summary', return_value=None), \
+         patch('src.api.api_service.rag_system.graph_store.get_document_metadata', return_value=test_metadata):
+        response = client.get(f"/documents/{fixed_uuid}/summary/status")
+        assert response.status_code == 200
+        assert response.json() == {"doc_id": fixed_uuid, "status": "not_scheduled"}
+
+    with patch('src.api.api_service.rag_system.summary_scheduler', None), \
+         patch('src.api.api_service.rag_system.doc_processor.get_document_summary', return_value=None), \
+         patch('src.api.api_service.rag_system.graph_store.get_document_metadata', return_value=None):
+        response = client.get(f"/documents/{fixed_uuid}/summary/status")
+        assert response.status_code == 404
@@ -15,9 +15,12 @@ async def test_upload_document(client, test_file, fixed_uuid, mock_documents):
              patch('src.api.api_service.rag_system.vectorizer.initialize_vector_store') as mock_initialize_vector_store, \
              patch('src.api.api_service.rag_system.doc_processor.generate_document_summary') as mock_generate_summary, \
              patch('src.api.api_service.rag_system.graph_store.create_document_node') as mock_create_document_node, \
-             patch('src.api.api_service.rag_system.graph_store.create_chunk_node') as mock_create_chunk_node:
+             patch('src.api.api_service.rag_system.graph_store.create_chunk_nodes') as mock_create_chunk_nodes, \
+             patch('src.api.api_service._get_chunk_embeddings', return_value=None), \
+             patch('src.api.api_service.rag_system.summary_scheduler.submit') as mock_submit_summary:
             
             mock_process_document.return_value = mock_documents
+            mock_submit_summary.return_value = {"doc_id": fixed_uuid, "status": "queued"}
             mock_generate_summary.return_value = "这是测试文档的摘要"
             
             # 打开测试文件并发送上传请求
@@ -33,7 +36,8 @@ async def test_upload_document(client, test_file, fixed_uuid, mock_documents):
             assert response_data["status"] == "success"
             assert response_data["doc_id"] == fixed_uuid
             assert response_data["chunks_count"] == len(mock_documents)
-            assert response_data["summary_generated"] == True
+            # 文档可检索后立即返回，摘要在后台排队生成
+            assert response_data["summary_status"] == "queued"
             
             # 验证文件是否保存到原始文档目录
             expected_file_path = os.path.join(
@@ -45,9 +49,14 @@ async def test_upload_document(client, test_file, fixed_uuid, mock_documents):
             # 验证各个模拟函数是否被正确调用
             mock_process_document.assert_called_once()
             mock_initialize_vector_store.assert_called_once_with(mock_documents)
-            mock_generate_summary.assert_called_once()
+            mock_generate_summary.assert_not_called()
+            mock_submit_summary.assert_called_once()
+            assert mock_submit_summary.call_args.kwargs["priority"] == "normal"
             mock_create_document_node.assert_called_once()
-            assert mock_create_chunk_node.call_count == len(mock_documents)
+            mock_create_chunk_nodes.assert_called_once()
+            chunk_doc_id, chunk_rows = mock_create_chunk_nodes.call_args.args
+            assert chunk_doc_id == fixed_uuid
+            assert [row["chunk_id"] for row in chunk_rows] == [f"{fixed_uuid}_chunk_{i}" for i in range(len(mock_documents))]
 
 @pytest.mark.asyncio
 async def test_upload_document_error_handling(client, test_file):
@@ -94,4 +103,25 @@ async def test_upload_unsupported_file_type(client, cleanup_temp_files):
     finally:
         # 清理测试文件
         if os.path.exists(unsupported_file):
-            os.remove(unsupported_file)
\ No newline at end of file
+            os.remove(unsupported_file)
+@pytest.mark.asyncio
+async def test_build_chunk_rows_numbers_table_chunks_apart():
+    """测试表格片段按表格分段编号，不与正文片段连续"""
+    from langchain_core.documents import Document
+    from src.api.api_service import build_chunk_rows, TABLE_CHUNK_INDEX_BASE
+
+    documents = [
+        Document(page_content="正文1", metadata={}),
+        Document(page_content="正文2", metadata={}),
+        Document(page_content="表格0-1", metadata={"content_type": "table", "table_index": 0}),
+        Document(page_content="表格0-2", metadata={"content_type": "table", "table_index": 0}),
+        Document(page_content="表格1", metadata={"content_type": "table", "table_index": 1})
+    ]
+
+    rows = build_chunk_rows("doc1", documents)
+
+    assert [row["metadata"]["chunk_index"] for row in rows] == [
+        0, 1, TABLE_CHUNK_INDEX_BASE, TABLE_CHUNK_INDEX_BASE + 1, 2 * TABLE_CHUNK_INDEX_BASE
+    ]
+    assert rows[2]["chunk_id"] == f"doc1_chunk_{TABLE_CHUNK_INDEX_BASE}"
+    assert documents[4].metadata["chunk_index"] == 2 * TABLE_CHUNK_INDEX_BASE
@@ -0,0 +1,73 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from src.api.api_service import app
+
+client = TestClient(app)
+
+TEST_CONTEXT = [{"content": "票据系统的说明", "metadata": {"chunk_id": "doc1_chunk_0"}}]
+
+
+@pytest.fixture
+def mock_llm_service():
+    """模拟检索、上下文扩展和LLM，流式回答依次输出两个片段"""
+    async def stream_answer(question, context):
+        for token in ["票据", "系统"]:
+            yield token
+
+    llm = MagicMock()
+    llm.stream_answer = stream_answer
+    expander = MagicMock()
+    expander.expand = AsyncMock(side_effect=lambda context, window: context)
+    with patch('src.api.llm_service.vectorizer') as vectorizer, \
+         patch('src.api.llm_service.context_expander', expander), \
+         patch('src.api.llm_service.context_packer', None), \
+         patch('src.api.llm_service.llm', llm):
+        vectorizer.hybrid_search.return_value = TEST_CONTEXT
+        yield llm
+
+
+def test_question_stream_ndjson_event_order(mock_llm_service):
+    """测试默认以NDJSON返回，事件顺序为context、token、done"""
+    response = client.post("/llm/question/stream", json={"question": "什么是票据系统"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [event["type"] for event in events] == ["context", "token", "token", "done"]
+    assert events[0]["context"] == TEST_CONTEXT
+    assert "".join(event["content"] for event in events if event["type"] == "token") == "票据系统"
+
+
+def test_question_stream_sse_framing(mock_llm_service):
+    """测试请求头Accept为text/event-stream时按SSE格式返回事件"""
+    response = client.post(
+        "/llm/question/stream",
+        json={"question": "什么是票据系统"},
+        headers={"Accept": "text/event-stream"}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [frame for frame in response.text.split("\n\n") if frame]
+    assert [frame.splitlines()[0] for frame in frames] == [
+        "event: context", "event: token", "event: token", "event: done"
+    ]
+    assert json.loads(frames[1].splitlines()[1][len("data: "):]) == {"type": "token", "content": "票据"}
+
+
+def test_question_stream_error_event(mock_llm_service):
+    """测试生成过程中出错时以error事件结束"""
+    async def failing_stream(question, context):
+        yield "票据"
+        raise RuntimeError("模型不可用")
+
+    mock_llm_service.stream_answer = failing_stream
+    response = client.post("/llm/question/stream", json={"question": "什么是票据系统"})
+
+    assert response.status_code == 200
+    events = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [event["type"] for event in events] == ["context", "token", "error"]
+    assert events[-1]["detail"] == "模型不可用"
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock
+from src.models.retrieval.context_expander import ContextExpander
+
+
+def _hit(chunk_id, content):
+    return {"content": content, "metadata": {"chunk_id": chunk_id}, "final_score": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_expand_with_neighbors():
+    """测试按相邻片段扩展检索结果"""
+    graph_store = AsyncMock()
+    graph_store.get_neighbor_chunks.return_value = {
+        "doc_chunk_1": [
+            {"chunk_id": "doc_chunk_0", "chunk_index": 0, "content": "第一段"},
+            {"chunk_id": "doc_chunk_1", "chunk_index": 1, "content": "第二段"},
+            {"chunk_id": "doc_chunk_2", "chunk_index": 2, "content": "第三段"}
+        ]
+    }
+    expander = ContextExpander(graph_store)
+
+    result = await expander.expand([_hit("doc_chunk_1", "第二段"), _hit("other_chunk_0", "其他")], window=1)
+
+    graph_store.get_neighbor_chunks.assert_called_once_with(["doc_chunk_1", "other_chunk_0"], 1)
+    assert result[0]["content"] == "第一段\n第二段\n第三段"
+    assert result[0]["expanded_chunk_ids"] == ["doc_chunk_0", "doc_chunk_1", "doc_chunk_2"]
+    assert result[0]["expanded_chunk_range"] == [0, 2]
+    assert result[0]["final_score"] == 0.5
+    # 图中没有相邻片段的结果保持不变
+    assert result[1] == _hit("other_chunk_0", "其他")
+
+
+@pytest.mark.asyncio
+async def test_expand_disabled_or_without_chunk_ids():
+    """测试不扩展或检索结果缺少chunk_id的情况"""
+    graph_store = AsyncMock()
+    expander = ContextExpander(graph_store)
+    hits = [{"content": "内容", "metadata": {"source": "a.txt"}}]
+
+    assert await expander.expand(hits, window=0) == hits
+    assert await expander.expand(hits, window=2) == hits
+    graph_store.get_neighbor_chunks.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_expand_removes_chunk_overlap():
+    """测试拼接相邻片段时去掉分块重叠产生的重复文字"""
+    graph_store = AsyncMock()
+    graph_store.get_neighbor_chunks.return_value = {
+        "doc_chunk_1": [
+            {"chunk_id": "doc_chunk_0", "chunk_index": 0, "content": "票据系统用于管理电子票据的开具"},
+            {"chunk_id": "doc_chunk_1", "chunk_index": 1, "content": "管理电子票据的开具、查验和归档"},
+            {"chunk_id": "doc_chunk_2", "chunk_index": 2, "content": "下一节介绍接口"}
+        ]
+    }
+    expander = ContextExpander(graph_store)
+
+    result = await expander.expand([_hit("doc_chunk_1", "管理电子票据的开具、查验和归档")], window=1)
+
+    assert result[0]["content"] == "票据系统用于管理电子票据的开具、查验和归档\n下一节介绍接口"
@@ -0,0 +1,82 @@
+from src.models.retrieval.context_packer import ContextPacker
+
+
+def _hit(doc_id, index, content, score):
+    return {
+        "content": content,
+        "metadata": {"doc_id": doc_id, "chunk_id": f"{doc_id}_chunk_{index}", "chunk_index": index},
+        "final_score": score
+    }
+
+
+def test_adjacent_chunks_are_merged_without_overlap():
+    """测试同一文档中相邻的片段合并为一段，并去掉分块重叠产生的重复文字"""
+    packer = ContextPacker(token_budget=1000, dedup_threshold=0.8)
+    hits = [
+        _hit("doc-a", 3, "票据交易系统负责承兑和贴现业务。系统支持多法人管理", 0.9),
+        _hit("doc-b", 0, "向量数据库用于存储文档片段的向量", 0.8),
+        _hit("doc-a", 2, "清算中心已具备集中接入资质。票据交易系统负责承兑", 0.7)
+    ]
+
+    packed, stats = packer.pack(hits)
+
+    assert [item["content"] for item in packed] == [
+        "清算中心已具备集中接入资质。票据交易系统负责承兑和贴现业务。系统支持多法人管理",
+        "向量数据库用于存储文档片段的向量"
+    ]
+    # 合并后的结果使用排名最靠前的片段的元数据
+    assert packed[0]["final_score"] == 0.9
+    assert packed[0]["merged_chunk_ids"] == ["doc-a_chunk_2", "doc-a_chunk_3"]
+    assert stats["merged"] == 1
+    assert stats["saved_tokens"] == stats["original_tokens"] - stats["packed_tokens"] > 0
+
+
+def test_near_duplicates_are_dropped():
+    """测试内容几乎都出现在排名更靠前的结果中的片段被丢弃"""
+    packer = ContextPacker(token_budget=1000, dedup_threshold=0.8)
+    text = "上海票据交易所的票据交易系统直连接口功能将于2018年1月上线"
+    hits = [
+        _hit("doc-a", 0, text, 0.9),
+        _hit("doc-b", 5, text + "。", 0.8),
+        _hit("doc-c", 1, "系统采用参数化设计和管理", 0.7)
+    ]
+
+    packed, stats = packer.pack(hits)
+
+    assert [item["metadata"]["doc_id"] for item in packed] == ["doc-a", "doc-c"]
+    assert stats["deduplicated"] == 1
+
+
+def test_budget_is_filled_in_score_order():
+    """测试按得分顺序放入token预算，放不下的跳过，单独超出预算的首个结果被截断"""
+    packer = ContextPacker(token_budget=30, dedup_threshold=0.8)
+    hits = [
+        _hit("doc-a", 0, "甲" * 20, 0.9),
+        _hit("doc-b", 0, "乙" * 20, 0.8),
+        _hit("doc-c", 0, "丙" * 10, 0.7)
+    ]
+
+    packed, stats = packer.pack(hits)
+    assert [item["content"] for item in packed] == ["甲" * 20, "丙" * 10]
+    assert stats["dropped"] == 1
+    assert stats["packed_tokens"] == 30
+
+    packed, _ = ContextPacker(token_budget=10, dedup_threshold=0.8).pack(hits[:1])
+    assert packed[0]["content"] == "甲" * 10
+
+
+def test_expanded_hits_are_merged_by_range():
+    """测试经过上下文扩展的结果按扩展后的范围合并，重叠的相邻片段只保留一份"""
+    packer = ContextPacker(token_budget=1000, dedup_threshold=0.8)
+    first = {**_hit("doc-a", 1, "第一段内容\n第二段内容\n第三段内容", 0.9),
+             "expanded_chunk_ids": ["doc-a_chunk_0", "doc-a_chunk_1", "doc-a_chunk_2"],
+             "expanded_chunk_range": [0, 2]}
+    second = {**_hit("doc-a", 2, "第二段内容\n第三段内容\n第四段内容", 0.8),
+              "expanded_chunk_ids": ["doc-a_chunk_1", "doc-a_chunk_2", "doc-a_chunk_3"],
+              "expanded_chunk_range": [1, 3]}
+
+    packed, _ = packer.pack([first, second])
+
+    assert len(packed) == 1
+    assert packed[0]["content"] == "第一段内容\n第二段内容\n第三段内容\n第四段内容"
+    assert packed[0]["merged_chunk_ids"] == ["doc-a_chunk_0", "doc-a_chunk_1", "doc-a_chunk_2", "doc-a_chunk_3"]
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+from datetime import datetime
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("faiss")
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.config import settings
+from src.models.graph.sqlite_graph_store import SQLiteGraphStore
+from src.models.snapshot.corpus_snapshot import CorpusSnapshot
+from src.models.storage.sqlite_store import SQLiteStore
+from src.models.vectorization.vectorizer import Vectorizer
+
+TEXTS = ["票据系统的说明", "票据的开具流程", "电子票据的查验"]
+
+
+def _vectorizer(vector_store=None):
+    """不加载嵌入和重排模型的Vectorizer"""
+    vectorizer = Vectorizer.__new__(Vectorizer)
+    vectorizer.embedding_model = DeterministicFakeEmbedding(size=8)
+    vectorizer.reranker = None
+    vectorizer.vector_store = vector_store
+    vectorizer._write_lock = threading.Lock()
+    return vectorizer
+
+
+def _summary_store(monkeypatch, path):
+    monkeypatch.setattr(settings, "sqlite_db_path", str(path))
+    return SQLiteStore()
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    """从FAISS向量库、SQLite图存储和SQLite摘要存储导出快照"""
+    monkeypatch.setattr(settings, "vector_store_type", "faiss")
+    monkeypatch.setattr(settings, "use_ollama", False)
+    monkeypatch.setattr(settings, "embedding_model", "test-embedding")
+
+    vector_store = FAISS.from_texts(
+        TEXTS, DeterministicFakeEmbedding(size=8),
+        metadatas=[{"chunk_id": f"doc1_chunk_{i}", "chunk_index": i} for i in range(len(TEXTS))]
+    )
+    graph_store = SQLiteGraphStore(str(tmp_path / "source_graph.db"))
+
+    async def write_graph():
+        await graph_store.create_document_node("doc1", {"doc_id": "doc1", "filename": "票据.txt"})
+        await graph_store.create_chunk_nodes("doc1", [
+            {"chunk_id": f"doc1_chunk_{i}", "content": text,
+             "metadata": {"chunk_id": f"doc1_chunk_{i}", "doc_id": "doc1", "chunk_index": i}}
+            for i, text in enumerate(TEXTS)
+        ])
+
+    asyncio.run(write_graph())
+    store = _summary_store(monkeypatch, tmp_path / "source_summaries.db")
+    store.restore_summary_rows([{
+        "doc_id": "doc1",
+        "filename": "票据.txt",
+        "summary": "票据系统" * 100,
+        "created_at": datetime(2025, 4, 1),
+        "updated_at": datetime(2025, 4, 2)
+    }])
+
+    output_dir = str(tmp_path / "snapshot")
+    counts = CorpusSnapshot(_vectorizer(vector_store), graph_store, store, batch_size=2).export(output_dir)
+    store.close()
+
+    assert counts == {"vectors": 3, "documents": 1, "chunks": 3, "relationships": 5, "summaries": 1}
+    return output_dir, vector_store
+
+
+def test_snapshot_round_trip(snapshot_dir, tmp_path, monkeypatch):
+    """测试快照导入后向量（不重新计算嵌入）、图数据和摘要与导出前一致，摘要预览在导入时重新生成"""
+    output_dir, source_vector_store = snapshot_dir
+    monkeypatch.setattr(settings, "vector_store_path", str(tmp_path / "target_vectors"))
+    vectorizer = _vectorizer()
+    graph_store = SQLiteGraphStore(str(tmp_path / "target_graph.db"))
+    store = _summary_store(monkeypatch, tmp_path / "target_summaries.db")
+
+    counts = CorpusSnapshot(vectorizer, graph_store, store, batch_size=2).restore(output_dir)
+
+    assert counts == {"documents": 1, "chunks": 3, "relationships": 5, "vectors": 3, "summaries": 1}
+    # 向量原样写入并保存到本地
+    index = vectorizer.vector_store.index
+    np.testing.assert_array_equal(index.reconstruct_n(0, index.ntotal),
+                                  source_vector_store.index.reconstruct_n(0, 3))
+    assert [doc.page_content for doc in vectorizer.vector_store.similarity_search(TEXTS[1], k=1)] == [TEXTS[1]]
+    assert os.path.exists(tmp_path / "target_vectors" / "index.faiss")
+
+    async def read_graph():
+        return (await graph_store.get_document_chunks("doc1"),
+                await graph_store.get_neighbor_chunks(["doc1_chunk_1"], 1))
+
+    chunks, neighbors = asyncio.run(read_graph())
+    assert [chunk["content"] for chunk in chunks] == TEXTS
+    assert [chunk["chunk_index"] for chunk in neighbors["doc1_chunk_1"]] == [0, 1, 2]
+
+    summary = store.get_document_summary("doc1")
+    assert summary["summary"] == "票据系统" * 100
+    assert summary["created_at"] == datetime(2025, 4, 1)
+    # 快照中不保存preview，导入时按摘要重新生成
+    page = store.get_paginated_summaries(1, 10, fields=["doc_id", "preview"])
+    assert page["summaries"][0]["preview"] == store._summary_preview("票据系统" * 100)
+    store.close()
+
+
+def test_snapshot_refuses_other_embedding_model(snapshot_dir, tmp_path, monkeypatch):
+    """测试当前配置的嵌入模型与快照不一致时拒绝导入，不写入任何数据"""
+    output_dir, _ = snapshot_dir
+    monkeypatch.setattr(settings, "embedding_model", "other-embedding")
+    vectorizer = _vectorizer()
+    graph_store = SQLiteGraphStore(str(tmp_path / "target_graph.db"))
+    store = _summary_store(monkeypatch, tmp_path / "target_summaries.db")
+
+    with pytest.raises(ValueError):
+        CorpusSnapshot(vectorizer, graph_store, store).restore(output_dir)
+
+    assert vectorizer.vector_store is None
+    assert asyncio.run(graph_store.list_documents()) == []
+    assert store.get_document_summary("doc1") is None
+    store.close()
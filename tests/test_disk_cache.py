@@ -0,0 +1,50 @@
+import os
+import time
+from src.utils.cache import DiskCache
+
+
+def test_disk_cache_set_and_get(tmp_path):
+    """测试磁盘缓存的读写"""
+    cache = DiskCache(str(tmp_path))
+    assert cache.get("missing") is None
+
+    cache.set("abc123", [{"page_content": "测试内容", "metadata": {"page": 1}}])
+    assert cache.get("abc123") == [{"page_content": "测试内容", "metadata": {"page": 1}}]
+
+    cache.delete("abc123")
+    assert cache.get("abc123") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """测试超出容量后按最近访问时间淘汰"""
+    value = "x" * 100
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+
+    cache.set("aa1", value)
+    cache.set("bb2", value)
+    # 将aa1的访问时间设为更早，然后读取bb2使其成为最近使用
+    old = time.time() - 100
+    os.utime(cache._path("aa1"), (old, old))
+    assert cache.get("bb2") == value
+
+    cache.set("cc3", value)
+
+    assert cache.get("aa1") is None
+    assert cache.get("bb2") == value
+    assert cache.get("cc3") == value
+
+
+def test_disk_cache_tracks_size_without_scanning(tmp_path, monkeypatch):
+    """测试总大小增量维护：首次写入时扫描一次，未超出容量时不再扫描目录"""
+    cache = DiskCache(str(tmp_path), max_bytes=10_000)
+    scans = []
+    original_scan = cache._scan
+    monkeypatch.setattr(cache, "_scan", lambda: scans.append(1) or original_scan())
+
+    for i in range(20):
+        cache.set(f"key{i:02d}", "x" * 100)
+    cache.set("key00", "x" * 50)
+    cache.delete("key01")
+
+    assert len(scans) == 1
+    assert cache._total == sum(os.path.getsize(cache._path(f"key{i:02d}")) for i in range(20) if i != 1)
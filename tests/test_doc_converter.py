@@ -0,0 +1,46 @@
+from unittest.mock import patch
+from langchain_community.docstore.document import Document
+from src.config import settings
+from src.models.conversion import doc_converter
+from src.models.conversion.doc_converter import DocConverter
+
+
+def test_conversion_cache_is_per_mode(tmp_path, monkeypatch):
+    """测试两种转换方式的结果分别缓存，切换转换方式后不会读到另一种方式的结果"""
+    monkeypatch.setattr(settings, "conversion_cache_path", str(tmp_path / "cache"))
+    file_path = tmp_path / "test.doc"
+    file_path.write_bytes(b"doc content")
+    converter = DocConverter()
+
+    with patch.object(doc_converter, "UnstructuredFileLoader") as loader, \
+         patch.object(converter, "_convert_with_server", return_value=[Document(page_content="常驻转换")]) as server:
+        loader.return_value.load.return_value = [Document(page_content="逐文件转换")]
+
+        monkeypatch.setattr(settings, "doc_converter_mode", "per_file")
+        assert converter.load(str(file_path))[0].page_content == "逐文件转换"
+        monkeypatch.setattr(settings, "doc_converter_mode", "persistent")
+        assert converter.load(str(file_path))[0].page_content == "常驻转换"
+        # 再次加载时命中各自的缓存
+        assert converter.load(str(file_path))[0].page_content == "常驻转换"
+        monkeypatch.setattr(settings, "doc_converter_mode", "per_file")
+        assert converter.load(str(file_path))[0].page_content == "逐文件转换"
+
+    assert loader.return_value.load.call_count == 1
+    assert server.call_count == 1
+
+
+def test_fallback_result_is_not_cached_as_persistent(tmp_path, monkeypatch):
+    """测试常驻转换失败回退到逐文件转换时，结果只作为逐文件转换的缓存"""
+    monkeypatch.setattr(settings, "conversion_cache_path", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "doc_converter_mode", "persistent")
+    file_path = tmp_path / "test.doc"
+    file_path.write_bytes(b"doc content")
+    converter = DocConverter()
+
+    with patch.object(doc_converter, "UnstructuredFileLoader") as loader, \
+         patch.object(converter, "_convert_with_server", side_effect=[RuntimeError("unoserver不可用"),
+                                                                     [Document(page_content="常驻转换")]]):
+        loader.return_value.load.return_value = [Document(page_content="逐文件转换")]
+
+        assert converter.load(str(file_path))[0].page_content == "逐文件转换"
+        assert converter.load(str(file_path))[0].page_content == "常驻转换"
@@ -0,0 +1,95 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+from src.utils.cache import TTLCache
+from src.models.graph.cached_graph_store import CachedGraphStore
+
+
+def test_ttl_cache_lru_eviction_and_stats():
+    """测试超出容量后淘汰最久未使用的条目，并统计命中率"""
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    """测试条目过期后视为未命中"""
+    cache = TTLCache(max_entries=10, ttl=0.05)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_cached_graph_store_read_through_and_invalidation():
+    """测试读缓存命中，以及写入片段后对应文档的缓存失效"""
+    store = AsyncMock()
+    store.get_document_metadata.return_value = {"doc_id": "doc1"}
+    store.get_document_chunks.return_value = [{"chunk_id": "doc1_chunk_0"}]
+    cached = CachedGraphStore(store, max_entries=10)
+
+    async def run():
+        for _ in range(3):
+            assert await cached.get_document_metadata("doc1") == {"doc_id": "doc1"}
+            assert await cached.get_document_chunks("doc1") == [{"chunk_id": "doc1_chunk_0"}]
+        await cached.create_chunk_nodes("doc1", [{"chunk_id": "doc1_chunk_1"}])
+        await cached.get_document_chunks("doc1")
+
+    asyncio.run(run())
+
+    assert store.get_document_metadata.await_count == 1
+    assert store.get_document_chunks.await_count == 2
+    assert cached.cache_stats()["metadata"]["hits"] == 2
+
+
+def test_cached_graph_store_does_not_cache_missing_document():
+    """测试不存在的文档不会被缓存"""
+    store = AsyncMock()
+    store.get_document_metadata.return_value = None
+    cached = CachedGraphStore(store, max_entries=10)
+
+    async def run():
+        await cached.get_document_metadata("missing")
+        await cached.get_document_metadata("missing")
+
+    asyncio.run(run())
+    assert store.get_document_metadata.await_count == 2
+
+
+def test_ttl_cache_bounded_by_bytes():
+    """测试按条目大小限制总量：超出时淘汰最旧的条目，单个条目超出上限时不缓存"""
+    cache = TTLCache(max_entries=10, max_bytes=10, sizeof=len)
+    cache.set("a", "12345")
+    cache.set("b", "12345")
+    cache.set("c", "123")
+    assert cache.get("a") is None
+    assert cache.get("b") == "12345"
+
+    cache.set("big", "x" * 11)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_cached_graph_store_skips_documents_over_byte_limit():
+    """测试片段总量超过上限的文档不进入缓存"""
+    store = AsyncMock()
+    store.get_document_chunks.return_value = [{"chunk_id": "doc1_chunk_0", "content": "内容" * 100}]
+    cached = CachedGraphStore(store, max_entries=10, max_chunk_bytes=100)
+
+    async def run():
+        await cached.get_document_chunks("doc1")
+        await cached.get_document_chunks("doc1")
+
+    asyncio.run(run())
+
+    assert store.get_document_chunks.await_count == 2
@@ -0,0 +1,200 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.config import settings
+from src.models.llm.response_cache import LLMResponseCache
+from src.models.summarization.document_summarizer import DocumentSummarizer
+
+
+class FakeChain:
+    """记录调用和最大并发数的假LLM链"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return f"{self.prefix}{len(self.calls)}"
+
+
+@pytest.fixture
+def summarizer(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "summarize_concurrency", 3)
+    monkeypatch.setattr(settings, "summarize_merge_group_size", 4)
+    monkeypatch.setattr(settings, "summary_cache_path", str(tmp_path / "summaries"))
+    monkeypatch.setattr(settings, "llm_response_cache_enabled", False)
+    with patch("src.models.summarization.document_summarizer.OllamaLLMClient"):
+        summarizer = DocumentSummarizer()
+    summarizer.summary_chain = FakeChain("摘要")
+    summarizer.merge_chain = FakeChain("合并")
+    # 每块约4000个token，测试文本中每个段落单独成块
+    summarizer.chunk_tokens = 4000
+    return summarizer
+
+
+@pytest.mark.asyncio
+async def test_map_is_concurrent_and_reduce_is_tree(summarizer):
+    """测试map阶段受并发限制并发执行，reduce阶段按组逐层合并"""
+    text = "\n\n".join([f"第{i}段内容" * 600 for i in range(10)])
+    timings = []
+
+    result = await summarizer.summarize_text(text, max_recursion=3, max_length=2000, timings=timings)
+
+    chunks = len(summarizer.summary_chain.calls)
+    assert chunks > 4
+    assert summarizer.summary_chain.max_in_flight == 3
+    # 每层按4个一组合并，直到只剩一个摘要
+    assert [t["level"] for t in timings] == list(range(len(timings)))
+    assert timings[0]["inputs"] == chunks
+    assert timings[-1]["outputs"] == 1
+    assert all(t["outputs"] == -(-t["inputs"] // 4) for t in timings[1:])
+    assert "summaries" in summarizer.merge_chain.calls[0]
+    assert result.startswith("合并")
+
+
+@pytest.mark.asyncio
+async def test_reduce_stops_at_max_recursion(summarizer):
+    """测试达到最大层数时返回拼接后截断的摘要"""
+    text = "\n\n".join([f"第{i}段内容" * 600 for i in range(10)])
+
+    result = await summarizer.summarize_text(text, max_recursion=0, max_length=50)
+
+    assert summarizer.merge_chain.calls == []
+    assert result.startswith("部分1:")
+    assert len(result) == 53
+
+
+@pytest.mark.asyncio
+async def test_edited_document_only_resummarizes_changed_chunks(summarizer):
+    """测试文档局部修改后只有变化的块及其上层合并调用LLM，未修改的文档直接命中最终摘要缓存"""
+    paragraphs = [f"第{i}段" * 1000 for i in range(10)]
+    first = await summarizer.summarize_text("\n\n".join(paragraphs))
+    assert len(summarizer.summary_chain.calls) == 10
+
+    # 相同内容直接命中最终摘要缓存
+    summarizer.summary_chain = FakeChain("新摘要")
+    summarizer.merge_chain = FakeChain("新合并")
+    assert await summarizer.summarize_text("\n\n".join(paragraphs)) == first
+    assert summarizer.summary_chain.calls == []
+    assert summarizer.merge_chain.calls == []
+
+    # 修改最后一段：map只处理该块，reduce只重新合并它所在的组和根节点
+    paragraphs[9] = "修改后的第9段" * 500
+    result = await summarizer.summarize_text("\n\n".join(paragraphs))
+    assert summarizer.summary_chain.calls == [{"content": paragraphs[9]}]
+    assert len(summarizer.merge_chain.calls) == 2
+    assert result != first
+
+
+class FailingOnceChain(FakeChain):
+    """对指定内容的第一次调用失败的假LLM链"""
+
+    def __init__(self, prefix, fail_content):
+        super().__init__(prefix)
+        self.fail_content = fail_content
+
+    async def ainvoke(self, inputs):
+        if inputs.get("content") == self.fail_content:
+            self.fail_content = None
+            raise TimeoutError("等待Ollama空闲超时")
+        return await super().ainvoke(inputs)
+
+
+@pytest.mark.asyncio
+async def test_degraded_summary_is_not_cached(summarizer):
+    """测试有块摘要失败时最终摘要不写入缓存，再次摘要时重新调用LLM"""
+    paragraphs = [f"第{i}段" * 1000 for i in range(5)]
+    text = "\n\n".join(paragraphs)
+    summarizer.summary_chain = FailingOnceChain("摘要", paragraphs[2])
+
+    first = await summarizer.summarize_text(text)
+    assert len(summarizer.summary_chain.calls) == 4
+
+    second = await summarizer.summarize_text(text)
+    # 只有失败的块重新生成摘要，其余块命中块摘要缓存
+    assert summarizer.summary_chain.calls[-1] == {"content": paragraphs[2]}
+    assert len(summarizer.summary_chain.calls) == 5
+    assert second != first
+
+    # 完整的摘要写入缓存
+    calls = len(summarizer.merge_chain.calls)
+    assert await summarizer.summarize_text(text) == second
+    assert len(summarizer.merge_chain.calls) == calls
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompts_hit_llm_response_cache(summarizer, tmp_path):
+    """测试摘要缓存未启用时，相同的块和合并提示词由LLM响应缓存返回，不再调用模型"""
+    summarizer.cache = None
+    summarizer.response_cache = LLMResponseCache(str(tmp_path / "llm"), max_entries=64)
+    text = "\n\n".join([f"第{i}段内容" * 600 for i in range(5)])
+
+    first = await summarizer.summarize_text(text)
+    calls = (len(summarizer.summary_chain.calls), len(summarizer.merge_chain.calls))
+    assert await summarizer.summarize_text(text) == first
+    assert (len(summarizer.summary_chain.calls), len(summarizer.merge_chain.calls)) == calls
+
+    chains = summarizer.response_cache.stats()["chains"]
+    assert chains["summary_map"]["hits"] == calls[0]
+    assert chains["summary_merge"]["hit_rate"] == 0.5
+
+
+def test_summary_cache_is_the_only_cache_layer(monkeypatch, tmp_path):
+    """测试摘要缓存启用时不再使用LLM响应缓存，块摘要和合并结果只缓存一份"""
+    monkeypatch.setattr(settings, "summary_cache_enabled", True)
+    monkeypatch.setattr(settings, "summary_cache_path", str(tmp_path / "summaries"))
+    monkeypatch.setattr(settings, "llm_response_cache_enabled", True)
+    with patch("src.models.summarization.document_summarizer.OllamaLLMClient"):
+        summarizer = DocumentSummarizer()
+
+    assert summarizer.cache is not None
+    assert summarizer.response_cache is None
+
+
+def test_chunk_text_fills_token_budget(summarizer):
+    """测试分块按token数尽量填满预算，超长段落按句子切分，超长句子直接切断"""
+    paragraphs = [f"第{number}段。" * 100 for number in "一二三四五六七八九"]
+    chunks = summarizer._chunk_text("\n\n".join(paragraphs), max_tokens=1000)
+
+    # 每段约400个token，每块放下两段
+    assert len(chunks) == 5
+    assert chunks[0] == paragraphs[0] + "\n\n" + paragraphs[1]
+    assert all(summarizer.token_counter.count(chunk) <= 1000 for chunk in chunks)
+
+    long_paragraph = "这是一个句子。" * 300 + "没有标点" * 600
+    chunks = summarizer._chunk_text(long_paragraph, max_tokens=1000)
+    assert "".join(chunks) == long_paragraph
+    assert all(summarizer.token_counter.count(chunk) <= 1000 for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_defaults_come_from_settings(summarizer, monkeypatch):
+    """测试未指定参数时使用summarize_max_recursion和summarize_max_length"""
+    monkeypatch.setattr(settings, "summarize_max_recursion", 0)
+    monkeypatch.setattr(settings, "summarize_max_length", 20)
+    text = "\n\n".join([f"第{i}段内容" * 600 for i in range(3)])
+
+    result = await summarizer.summarize_text(text)
+
+    assert summarizer.merge_chain.calls == []
+    assert len(result) == 23
+
+
+@pytest.mark.asyncio
+async def test_summarize_text_with_status_reports_degraded(summarizer):
+    """测试有块摘要失败时返回退化标记，重新生成完整摘要后不再退化"""
+    paragraphs = [f"第{i}段" * 1000 for i in range(5)]
+    text = "\n\n".join(paragraphs)
+    summarizer.summary_chain = FailingOnceChain("摘要", paragraphs[1])
+
+    assert (await summarizer.summarize_text_with_status(text))[1] is True
+    assert (await summarizer.summarize_text_with_status(text))[1] is False
+    # 命中最终摘要缓存的摘要是完整的
+    assert (await summarizer.summarize_text_with_status(text))[1] is False
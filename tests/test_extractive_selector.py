@@ -0,0 +1,41 @@
+import numpy as np
+from src.models.summarization.extractive_selector import ExtractiveSelector
+
+
+def _embeddings():
+    """三个主题：主题A有4个片段，主题B有2个片段，主题C只有1个离群片段"""
+    rng = np.random.default_rng(0)
+    topics = np.eye(8, dtype=np.float32)[:3]
+    labels = [0, 0, 1, 0, 1, 0, 2]
+    return np.stack([topics[label] + 0.05 * rng.standard_normal(8) for label in labels]), labels
+
+
+def test_centrality_ranks_dense_topic_highest():
+    """测试相似片段最多的主题中心度最高，离群片段最低"""
+    embeddings, labels = _embeddings()
+    scores = ExtractiveSelector(token_budget=0, diversity=0.0).centrality(embeddings)
+
+    assert labels[int(np.argmax(scores))] == 0
+    assert int(np.argmin(scores)) == 6
+    assert abs(scores.sum() - 1.0) < 1e-6
+
+
+def test_select_respects_budget_covers_topics_and_keeps_order():
+    """测试预选不超过token预算、兼顾不同主题，并按原文顺序返回"""
+    embeddings, labels = _embeddings()
+    texts = ["内容" * 50] * len(labels)
+    selector = ExtractiveSelector(token_budget=200, diversity=0.5)
+
+    selected = selector.select(texts, embeddings)
+
+    assert len(selected) == 2
+    assert selected == sorted(selected)
+    assert {labels[i] for i in selected} == {0, 1}
+
+
+def test_select_returns_all_chunks_within_budget():
+    """测试全文未超出预算时不做预选"""
+    embeddings, labels = _embeddings()
+    texts = ["短片段"] * len(labels)
+
+    assert ExtractiveSelector(token_budget=1000).select(texts, embeddings) == list(range(len(labels)))
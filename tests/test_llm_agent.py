@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("llama_index.llms.ollama")
+
+from llama_index.core.base.llms.types import ChatMessage, ChatResponse
+from llama_index.llms.ollama import Ollama
+from src.mcp import llm_agent
+from src.mcp.llm_agent import GatewayOllama
+from src.models.llm.ollama_gateway import OllamaGateway
+
+
+def _response(text):
+    return ChatResponse(message=ChatMessage(role="assistant", content=text), delta=text)
+
+
+@pytest.fixture
+def gateway():
+    gateway = OllamaGateway(max_in_flight=1, max_queue=10, queue_timeout=5, request_timeout=5)
+    with patch.object(llm_agent, "ollama_gateway", gateway):
+        yield gateway
+
+
+@pytest.fixture
+def llm():
+    return GatewayOllama(model="qwen2.5:latest")
+
+
+def test_complete_and_stream_take_agent_slot(gateway, llm):
+    """测试complete经由chat占用一个名额，流式输出结束前一直占用名额"""
+    in_flight = []
+
+    def chat(self, messages, **kwargs):
+        in_flight.append(gateway.stats()["in_flight"])
+        return _response("回答")
+
+    def stream_chat(self, messages, **kwargs):
+        for text in ["票据", "系统"]:
+            in_flight.append(gateway.stats()["in_flight"])
+            yield _response(text)
+
+    with patch.object(Ollama, "chat", chat), patch.object(Ollama, "stream_chat", stream_chat):
+        assert llm.complete("什么是票据系统").text == "回答"
+        assert [response.delta for response in llm.stream_complete("什么是票据系统")] == ["票据", "系统"]
+
+    assert in_flight == [1, 1, 1]
+    stats = gateway.stats()
+    assert stats["in_flight"] == 0
+    assert stats["priorities"]["agent"]["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_async_chat_and_stream_take_agent_slot(gateway, llm):
+    """测试achat和astream_complete在协程中占用名额，流式输出结束后归还"""
+    in_flight = []
+
+    async def achat(self, messages, **kwargs):
+        in_flight.append(gateway.stats()["in_flight"])
+        return _response("回答")
+
+    async def astream_chat(self, messages, **kwargs):
+        async def gen():
+            for text in ["票据", "系统"]:
+                await asyncio.sleep(0)
+                in_flight.append(gateway.stats()["in_flight"])
+                yield _response(text)
+        return gen()
+
+    with patch.object(Ollama, "achat", achat), patch.object(Ollama, "astream_chat", astream_chat):
+        assert (await llm.acomplete("什么是票据系统")).text == "回答"
+        responses = [response.delta async for response in await llm.astream_complete("什么是票据系统")]
+
+    assert responses == ["票据", "系统"]
+    assert in_flight == [1, 1, 1]
+    assert gateway.stats()["in_flight"] == 0
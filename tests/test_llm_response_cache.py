@@ -0,0 +1,76 @@
+import time
+import pytest
+from src.config import settings
+from src.models.llm.ollama_llm import OllamaLLMClient, MODEL_OPTIONS
+from src.models.llm.response_cache import LLMResponseCache
+
+
+class FakeChain:
+    """记录调用次数的假RAG链"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, inputs):
+        self.calls += 1
+        return f"回答{self.calls}"
+
+    async def astream(self, inputs):
+        self.calls += 1
+        for token in ["流式", "回答"]:
+            yield token
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "use_ollama", True)
+    monkeypatch.setattr(settings, "llm_response_cache_enabled", False)
+    client = OllamaLLMClient()
+    client.rag_chain = FakeChain()
+    client.response_cache = LLMResponseCache(str(tmp_path / "llm"), max_entries=16)
+    return client
+
+
+def test_cache_persists_and_expires(tmp_path):
+    """测试响应写入磁盘后新的缓存实例仍能命中，过期后视为未命中"""
+    cache = LLMResponseCache(str(tmp_path), max_entries=16, ttl=60)
+    key = cache.fingerprint(MODEL_OPTIONS, "提示词")
+    cache.set(key, "响应")
+
+    reopened = LLMResponseCache(str(tmp_path), max_entries=16, ttl=60)
+    assert reopened.get("rag_answer", key) == "响应"
+
+    entry = reopened.memory.get(key)
+    entry["created_at"] = time.time() - 120
+    assert reopened.get("rag_answer", key) is None
+    assert reopened.stats()["chains"]["rag_answer"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_fingerprint_depends_on_options_and_prompt():
+    assert LLMResponseCache.fingerprint(MODEL_OPTIONS, "提示词") == LLMResponseCache.fingerprint(dict(MODEL_OPTIONS), "提示词")
+    assert LLMResponseCache.fingerprint(MODEL_OPTIONS, "提示词") != LLMResponseCache.fingerprint(MODEL_OPTIONS, "提示词2")
+    assert LLMResponseCache.fingerprint(MODEL_OPTIONS, "提示词") != LLMResponseCache.fingerprint(
+        {**MODEL_OPTIONS, "temperature": 0.0}, "提示词")
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_does_not_reach_model(client):
+    """测试相同的问题和上下文只调用一次模型，流式问答也复用缓存"""
+    context = [{"content": "票据系统的说明"}]
+
+    assert await client.generate_answer("什么是票据系统", context) == "回答1"
+    assert await client.generate_answer("什么是票据系统", context) == "回答1"
+    assert [token async for token in client.stream_answer("什么是票据系统", context)] == ["回答1"]
+    assert client.rag_chain.calls == 1
+
+    assert await client.generate_answer("什么是票据系统", [{"content": "其他内容"}]) == "回答2"
+    assert client.response_cache.stats()["chains"]["rag_answer"]["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_streamed_answer_is_cached_after_completion(client):
+    context = [{"content": "票据系统的说明"}]
+
+    assert [token async for token in client.stream_answer("问题", context)] == ["流式", "回答"]
+    assert await client.generate_answer("问题", context) == "流式回答"
+    assert client.rag_chain.calls == 1
@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+pytest.importorskip("mcp")
+
+from src.mcp import mcp_service
+from src.mcp.constants import ANSWER_STREAM_LOGGER
+
+
+@pytest.mark.asyncio
+async def test_generate_answer_stream_sends_log_notifications():
+    """测试stream=True时通过日志通知推送上下文和回答片段，工具结果仍为完整回答"""
+    context = [{"content": "票据系统的说明", "metadata": {}}]
+
+    async def stream_answer(query, packed):
+        for token in ["票据", "系统"]:
+            yield token
+
+    service = MagicMock()
+    service.is_initialized.return_value = True
+    service.vectorizer.hybrid_search.return_value = context
+    service.context_packer = None
+    service.llm.use_ollama = True
+    service.llm.stream_answer = stream_answer
+    ctx = MagicMock()
+    ctx.session.send_log_message = AsyncMock()
+    ctx.report_progress = AsyncMock()
+
+    with patch.object(mcp_service, "retrieval_service", service):
+        answer = await mcp_service.generate_answer("什么是票据系统", top_k=3, stream=True, ctx=ctx)
+
+    assert answer == "票据系统"
+    notifications = [call.kwargs for call in ctx.session.send_log_message.await_args_list]
+    assert all(notification["logger"] == ANSWER_STREAM_LOGGER for notification in notifications)
+    assert [notification["data"]["type"] for notification in notifications] == ["context", "token", "token"]
+    assert notifications[0]["data"]["context"] == context
+    assert [call.args[0] for call in ctx.report_progress.await_args_list] == [1, 2]
+    service.llm.generate_answer.assert_not_called()
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import pytest
+from src.models.llm.ollama_gateway import OllamaGateway
+
+
+class SlowChain:
+    """记录调用顺序和最大并发数的假LLM链"""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return inputs
+
+
+@pytest.mark.asyncio
+async def test_in_flight_limit_and_priority_order():
+    """测试并发不超过上限，排队的请求按问答 > 代理 > 摘要的顺序获得名额"""
+    gateway = OllamaGateway(max_in_flight=1, max_queue=10, queue_timeout=5, request_timeout=5)
+    chain = SlowChain()
+
+    first = asyncio.create_task(gateway.ainvoke(chain, "summary-1", priority="summary"))
+    await asyncio.sleep(0)
+    waiting = [asyncio.create_task(gateway.ainvoke(chain, name, priority=name.split("-")[0]))
+               for name in ["summary-2", "agent-1", "query-1"]]
+    await asyncio.sleep(0)
+    assert gateway.stats()["queued"] == 3
+
+    await asyncio.gather(first, *waiting)
+    assert chain.calls == ["summary-1", "query-1", "agent-1", "summary-2"]
+    assert chain.max_in_flight == 1
+    stats = gateway.stats()
+    assert stats["in_flight"] == 0
+    assert stats["priorities"]["summary"] == {"requests": 2, "queued": 1, "timeouts": 0, "rejected": 0}
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_and_full_queue():
+    """测试排队超时和队列已满时请求失败，且不占用名额"""
+    gateway = OllamaGateway(max_in_flight=1, max_queue=1, queue_timeout=0.05, request_timeout=5)
+    chain = SlowChain(delay=0.2)
+
+    running = asyncio.create_task(gateway.ainvoke(chain, "query-1", priority="query"))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(gateway.ainvoke(chain, "summary-1", priority="summary"))
+    await asyncio.sleep(0)
+    with pytest.raises(RuntimeError):
+        await gateway.ainvoke(chain, "summary-2", priority="summary")
+    with pytest.raises(TimeoutError):
+        await queued
+
+    await running
+    stats = gateway.stats()
+    assert stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["priorities"]["summary"]["timeouts"] == 1
+    assert stats["priorities"]["summary"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_callers_share_the_limit():
+    """测试线程中的同步调用与协程共用并发名额"""
+    gateway = OllamaGateway(max_in_flight=1, max_queue=10, queue_timeout=5, request_timeout=5)
+    order = []
+
+    def agent_call():
+        with gateway.sync_slot("agent"):
+            order.append("agent")
+
+    async with gateway.slot("query"):
+        thread = threading.Thread(target=agent_call)
+        thread.start()
+        await asyncio.sleep(0.05)
+        assert order == []
+        order.append("query")
+    await asyncio.to_thread(thread.join)
+
+    assert order == ["query", "agent"]
+    assert gateway.stats()["in_flight"] == 0
+
+
+def test_rejects_unknown_priority():
+    gateway = OllamaGateway(max_in_flight=1)
+    with pytest.raises(ValueError):
+        with gateway.sync_slot("batch"):
+            pass
+
+
+class StreamChain:
+    """逐个输出片段的假LLM链，记录输出流是否被关闭"""
+
+    def __init__(self, tokens, delay=0.01):
+        self.tokens = tokens
+        self.delay = delay
+        self.closed = False
+
+    async def astream(self, inputs):
+        try:
+            for token in self.tokens:
+                await asyncio.sleep(self.delay)
+                yield token
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_stream_holds_slot_until_exhausted():
+    """测试流式调用在输出结束前一直占用名额"""
+    gateway = OllamaGateway(max_in_flight=1, max_queue=10, queue_timeout=5, request_timeout=5)
+    chain = StreamChain(["票据", "系统"])
+
+    tokens = []
+    async for token in gateway.astream(chain, {}, priority="query"):
+        assert gateway.stats()["in_flight"] == 1
+        tokens.append(token)
+
+    assert tokens == ["票据", "系统"]
+    assert gateway.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_request_timeout_covers_whole_output():
+    """测试流式调用从开始到输出结束超过request_timeout时取消，并归还名额"""
+    gateway = OllamaGateway(max_in_flight=1, max_queue=10, queue_timeout=5, request_timeout=0.05)
+    # 每个片段都在超时之内，但整个输出超过超时时间
+    chain = StreamChain(["片段"] * 10, delay=0.02)
+
+    tokens = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for token in gateway.astream(chain, {}, priority="query"):
+            tokens.append(token)
+
+    assert 0 < len(tokens) < 10
+    assert chain.closed
+    assert gateway.stats()["in_flight"] == 0
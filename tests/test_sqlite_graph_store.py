@@ -0,0 +1,119 @@
+import asyncio
+from src.models.graph.sqlite_graph_store import SQLiteGraphStore
+
+
+def _chunk_rows(doc_id, count):
+    return [
+        {
+            "chunk_id": f"{doc_id}_chunk_{i}",
+            "content": f"片段{i}",
+            "metadata": {"chunk_id": f"{doc_id}_chunk_{i}", "doc_id": doc_id, "chunk_index": i}
+        }
+        for i in range(count)
+    ]
+
+
+def test_sqlite_graph_store_create_and_get(tmp_path):
+    """测试SQLite图存储的文档/片段写入和读取"""
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+
+    async def run():
+        await store.create_document_node("doc1", {"doc_id": "doc1", "filename": "test.txt"})
+        await store.create_chunk_nodes("doc1", _chunk_rows("doc1", 5), batch_size=2)
+
+        metadata = await store.get_document_metadata("doc1")
+        chunks = await store.get_document_chunks("doc1")
+        page, next_cursor = await store.get_document_chunks_page("doc1", cursor=1, limit=2, exclude=["content"])
+        neighbors = await store.get_neighbor_chunks(["doc1_chunk_0", "doc1_chunk_3"], 1)
+        missing = await store.get_document_metadata("missing")
+        await store.close()
+        return metadata, chunks, page, next_cursor, neighbors, missing
+
+    metadata, chunks, page, next_cursor, neighbors, missing = asyncio.run(run())
+
+    assert metadata == {"doc_id": "doc1", "filename": "test.txt"}
+    assert [c["chunk_index"] for c in chunks] == [0, 1, 2, 3, 4]
+    assert chunks[0]["content"] == "片段0"
+    assert [c["chunk_index"] for c in page] == [2, 3]
+    assert "content" not in page[0]
+    assert next_cursor == 3
+    assert [c["chunk_index"] for c in neighbors["doc1_chunk_0"]] == [0, 1]
+    assert [c["chunk_index"] for c in neighbors["doc1_chunk_3"]] == [2, 3, 4]
+    assert missing is None
+
+
+def test_sqlite_graph_store_skips_chunks_without_document(tmp_path):
+    """测试文档节点不存在时不写入片段"""
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+
+    async def run():
+        await store.create_chunk_nodes("doc1", _chunk_rows("doc1", 2))
+        return await store.get_document_chunks("doc1")
+
+    assert asyncio.run(run()) == []
+
+
+def test_sqlite_graph_store_snapshot_round_trip(tmp_path):
+    """测试快照接口导出的节点和关系导入另一个SQLite图存储后可以正常查询"""
+    source = SQLiteGraphStore(str(tmp_path / "source.db"))
+    target = SQLiteGraphStore(str(tmp_path / "target.db"))
+
+    async def write():
+        await source.create_document_node("doc1", {"doc_id": "doc1", "filename": "test.txt"})
+        await source.create_chunk_nodes("doc1", _chunk_rows("doc1", 3))
+
+    asyncio.run(write())
+
+    relationships = list(source.iter_relationships())
+    assert sorted((r["type"], r["source_key"], r["target_key"]) for r in relationships if r["type"] == "NEXT") == [
+        ("NEXT", "doc1_chunk_0", "doc1_chunk_1"),
+        ("NEXT", "doc1_chunk_1", "doc1_chunk_2")
+    ]
+
+    for label in ("Document", "Chunk"):
+        target.import_nodes(label, list(source.iter_nodes(label)))
+    for rel_type in ("CONTAINS", "NEXT"):
+        rows = [r for r in relationships if r["type"] == rel_type]
+        target.import_relationships(rows[0]["source_label"], rel_type, rows[0]["target_label"], rows)
+
+    async def read():
+        chunks = await target.get_document_chunks("doc1")
+        neighbors = await target.get_neighbor_chunks(["doc1_chunk_1"], 1)
+        metadata = await target.get_document_metadata("doc1")
+        await source.close()
+        await target.close()
+        return chunks, neighbors, metadata
+
+    chunks, neighbors, metadata = asyncio.run(read())
+
+    assert [c["chunk_index"] for c in chunks] == [0, 1, 2]
+    assert [c["chunk_index"] for c in neighbors["doc1_chunk_1"]] == [0, 1, 2]
+    assert metadata == {"doc_id": "doc1", "filename": "test.txt"}
+
+
+def test_table_chunks_are_not_neighbors_of_text(tmp_path):
+    """测试表格片段按表格分段编号，不与正文片段或其他表格的片段相邻"""
+    store = SQLiteGraphStore(str(tmp_path / "graph.db"))
+    rows = _chunk_rows("doc1", 2) + [
+        {
+            "chunk_id": f"doc1_chunk_{index}",
+            "content": f"表格{index}",
+            "metadata": {"chunk_id": f"doc1_chunk_{index}", "doc_id": "doc1", "chunk_index": index,
+                         "content_type": "table"}
+        }
+        for index in (1_000_000, 1_000_001, 2_000_000)
+    ]
+
+    async def run():
+        await store.create_document_node("doc1", {"doc_id": "doc1", "filename": "test.pdf"})
+        await store.create_chunk_nodes("doc1", rows)
+        return await store.get_neighbor_chunks(["doc1_chunk_1", "doc1_chunk_1000001"], 2)
+
+    neighbors = asyncio.run(run())
+
+    assert [c["chunk_index"] for c in neighbors["doc1_chunk_1"]] == [0, 1]
+    assert [c["chunk_index"] for c in neighbors["doc1_chunk_1000001"]] == [1_000_000, 1_000_001]
+    assert sorted((r["source_key"], r["target_key"]) for r in store.iter_relationships() if r["type"] == "NEXT") == [
+        ("doc1_chunk_0", "doc1_chunk_1"),
+        ("doc1_chunk_1000000", "doc1_chunk_1000001")
+    ]
@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+from src.models.llm.llm_activity import LLMActivity
+from src.models.summarization.summary_scheduler import SummaryScheduler
+
+
+class FakeProcessor:
+    """记录摘要生成顺序的假文档处理器"""
+
+    def __init__(self, fail=()):
+        self.calls = []
+        self.fail = fail
+
+    async def generate_document_summary(self, file_path, doc_id, filename, chunks=None, chunk_embeddings=None):
+        self.calls.append(doc_id)
+        await asyncio.sleep(0.01)
+        return None if doc_id in self.fail else f"{doc_id}的摘要"
+
+
+async def _drain(scheduler):
+    await scheduler._queue.join()
+    await scheduler.stop()
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_by_priority_and_report_status():
+    """测试摘要任务按优先级执行，并记录每个文档的状态"""
+    processor = FakeProcessor(fail={"doc-failed"})
+    scheduler = SummaryScheduler(processor, activity=LLMActivity(), workers=1, idle_delay=0)
+    scheduler.submit("doc-low", "a.txt", "a.txt", priority="low")
+    scheduler.submit("doc-normal", "b.txt", "b.txt")
+    scheduler.submit("doc-failed", "c.txt", "c.txt")
+    assert scheduler.submit("doc-high", "d.txt", "d.txt", priority="high")["status"] == "queued"
+
+    await scheduler.start()
+    await _drain(scheduler)
+
+    assert processor.calls == ["doc-high", "doc-normal", "doc-failed", "doc-low"]
+    assert scheduler.get_status("doc-high")["status"] == "completed"
+    assert scheduler.get_status("doc-failed")["status"] == "failed"
+    assert scheduler.get_status("unknown") is None
+    assert scheduler.stats()["completed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_jobs_wait_for_interactive_requests():
+    """测试有交互式问答请求时不开始新的摘要任务"""
+    activity = LLMActivity()
+    processor = FakeProcessor()
+    scheduler = SummaryScheduler(processor, activity=activity, workers=1, idle_delay=0)
+    await scheduler.start()
+
+    async with activity.interactive():
+        scheduler.submit("doc-1", "a.txt", "a.txt")
+        await asyncio.sleep(0.05)
+        assert processor.calls == []
+        assert scheduler.get_status("doc-1")["status"] == "queued"
+
+    await _drain(scheduler)
+    assert processor.calls == ["doc-1"]
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_document_runs_once():
+    """测试同一文档排队中再次提交时只执行最新的任务"""
+    processor = FakeProcessor()
+    scheduler = SummaryScheduler(processor, activity=LLMActivity(), workers=1, idle_delay=0)
+    await scheduler.start()
+    scheduler.submit("doc-1", "a.txt", "a.txt", priority="low")
+    scheduler.submit("doc-1", "a.txt", "a.txt", priority="high")
+
+    await _drain(scheduler)
+    assert processor.calls == ["doc-1"]
+    assert scheduler.get_status("doc-1")["priority"] == "high"
+
+
+def test_submit_rejects_unknown_priority():
+    scheduler = SummaryScheduler(FakeProcessor(), activity=LLMActivity(), workers=1, idle_delay=0)
+    with pytest.raises(ValueError):
+        scheduler.submit("doc-1", "a.txt", "a.txt", priority="urgent")
+
+
+class FakeGraphStore:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def list_documents(self):
+        return self.documents
+
+
+class FakeSummaryStore:
+    def __init__(self, summaries):
+        self.summaries = summaries
+
+    def get_summarized_doc_ids(self, doc_ids):
+        if self.summaries is None:
+            raise ConnectionError("数据库不可用")
+        return {doc_id for doc_id in doc_ids if doc_id in self.summaries}
+
+
+@pytest.mark.asyncio
+async def test_recover_requeues_documents_without_summary(tmp_path):
+    """测试重启后重新提交已入库但没有摘要的文档，已有摘要、已在调度器中或原始文件缺失的文档跳过"""
+    files = {}
+    for name in ("pending.txt", "done.txt", "queued.txt"):
+        files[name] = tmp_path / name
+        files[name].write_text("内容", encoding="utf-8")
+    processor = FakeProcessor()
+    processor.store = FakeSummaryStore({"doc-done": {"summary": "已有摘要"}})
+    graph_store = FakeGraphStore([
+        {"doc_id": "doc-pending", "filename": "pending.txt", "original_file_path": str(files["pending.txt"])},
+        {"doc_id": "doc-done", "filename": "done.txt", "original_file_path": str(files["done.txt"])},
+        {"doc_id": "doc-queued", "filename": "queued.txt", "original_file_path": str(files["queued.txt"])},
+        {"doc_id": "doc-missing", "filename": "missing.txt", "original_file_path": str(tmp_path / "missing.txt")}
+    ])
+    scheduler = SummaryScheduler(processor, activity=LLMActivity(), workers=1, idle_delay=0)
+    scheduler.submit("doc-queued", str(files["queued.txt"]), "queued.txt")
+
+    await scheduler.start()
+    assert await scheduler.recover(graph_store) == 1
+    assert scheduler.get_status("doc-pending")["priority"] == "low"
+    await _drain(scheduler)
+
+    assert processor.calls == ["doc-queued", "doc-pending"]
+    assert scheduler.get_status("doc-missing") is None
+
+
+@pytest.mark.asyncio
+async def test_recover_aborts_when_summary_lookup_fails(tmp_path):
+    """测试查询已有摘要失败时不重新提交任何文档"""
+    file_path = tmp_path / "pending.txt"
+    file_path.write_text("内容", encoding="utf-8")
+    processor = FakeProcessor()
+    processor.store = FakeSummaryStore(None)
+    graph_store = FakeGraphStore([
+        {"doc_id": "doc-pending", "filename": "pending.txt", "original_file_path": str(file_path)}
+    ])
+    scheduler = SummaryScheduler(processor, activity=LLMActivity(), workers=1, idle_delay=0)
+
+    assert await scheduler.recover(graph_store) == 0
+    assert scheduler.get_status("doc-pending") is None
@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta
+import pytest
+from src.config import settings
+from src.models.storage.sqlite_store import SQLiteStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "sqlite_db_path", str(tmp_path / "summaries.db"))
+    store = SQLiteStore()
+    base = datetime(2025, 4, 1)
+    # 两行使用相同的created_at，验证游标按doc_id区分
+    store.restore_summary_rows([
+        {
+            "doc_id": f"doc{i:02d}",
+            "filename": f"file{i}.txt",
+            "summary": f"摘要{i}",
+            "created_at": base + timedelta(minutes=min(i, 5)),
+            "updated_at": base
+        }
+        for i in range(7)
+    ])
+    yield store
+    store.close()
+
+
+def test_cursor_pagination_matches_page_order(store):
+    """测试游标分页与页码分页返回相同的顺序"""
+    expected = [s["doc_id"] for s in store.get_paginated_summaries(page=1, page_size=10)["summaries"]]
+
+    doc_ids = []
+    cursor = None
+    while True:
+        result = store.get_summaries_by_cursor(cursor=cursor, page_size=3)
+        doc_ids.extend(s["doc_id"] for s in result["summaries"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    assert doc_ids == expected
+    assert doc_ids[:3] == ["doc06", "doc05", "doc04"]
+    assert result["total"] == 7
+
+
+def test_page_mode_returns_cursor_for_next_page(store):
+    """测试页码分页返回的游标可以继续翻页"""
+    first = store.get_paginated_summaries(page=1, page_size=2)
+    second = store.get_summaries_by_cursor(cursor=first["next_cursor"], page_size=2)
+    assert [s["doc_id"] for s in second["summaries"]] == \
+        [s["doc_id"] for s in store.get_paginated_summaries(page=2, page_size=2)["summaries"]]
+
+
+def test_invalid_cursor_raises(store):
+    """测试无效游标抛出ValueError"""
+    with pytest.raises(ValueError):
+        store.get_summaries_by_cursor(cursor="invalid")
+
+
+def test_created_at_index_exists(store):
+    """测试created_at索引已创建"""
+    columns = [index.columns for index in store.db.get_indexes("document_summaries")]
+    assert ["created_at", "doc_id"] in columns
+
+
+def test_sqlite_pragmas_applied(store):
+    """测试WAL模式和同步级别按配置生效"""
+    assert store.db.execute_sql("PRAGMA journal_mode").fetchone()[0] == settings.sqlite_journal_mode
+    # synchronous=normal对应1
+    assert store.db.execute_sql("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_search_summaries_ranked_and_synced(store):
+    """测试全文检索按相关度返回，且保存摘要后索引同步更新"""
+    store.save_document_summary("doc_a", "票据交易系统需求.doc", "票据交易系统的业务需求，包括贴现和质押式回购")
+    store.save_document_summary("doc_b", "清算说明.doc", "资金清算流程，涉及票据交易的对账")
+
+    results = store.search_summaries("票据交易")
+    assert [r["doc_id"] for r in results][:2] == ["doc_a", "doc_b"]
+    assert "票据交易" in results[0]["snippet"]
+
+    store.save_document_summary("doc_b", "清算说明.doc", "资金清算流程")
+    assert [r["doc_id"] for r in store.search_summaries("票据交易")] == ["doc_a"]
+
+    # 短于3个字符的词退化为LIKE扫描
+    assert [r["doc_id"] for r in store.search_summaries("贴现")] == ["doc_a"]
+
+
+def test_paginated_summaries_field_projection(store):
+    """测试按字段投影返回摘要列表，预览在写入时生成"""
+    store.save_document_summary("doc_p", "preview.txt", "预览" * 500)
+    result = store.get_paginated_summaries(page=1, page_size=1, fields=["doc_id", "preview"])
+    assert result["summaries"] == [{"doc_id": "doc_p", "preview": ("预览" * 500)[:settings.summary_preview_length]}]
+    assert result["next_cursor"] is not None
+
+    with pytest.raises(ValueError):
+        store.get_paginated_summaries(page=1, page_size=1, fields=["password"])
+
+
+def test_compressed_summary_roundtrip_and_search(store, monkeypatch):
+    """测试启用压缩后摘要透明解压，全文检索仍然匹配解压后的文本"""
+    pytest.importorskip("zstandard")
+    monkeypatch.setattr(settings, "summary_compression", True)
+    monkeypatch.setattr(settings, "summary_compression_min_length", 10)
+    text = "电子商业汇票服务平台的托收业务流程说明" * 20
+    store.save_document_summary("doc_z", "托收.doc", text)
+
+    raw = store.db.execute_sql("SELECT summary FROM document_summaries WHERE doc_id = 'doc_z'").fetchone()[0]
+    assert raw.startswith("zstd:") and len(raw) < len(text.encode("utf-8"))
+    assert store.get_document_summary("doc_z")["summary"] == text
+    assert [r["doc_id"] for r in store.search_summaries("托收业务")] == ["doc_z"]
+    assert [r["doc_id"] for r in store.search_summaries("托收")] == ["doc_z"]
+
+
+def test_bulk_save_and_batch_get(store):
+    """测试批量upsert与批量读取"""
+    assert store.save_document_summaries([
+        {"doc_id": "doc00", "filename": "file0.txt", "summary": "更新后的摘要"},
+        {"doc_id": "new1", "filename": "new1.txt", "summary": "新摘要1"},
+        {"doc_id": "new2", "filename": "new2.txt", "summary": "新摘要2"}
+    ], batch_size=2)
+
+    result = store.get_document_summaries(["doc00", "new1", "new2", "missing"])
+    assert set(result) == {"doc00", "new1", "new2"}
+    assert result["doc00"]["summary"] == "更新后的摘要"
+    # 已存在的文档保留原创建时间
+    assert result["doc00"]["created_at"] == datetime(2025, 4, 1)
+    assert store.get_summaries_count() == 9
+    assert [r["doc_id"] for r in store.search_summaries("更新后")] == ["doc00"]
+    assert store.get_summarized_doc_ids(["doc00", "new1", "missing"], batch_size=2) == {"doc00", "new1"}
+
+
+def test_mysql_store_refuses_summary_compression(monkeypatch):
+    """测试MySQL存储启用摘要压缩时初始化失败，不会悄悄丢失全文检索"""
+    from src.models.storage.mysql_store import MySQLStore
+    monkeypatch.setattr(settings, "summary_compression", True)
+
+    with pytest.raises(ValueError):
+        MySQLStore()
+
+
+def test_missing_index_is_added_to_existing_table(tmp_path, monkeypatch):
+    """测试已存在的表缺少索引时在初始化时补建，已有的索引不重复创建"""
+    monkeypatch.setattr(settings, "sqlite_db_path", str(tmp_path / "summaries.db"))
+    store = SQLiteStore()
+    names = {index.name for index in store.db.get_indexes("document_summaries")}
+    store.db.execute_sql("DROP INDEX document_summaries_created_at_doc_id")
+
+    store._ensure_indexes()
+    assert {index.name for index in store.db.get_indexes("document_summaries")} == names
+    # 索引都已存在时不做任何修改
+    store._ensure_indexes()
+    store.close()
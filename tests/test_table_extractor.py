@@ -0,0 +1,119 @@
+import pytest
+
+pytest.importorskip("camelot")
+
+from src.config import settings
+from src.models.table_processing import table_extractor
+from src.models.table_processing.table_extractor import TableExtractor
+
+
+class FakeContents:
+    def __init__(self, data):
+        self.data = data
+
+    def get_data(self):
+        if isinstance(self.data, Exception):
+            raise self.data
+        return self.data
+
+
+class FakePage:
+    def __init__(self, data):
+        self.data = data
+
+    def get_contents(self):
+        return None if self.data is None else FakeContents(self.data)
+
+
+@pytest.fixture
+def extractor(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "table_cache_path", str(tmp_path / "tables"))
+    monkeypatch.setattr(settings, "table_extraction_pages_per_task", 2)
+    return TableExtractor()
+
+
+def test_ruling_pages_are_detected(extractor, monkeypatch):
+    """测试只有含画线操作符的页面会交给camelot，内容流解析失败的页面保守保留"""
+    pages = [
+        FakePage(b"BT /F1 12 Tf (text only) Tj ET"),
+        FakePage(b"0 0 m 100 0 l 100 100 l 0 100 l 0 0 l S"),
+        FakePage(None),
+        FakePage(b"10 10 200 50 re 10 60 200 50 re 10 110 200 50 re 10 160 200 50 re S"),
+        FakePage(ValueError("broken stream")),
+    ]
+    monkeypatch.setattr(table_extractor, "PdfReader", lambda path: type("Reader", (), {"pages": pages})())
+
+    assert extractor._find_ruling_pages("a.pdf") == [2, 4, 5]
+
+
+def test_pdf_tables_are_extracted_by_page_group(extractor, monkeypatch, tmp_path):
+    """测试按页分组抽取表格，并把表格转换为带页码的文档片段"""
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    monkeypatch.setattr(extractor, "_find_ruling_pages", lambda path: [1, 3])
+    calls = []
+
+    def fake_read(path, pages):
+        calls.append(pages)
+        return [{"page": 3, "rows": [["名称", "数量"], ["票据", "2"]]}, {"page": 1, "rows": []}]
+
+    monkeypatch.setattr(table_extractor, "_read_pdf_tables", fake_read)
+
+    docs = extractor.extract_tables_from_pdf(str(pdf_path))
+
+    assert calls == ["1,3"]
+    assert len(docs) == 1
+    assert docs[0].metadata == {"source": str(pdf_path), "content_type": "table", "table_index": 0, "page": 3}
+    assert "列标题: 名称 | 数量" in docs[0].page_content
+    assert "该行数据表示: 名称为票据, 数量为2" in docs[0].page_content
+
+
+def test_pdf_tables_hit_cache_for_same_content(extractor, monkeypatch, tmp_path):
+    """测试内容相同的文件第二次抽取直接命中缓存，不再运行camelot"""
+    pdf_path = tmp_path / "a.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 fake")
+    calls = []
+
+    def fake_rows(path):
+        calls.append(path)
+        return [{"page": 1, "rows": [["列"], ["值"]]}]
+
+    monkeypatch.setattr(extractor, "_extract_pdf_table_rows", fake_rows)
+
+    first = extractor.extract_tables_from_pdf(str(pdf_path))
+    copy_path = tmp_path / "b.pdf"
+    copy_path.write_bytes(pdf_path.read_bytes())
+    second = extractor.extract_tables_from_pdf(str(copy_path))
+
+    assert calls == [str(pdf_path)]
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+    assert second[0].metadata["source"] == str(copy_path)
+
+
+def test_docx_tables_hit_cache(extractor, monkeypatch, tmp_path):
+    """测试Word表格的抽取结果按文件内容缓存"""
+    docx_path = tmp_path / "a.docx"
+    docx_path.write_bytes(b"fake docx")
+    opened = []
+
+    class FakeCell:
+        def __init__(self, text):
+            self.text = text
+
+    class FakeRow:
+        def __init__(self, values):
+            self.cells = [FakeCell(value) for value in values]
+
+    class FakeDocx:
+        def __init__(self, path):
+            opened.append(path)
+            self.tables = [type("Table", (), {"rows": [FakeRow(["列"]), FakeRow(["值"])]})()]
+
+    monkeypatch.setattr(table_extractor, "Document", FakeDocx)
+
+    first = extractor.extract_tables_from_docx(str(docx_path))
+    second = extractor.extract_tables_from_docx(str(docx_path))
+
+    assert opened == [str(docx_path)]
+    assert len(first) == 1
+    assert second[0].page_content == first[0].page_content
@@ -52,7 +52,7 @@ async def test_vectorstore_update_after_upload(setup_test_environment):
          patch('src.api.api_service.rag_system.vectorizer.initialize_vector_store') as mock_initialize_vector_store, \
          patch('src.api.api_service.rag_system.doc_processor.generate_document_summary', return_value="测试摘要"), \
          patch('src.api.api_service.rag_system.graph_store.create_document_node'), \
-         patch('src.api.api_service.rag_system.graph_store.create_chunk_node'):
+         patch('src.api.api_service.rag_system.graph_store.create_chunk_nodes'):
         
         # 发送上传请求
         with open(TEST_FILE_PATH, "rb") as f: